@@ -2,25 +2,46 @@
 
 from django.contrib import admin
 from .models import Survey, Question, Response, Answer
+from .rollups import delete_responses
+from .caching import bump_results_version
 
 class QuestionInline(admin.TabularInline):
     model = Question
     extra = 1
 
 class SurveyAdmin(admin.ModelAdmin):
-    list_display = ('title', 'is_active', 'created_at')
+    list_display = ('title', 'series', 'is_active', 'created_at')
+    list_filter = ('series',)
     inlines = [QuestionInline]
 
+    def save_related(self, request, form, formsets, change):
+        # Question edits from the inline change the results
+        super().save_related(request, form, formsets, change)
+        bump_results_version([form.instance.id], definition=True)
+
 class AnswerInline(admin.TabularInline):
     model = Answer
-    readonly_fields = ('question', 'value')
+    fields = ('question', 'answer_value')
+    readonly_fields = ('question', 'answer_value')
     extra = 0
     can_delete = False
 
+    @admin.display(description="Cevap Değeri")
+    def answer_value(self, obj):
+        # Choice labels are resolved from the stored option indices
+        return obj.display_value()
+
 class ResponseAdmin(admin.ModelAdmin):
     list_display = ('user', 'survey', 'submitted_at')
     inlines = [AnswerInline]
     readonly_fields = ('user', 'survey', 'submitted_at')
 
+    # Deleting from the admin must also keep the results rollups in sync
+    def delete_model(self, request, obj):
+        delete_responses([obj])
+
+    def delete_queryset(self, request, queryset):
+        delete_responses(queryset)
+
 admin.site.register(Survey, SurveyAdmin)
 admin.site.register(Response, ResponseAdmin)
\ No newline at end of file
@@ -0,0 +1,112 @@
+# backend/api/batch.py
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .caching import get_survey_validators
+from .models import Answer, AnswerChoice, Response, Survey
+from .rollups import apply_answer_delta
+from .serializers import prepare_answer
+
+# Upper bound of one kiosk sync request
+BATCH_MAX_RESPONSES = 500
+
+
+def submit_batch(items):
+    """
+    Validates and stores a batch of responses (kiosk sync).
+
+    `items` are {"survey": id, "answers": [{"question": id, "value": ...}],
+    "submitted_at": ISO datetime (optional), "client_id": any (optional)}.
+    Responses have no user (anonymous kiosk respondents), so a kiosk account
+    can submit any number of them. Valid items are stored even when others
+    are rejected. Whatever the batch size: one Survey query, the cached
+    definitions (one query for the surveys not cached yet), three bulk inserts
+    and the rollup update, in one transaction.
+
+    Returns one {"index", "status", "id" | "errors"} entry per item.
+    """
+    results, pending = [], []
+    for index, (item, (response, answers, errors)) in enumerate(zip(items, build_responses(items))):
+        result = {'index': index}
+        if isinstance(item, dict) and 'client_id' in item:
+            result['client_id'] = item['client_id']
+        results.append(result)
+
+        if errors:
+            result.update(status='invalid', errors=errors)
+        else:
+            pending.append((result, response, answers))
+
+    if pending:
+        with transaction.atomic():
+            write_responses([(response, answers) for _, response, answers in pending])
+        for result, response, _ in pending:
+            result.update(status='created', id=response.id)
+    return results
+
+
+def build_responses(items, accepted=False):
+    """
+    [(Response, [Answer], errors)] for submission dicts, checked by the cached
+    survey validators. Nothing is written; errors is None when valid.
+
+    `accepted` submissions were validated when they were received (write-behind
+    journal): inactive surveys and required questions added since are not held
+    against them.
+    """
+    # bool is an int subclass ("survey": true == 1): left out before the set merges them
+    survey_ids = {
+        item.get('survey') for item in items
+        if isinstance(item, dict) and isinstance(item.get('survey'), int) and not isinstance(item.get('survey'), bool)
+    }
+    rows = Survey.objects.filter(id__in=survey_ids).values_list('id', 'is_active', 'definition_version', 'created_at')
+    surveys = {survey_id: is_active or accepted for survey_id, is_active, _, _ in rows}
+    validators = get_survey_validators((survey_id, version, created_at) for survey_id, _, version, created_at in rows)
+    return [_build(item, surveys, validators, accepted) for item in items]
+
+
+def write_responses(entries):
+    """
+    Bulk-inserts [(Response, [Answer])] built by build_responses and updates
+    the rollups. Must run inside the caller's transaction.
+    """
+    if not entries:
+        return
+    Response.objects.bulk_create([response for response, _ in entries])
+    answers = [ans for _, item_answers in entries for ans in item_answers]
+    Answer.objects.bulk_create(answers)
+    AnswerChoice.objects.bulk_create(AnswerChoice.for_answers(answers))
+    apply_answer_delta(added=answers)
+
+
+def _build(item, surveys, validators, accepted):
+    """Unsaved (Response, [Answer], errors) of one batch item."""
+    if not isinstance(item, dict):
+        return None, [], {'non_field_errors': ["Geçersiz kayıt."]}
+
+    survey_id = item.get('survey')
+    if isinstance(survey_id, bool) or not surveys.get(survey_id):
+        return None, [], {'survey': ["Anket bulunamadı veya aktif değil."]}
+
+    submitted_at = timezone.now()
+    if item.get('submitted_at'):
+        moment = parse_datetime(str(item['submitted_at']))
+        if moment is None:
+            return None, [], {'submitted_at': ["Geçersiz tarih."]}
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        # A kiosk clock ahead of the server must not create future responses
+        submitted_at = min(moment, submitted_at)
+
+    answers_data = item.get('answers')
+    if not isinstance(answers_data, list) or not answers_data:
+        return None, [], {'answers': ["Cevap listesi boş olamaz."]}
+
+    cleaned, errors = validators[survey_id].check(answers_data, required=not accepted)
+    if errors:
+        return None, [], errors
+
+    response = Response(survey_id=survey_id, user=None, submitted_at=submitted_at)
+    return response, [prepare_answer(question, value, response=response) for question, value in cleaned], None
@@ -0,0 +1,178 @@
+# backend/api/caching.py
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import PendingSubmission, Question, Response, Survey
+from .validation import SurveyValidator
+
+HITS_KEY = 'results:hits'
+MISSES_KEY = 'results:misses'
+NOT_MODIFIED_KEY = 'results:not_modified'
+
+# Dropped on every write of the user; the timeout bounds what another
+# worker's process-local cache (locmem) can serve after a write
+ANSWERED_CACHE_TIMEOUT = 300
+
+
+def bump_results_version(survey_ids, definition=False):
+    """
+    Invalidates the cached results of the given surveys.
+
+    The version lives on the Survey row (not in the cache), so it is bumped in
+    the same transaction as the answer writes and is shared by every worker,
+    whatever cache backend is configured. `definition=True` (survey or question
+    edits) also invalidates the cached survey definitions.
+    """
+    survey_ids = set(survey_ids)
+    if survey_ids:
+        versions = {'results_version': F('results_version') + 1}
+        if definition:
+            versions['definition_version'] = F('definition_version') + 1
+        Survey.objects.filter(id__in=survey_ids).update(**versions)
+
+
+def results_etag(survey, variant=''):
+    return f'"{_version_tag(survey, variant)}"'
+
+
+def get_cached_results(survey, compute, variant=''):
+    """
+    Returns the results of `survey` from the cache, calling `compute()` on a miss.
+    `variant` tells apart the filtered results of the same survey (e.g. a query string).
+    """
+    key = f'results:data:{_version_tag(survey, variant)}'
+    data = cache.get(key)
+    if data is not None:
+        _count(HITS_KEY)
+        return data
+
+    _count(MISSES_KEY)
+    data = compute()
+    cache.set(key, data, getattr(settings, 'RESULTS_CACHE_TIMEOUT', 3600))
+    return data
+
+
+def get_survey_validators(surveys):
+    """
+    {survey_id: SurveyValidator} for (id, definition_version, created_at) tuples.
+
+    Served from the cache; the questions of every missing survey are loaded
+    with a single query. Edits bump definition_version, so entries never go stale.
+    """
+    keys = {_definition_key('validator', *survey): survey[0] for survey in surveys}
+    cached = cache.get_many(keys)
+    validators = {keys[key]: value for key, value in cached.items()}
+
+    missing = {survey_id: key for key, survey_id in keys.items() if key not in cached}
+    if missing:
+        questions = {survey_id: [] for survey_id in missing}
+        for question in Question.objects.filter(survey_id__in=missing):
+            questions[question.survey_id].append(question)
+        loaded = {survey_id: SurveyValidator(qs) for survey_id, qs in questions.items()}
+        cache.set_many(
+            {missing[survey_id]: validator for survey_id, validator in loaded.items()},
+            getattr(settings, 'RESULTS_CACHE_TIMEOUT', 3600),
+        )
+        validators.update(loaded)
+    return validators
+
+
+def get_survey_validator(survey):
+    """Cached SurveyValidator of a Survey instance (a cache hit, no query once compiled)."""
+    return get_survey_validators([(survey.id, survey.definition_version, survey.created_at)])[survey.id]
+
+
+def get_answered_survey_ids(user):
+    """
+    Ids of the surveys a user has answered: stored responses and journaled
+    (write-behind, not failed) submissions.
+
+    Cached per user; a miss reads the user's own rows through the
+    (user, survey) indexes, whatever the size of the Response table.
+    """
+    key = f'answered:{user.pk}'
+    survey_ids = cache.get(key)
+    if survey_ids is None:
+        survey_ids = frozenset(
+            Response.objects.filter(user=user).values_list('survey_id', flat=True)
+        ) | frozenset(
+            PendingSubmission.objects.filter(user=user, error='').values_list('survey_id', flat=True)
+        )
+        cache.set(key, survey_ids, ANSWERED_CACHE_TIMEOUT)
+    return survey_ids
+
+
+def forget_answered_surveys(user_ids):
+    """
+    Drops the cached answered sets of the given users, now and again once the
+    current transaction commits (a listing in between may have cached the old set).
+    """
+    keys = [f'answered:{user_id}' for user_id in set(user_ids) if user_id]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_survey_definitions(surveys, render):
+    """
+    {survey_id: JSON bytes} of the serialized survey definitions (survey and
+    ordered questions) for (id, definition_version, created_at) tuples.
+
+    `render(survey_ids)` serializes the surveys missing from the cache and
+    returns {survey_id: JSON bytes}; they are cached until the next edit
+    bumps definition_version.
+    """
+    keys = {_definition_key('definition', *survey): survey[0] for survey in surveys}
+    cached = cache.get_many(keys)
+    definitions = {keys[key]: value for key, value in cached.items()}
+
+    missing = {survey_id: key for key, survey_id in keys.items() if key not in cached}
+    if missing:
+        rendered = render(list(missing))
+        cache.set_many(
+            {missing[survey_id]: data for survey_id, data in rendered.items()},
+            getattr(settings, 'RESULTS_CACHE_TIMEOUT', 3600),
+        )
+        definitions.update(rendered)
+    return definitions
+
+
+def count_not_modified():
+    _count(NOT_MODIFIED_KEY)
+
+
+def cache_counters():
+    values = cache.get_many([HITS_KEY, MISSES_KEY, NOT_MODIFIED_KEY])
+    return {
+        'hits': values.get(HITS_KEY, 0),
+        'misses': values.get(MISSES_KEY, 0),
+        'not_modified': values.get(NOT_MODIFIED_KEY, 0),
+    }
+
+
+def _version_tag(survey, variant=''):
+    # created_at guards against a recycled id (e.g. after a database reset)
+    tag = f"{survey.id}.{survey.results_version}.{int(survey.created_at.timestamp() * 1000000)}"
+    if variant:
+        tag += '.' + hashlib.md5(variant.encode()).hexdigest()[:12]
+    return tag
+
+
+def _definition_key(prefix, survey_id, version, created_at):
+    # created_at guards against a recycled id, like _version_tag
+    return f'{prefix}:{survey_id}.{version}.{int(created_at.timestamp() * 1000000)}'
+
+
+def _count(key):
+    # add() is a no-op when the key exists, so incr() never sees a missing key
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
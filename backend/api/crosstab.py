@@ -0,0 +1,79 @@
+# backend/api/crosstab.py
+
+from django.db.models import Count, FilteredRelation, Q
+
+from .models import Answer
+from .results import CHOICE_TYPES, NUMERIC_TYPES
+
+CROSSTAB_TYPES = CHOICE_TYPES + NUMERIC_TYPES
+
+
+def question_categories(question):
+    """Column/row labels of a question: its options, or the 1..5 / 1..10 rating values."""
+    if question.question_type in CHOICE_TYPES:
+        options = question.options if isinstance(question.options, list) else []
+        return [str(opt).strip() for opt in options]
+    max_val = 10 if question.question_type == 'scale' else 5
+    return [str(i) for i in range(1, max_val + 1)]
+
+
+def survey_crosstab(row_question, col_question):
+    """
+    Joint count matrix of two questions of the same survey.
+
+    A single query: the answers to `row_question` are self-joined with the
+    answers to `col_question` of the same response (Answer(question, response)
+    index), then grouped by the option index / rating of each side. A
+    multiple-choice answer counts once for every selected option.
+    """
+    rows = question_categories(row_question)
+    cols = question_categories(col_question)
+    matrix = [[0] * len(cols) for _ in rows]
+
+    pairs = (
+        Answer.objects.filter(question_id=row_question.id)
+        .annotate(other=FilteredRelation(
+            'response__answers', condition=Q(response__answers__question_id=col_question.id)
+        ))
+        .filter(other__isnull=False)
+        .values_list(_category_field(row_question), 'other__' + _category_field(col_question))
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row_key, col_key, count in pairs:
+        i = _category_index(row_question, row_key, len(rows))
+        j = _category_index(col_question, col_key, len(cols))
+        if i is not None and j is not None:
+            matrix[i][j] += count
+
+    return {
+        'row': _question_data(row_question, rows),
+        'col': _question_data(col_question, cols),
+        'matrix': matrix,
+        'row_totals': [sum(line) for line in matrix],
+        'col_totals': [sum(line[j] for line in matrix) for j in range(len(cols))],
+    }
+
+
+def _category_field(question):
+    if question.question_type in CHOICE_TYPES:
+        return 'choices__option_index'
+    return 'numeric_value'
+
+
+def _category_index(question, key, size):
+    """Matrix position of a grouped value, None when it is missing or out of range."""
+    if key is None:
+        return None
+    # Ratings are bucketed like the results distribution (4.5 -> "4")
+    index = key if question.question_type in CHOICE_TYPES else int(key) - 1
+    return index if 0 <= index < size else None
+
+
+def _question_data(question, categories):
+    return {
+        'id': question.id,
+        'text': question.text,
+        'type': question.question_type,
+        'categories': categories,
+    }
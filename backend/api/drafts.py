@@ -0,0 +1,85 @@
+# backend/api/drafts.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .caching import get_survey_validator
+from .models import DraftAnswer, ResponseDraft
+
+# A draft not saved for this long is counted as abandoned
+ABANDONED_AFTER = timedelta(hours=24)
+
+
+def save_draft_page(draft, page, answers):
+    """
+    Replaces the answers of one page of a draft.
+
+    `answers` are {"question": id, "value": ...} dicts, checked by the survey's
+    cached validator (required questions are only checked on submit) and
+    limited to the questions of `page`, one of the survey's page numbers.
+    Writes that page's rows only: one filtered delete of the answers no
+    longer sent and one upsert. Returns None, or errors shaped like
+    SurveyValidator.check's.
+    """
+    validator = get_survey_validator(draft.survey)
+    if page not in {q.page_number for q in validator.questions.values()}:
+        return {'page': [f"Ankette {page}. sayfa yok."]}
+    cleaned, errors = validator.check(answers, required=False)
+    if errors:
+        return errors
+    item_errors = {
+        i: {'question': [f"Soru {page}. sayfada değil."]}
+        for i, (question, _) in enumerate(cleaned) if question.page_number != page
+    }
+    if item_errors:
+        return {'answers': item_errors}
+
+    page_questions = [q.id for q in validator.questions.values() if q.page_number == page]
+    with transaction.atomic():
+        DraftAnswer.objects.filter(draft=draft, question_id__in=page_questions).exclude(
+            question_id__in=[question.id for question, _ in cleaned]
+        ).delete()
+        DraftAnswer.objects.bulk_create(
+            [DraftAnswer(draft=draft, question=question, value=value) for question, value in cleaned],
+            update_conflicts=True, unique_fields=['draft', 'question'], update_fields=['value'],
+        )
+        draft.last_page = page
+        draft.save(update_fields=['last_page', 'updated_at'])
+    return None
+
+
+def draft_submission(draft):
+    """The answers saved in a draft, as a ResponseSerializer payload."""
+    return {
+        'survey': draft.survey_id,
+        'answers': [
+            {'question': question_id, 'value': value}
+            for question_id, value in draft.answers.order_by('question_id').values_list('question_id', 'value')
+        ],
+    }
+
+
+def dropoff_stats(survey):
+    """
+    Where the respondents of a survey stop: completed responses, open drafts
+    and drafts abandoned (not saved for ABANDONED_AFTER) per last saved page.
+    """
+    abandoned = Q(updated_at__lt=timezone.now() - ABANDONED_AFTER)
+    pages = (
+        ResponseDraft.objects.filter(survey=survey)
+        .values('last_page')
+        .annotate(drafts=Count('id'), abandoned=Count('id', filter=abandoned))
+        .order_by('last_page')
+    )
+    by_page = [
+        {'page': row['last_page'], 'drafts': row['drafts'], 'abandoned': row['abandoned']} for row in pages
+    ]
+    return {
+        'completed': survey.responses.count(),
+        'in_progress': sum(row['drafts'] - row['abandoned'] for row in by_page),
+        'abandoned': sum(row['abandoned'] for row in by_page),
+        'by_page': by_page,
+    }
@@ -0,0 +1,126 @@
+# backend/api/export.py
+
+import csv
+import json
+from collections import defaultdict
+from itertools import groupby
+
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from .models import Answer, AnswerChoice, Response
+
+# Rows fetched per round trip (server-side cursor on PostgreSQL)
+EXPORT_CHUNK_SIZE = 2000
+
+# A cell starting with one of these is run as a formula by spreadsheet programs
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class CSVRenderer(BaseRenderer):
+    """Content negotiation of the export action (?format=csv); errors are rendered as JSON text."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False, default=str).encode()
+
+
+class NDJSONRenderer(CSVRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def export_rows(survey, questions, responses=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields (response_id, submitted_at, user_id, {question_id: value}) for every
+    response of a survey, oldest first.
+
+    Responses, answers and choice rows are read by three iterators ordered by
+    response id and merged: memory holds one chunk of each, however many
+    answers the survey has. `responses` optionally restricts the export (a
+    filter_responses() queryset of ids).
+    """
+    questions = {q.id: q for q in questions}
+    rows = Response.objects.filter(survey=survey)
+    answers = Answer.objects.filter(question_id__in=questions)
+    choices = AnswerChoice.objects.filter(question_id__in=questions)
+    if responses is not None:
+        rows = rows.filter(id__in=responses)
+        answers = answers.filter(response_id__in=responses)
+        choices = choices.filter(answer__response_id__in=responses)
+
+    rows = rows.order_by('id').values_list('id', 'submitted_at', 'user_id').iterator(chunk_size=chunk_size)
+    answers = _by_response(
+        answers.order_by('response_id', 'id')
+        .values_list('response_id', 'question_id', 'value')
+        .iterator(chunk_size=chunk_size)
+    )
+    choices = _by_response(
+        choices.order_by('answer__response_id', 'answer_id', 'option_index')
+        .values_list('answer__response_id', 'question_id', 'option_index')
+        .iterator(chunk_size=chunk_size)
+    )
+
+    next_answers, next_choices = next(answers, None), next(choices, None)
+    for response_id, submitted_at, user_id in rows:
+        values = {}
+        while next_answers and next_answers[0] <= response_id:
+            if next_answers[0] == response_id:
+                values.update((q_id, value) for _, q_id, value in next_answers[1])
+            next_answers = next(answers, None)
+        while next_choices and next_choices[0] <= response_id:
+            if next_choices[0] == response_id:
+                picked = defaultdict(list)
+                for _, q_id, option_index in next_choices[1]:
+                    picked[q_id].append(option_index)
+                # Choice answers store an empty value, the labels come from the options
+                values.update((q_id, questions[q_id].option_labels(indices)) for q_id, indices in picked.items())
+            next_choices = next(choices, None)
+        yield response_id, submitted_at, user_id, values
+
+
+def csv_lines(survey, responses=None):
+    """The export as CSV lines: one column per question (its text), in form order."""
+    questions = sorted(survey.questions.all(), key=lambda q: (q.order, q.id))
+    writer = csv.writer(_Echo())
+    # BOM: Excel opens the Turkish characters correctly
+    yield '\ufeff' + writer.writerow(
+        ['response_id', 'submitted_at', 'user_id'] + [_safe_cell(q.text) for q in questions]
+    )
+    for response_id, submitted_at, user_id, values in export_rows(survey, questions, responses):
+        yield writer.writerow(
+            [response_id, timezone.localtime(submitted_at).isoformat(), user_id if user_id is not None else '']
+            + [_safe_cell(values.get(q.id, '')) for q in questions]
+        )
+
+
+def ndjson_lines(survey, responses=None):
+    """The export as newline-delimited JSON: one object per response, answers keyed by question id."""
+    questions = sorted(survey.questions.all(), key=lambda q: (q.order, q.id))
+    for response_id, submitted_at, user_id, values in export_rows(survey, questions, responses):
+        yield json.dumps({
+            'response_id': response_id,
+            'submitted_at': timezone.localtime(submitted_at).isoformat(),
+            'user_id': user_id,
+            'answers': {str(q_id): value for q_id, value in values.items()},
+        }, ensure_ascii=False) + '\n'
+
+
+def _safe_cell(value):
+    # Free text typed by students must not run as a formula on a staff machine (CSV injection)
+    if value and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _by_response(rows):
+    # (response_id, [rows]) groups of an iterator ordered by response id
+    return ((response_id, list(group)) for response_id, group in groupby(rows, key=lambda row: row[0]))
+
+
+class _Echo:
+    # csv.writer target that hands the formatted line back instead of buffering it
+    def write(self, value):
+        return value
@@ -0,0 +1,73 @@
+# backend/api/idempotency.py
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response as APIResponse
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def key_ttl():
+    return timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+
+def idempotent_create(request, create):
+    """
+    Runs `create()` (a view create returning a DRF Response) at most once per
+    (user, Idempotency-Key header).
+
+    The key row is inserted first, in the same transaction as the create: a
+    concurrent retry waits on the unique index and then replays the stored
+    result instead of writing the answers again. Failed (non 2xx) results are
+    rolled back with the key so the client can retry them.
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        return create()
+    if len(key) > MAX_KEY_LENGTH:
+        return APIResponse({'error': f'{HEADER} is too long.'}, status=400)
+
+    fingerprint = hashlib.sha256(
+        json.dumps(request.data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(user=request.user, key=key, fingerprint=fingerprint)
+        except IntegrityError:
+            record = IdempotencyKey.objects.select_for_update().get(user=request.user, key=key)
+            if record.created_at >= timezone.now() - key_ttl():
+                if record.fingerprint != fingerprint:
+                    return APIResponse(
+                        {'error': f'{HEADER} was already used for another request.'}, status=422
+                    )
+                return APIResponse(record.body, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+            # Expired, not purged yet: reuse the row for this new request
+            record.fingerprint = fingerprint
+            record.created_at = timezone.now()
+
+        response = create()
+        if not 200 <= response.status_code < 300:
+            transaction.set_rollback(True)
+            return response
+
+        record.status_code = response.status_code
+        record.body = response.data
+        record.response_id = response.data.get('id') if response.status_code == 201 else None
+        record.save()
+    return response
+
+
+def purge_expired_keys():
+    """Deletes the keys older than IDEMPOTENCY_KEY_TTL_HOURS, returns how many."""
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - key_ttl()).delete()
+    return deleted
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Survey
+from api.rollups import diff_survey_stats
+
+
+class Command(BaseCommand):
+    help = 'Compares the QuestionStats rollups with the raw Answer rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', help='Only check this survey (can be repeated)')
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.all().order_by('id')
+        if options['survey']:
+            surveys = surveys.filter(id__in=options['survey'])
+
+        mismatches = 0
+        for survey in surveys:
+            for question_id, field, stored, raw in diff_survey_stats(survey):
+                mismatches += 1
+                self.stdout.write(self.style.WARNING(
+                    f" - Anket {survey.id}, soru {question_id}: {field} rollup={stored!r} raw={raw!r}"
+                ))
+
+        if mismatches:
+            raise CommandError(
+                f"{mismatches} tutarsızlık bulundu. 'python manage.py rebuild_question_stats' ile düzeltin."
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Rollup tabloları ham cevaplarla tutarlı.'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.submission_queue import flush_pending_submissions, FLUSH_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Stores the submissions waiting in the write-behind journal (SUBMISSION_WRITE_BEHIND)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=FLUSH_BATCH_SIZE, help='Submissions stored per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll the journal')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            total = 0
+            while True:
+                stored = flush_pending_submissions(batch_size)
+                total += stored
+                if stored < batch_size:
+                    break
+            if total or not options['loop']:
+                self.stdout.write(f" - {total} cevap kaydedildi")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
+from django.core.management import call_command
 from django.contrib.auth.models import User
-from api.models import Survey, Question, Response, Answer
+from api.models import Survey, Question, Response, AnswerChoice
+from api.serializers import prepare_answer
 import random
 from datetime import datetime, timedelta
 from django.utils import timezone
@@ -115,19 +117,16 @@ class Command(BaseCommand):
                     # Soruları cevapla
                     for q in survey.questions.all():
                         val = ""
-                        num_val = None
 
                         if q.question_type == 'star':
                             # Yıldız: 1-5
                             score = random.randint(3, 5) # Genelde mutlu olsunlar :)
                             val = str(score)
-                            num_val = float(score)
                         
                         elif q.question_type == 'scale':
                             # Ölçek: 1-10
                             score = random.randint(5, 10)
                             val = str(score)
-                            num_val = float(score)
                         
                         elif q.question_type == 'choice':
                             # Tek seçim
@@ -149,14 +148,14 @@ class Command(BaseCommand):
                         elif q.question_type == 'date':
                             val = "2025-05-15"
 
-                        # Cevabı kaydet
-                        Answer.objects.create(
-                            response=response,
-                            question=q,
-                            value=val,
-                            numeric_value=num_val
-                        )
+                        # Cevabı kaydet (seçmeli sorularda seçenek indeksleri AnswerChoice'a yazılır)
+                        answer = prepare_answer(q, val, response=response)
+                        answer.save()
+                        AnswerChoice.objects.bulk_create(AnswerChoice.for_answers([answer]))
                     
                     self.stdout.write(f"   -> {student.username} '{survey.title}' anketini doldurdu.")
 
+        # Cevaplar doğrudan ORM ile yazıldı, sonuç rollup'larını yeniden hesapla
+        call_command('rebuild_question_stats', stdout=self.stdout)
+
         self.stdout.write(self.style.SUCCESS('✅ Veritabanı başarıyla dolduruldu!'))
\ No newline at end of file
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from api.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Deletes the Idempotency-Key records older than IDEMPOTENCY_KEY_TTL_HOURS'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'✅ {deleted} eski anahtar silindi.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from api.models import Survey
+from api.rollups import rebuild_survey_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the QuestionStats rollups, term counts and trend buckets from the raw Answer rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey', type=int, action='append', help='Only rebuild this survey (can be repeated)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Number of Answer rows read per query')
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.all().order_by('id')
+        if options['survey']:
+            surveys = surveys.filter(id__in=options['survey'])
+
+        for survey in surveys:
+            stats = rebuild_survey_stats(survey, chunk_size=options['chunk_size'])
+            answers = sum(s.answer_count for s in stats.values())
+            self.stdout.write(f" - '{survey.title}': {len(stats)} soru, {answers} cevap")
+
+        self.stdout.write(self.style.SUCCESS('✅ Rollup tabloları yeniden oluşturuldu.'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_answer_numeric_value'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.question')),
+                ('answer_count', models.PositiveIntegerField(default=0)),
+                ('numeric_count', models.PositiveIntegerField(default=0)),
+                ('numeric_sum', models.FloatField(default=0)),
+                ('numeric_sum_sq', models.FloatField(default=0)),
+                ('histogram', models.JSONField(blank=True, default=dict)),
+                ('choice_counts', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
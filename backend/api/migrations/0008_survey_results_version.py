@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_questionstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='results_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
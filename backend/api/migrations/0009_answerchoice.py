@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_survey_results_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionstats',
+            name='respondent_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='AnswerChoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('option_index', models.PositiveSmallIntegerField()),
+                ('answer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='choices', to='api.answer')),
+                ('question', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answer_choices', to='api.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question', 'option_index'], name='answerchoice_question_option')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def _option_indices(question, value):
+    # Same matching as Question.option_indices (historical models have no methods)
+    if not value or not isinstance(question.options, list):
+        return []
+    labels = {str(opt).strip(): i for i, opt in enumerate(question.options)}
+    if question.question_type == 'choice':
+        idx = labels.get(str(value).strip())
+        return [] if idx is None else [idx]
+
+    parts = str(value).split(',')
+    indices = []
+    i = 0
+    while i < len(parts):
+        for j in range(len(parts), i, -1):
+            idx = labels.get(','.join(parts[i:j]).strip())
+            if idx is not None:
+                if idx not in indices:
+                    indices.append(idx)
+                i = j
+                break
+        else:
+            i += 1
+    return indices
+
+
+def backfill_answer_choices(apps, schema_editor):
+    Question = apps.get_model('api', 'Question')
+    Answer = apps.get_model('api', 'Answer')
+    AnswerChoice = apps.get_model('api', 'AnswerChoice')
+    QuestionStats = apps.get_model('api', 'QuestionStats')
+
+    for question in Question.objects.filter(question_type__in=['choice', 'multiple']).iterator():
+        choice_counts = defaultdict(int)
+        respondents = 0
+        batch = []
+        for answer_id, value in Answer.objects.filter(question=question).values_list('id', 'value').iterator(chunk_size=BATCH_SIZE):
+            indices = _option_indices(question, value)
+            if indices:
+                respondents += 1
+            for idx in indices:
+                choice_counts[str(idx)] += 1
+                batch.append(AnswerChoice(answer_id=answer_id, question_id=question.id, option_index=idx))
+            if len(batch) >= BATCH_SIZE:
+                AnswerChoice.objects.bulk_create(batch)
+                batch = []
+        AnswerChoice.objects.bulk_create(batch)
+
+        # Rollups switch from label keys to option index keys
+        QuestionStats.objects.filter(question=question).update(
+            choice_counts=dict(choice_counts), respondent_count=respondents
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_answerchoice'),
+    ]
+
+    operations = [
+        # Reverting drops the table; run rebuild_question_stats afterwards.
+        migrations.RunPython(backfill_answer_choices, migrations.RunPython.noop),
+    ]
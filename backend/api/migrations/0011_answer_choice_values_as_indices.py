@@ -0,0 +1,79 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def _labels(question):
+    options = question.options if isinstance(question.options, list) else []
+    return [str(opt).strip() for opt in options]
+
+
+def clear_choice_labels(apps, schema_editor):
+    """
+    Choice/multiple answers whose labels all resolved to AnswerChoice rows
+    (see 0010) no longer need the label text: keep an empty value.
+    Answers with unknown labels (e.g. options edited later) keep their text.
+    """
+    Question = apps.get_model('api', 'Question')
+    Answer = apps.get_model('api', 'Answer')
+    AnswerChoice = apps.get_model('api', 'AnswerChoice')
+
+    for question in Question.objects.filter(question_type__in=['choice', 'multiple']).iterator():
+        labels = _labels(question)
+        last_id = 0
+        while True:
+            answers = list(
+                Answer.objects.filter(question=question, id__gt=last_id).exclude(value='')
+                .order_by('id').only('id', 'value')[:BATCH_SIZE]
+            )
+            if not answers:
+                break
+            last_id = answers[-1].id
+
+            selected = {}
+            for answer_id, option_index in AnswerChoice.objects.filter(answer__in=answers).values_list('answer_id', 'option_index'):
+                selected.setdefault(answer_id, []).append(option_index)
+
+            to_clear = []
+            for answer in answers:
+                indices = sorted(selected.get(answer.id, []))
+                rebuilt = ", ".join(labels[i] for i in indices if i < len(labels))
+                # Only drop the text when it can be rebuilt from the indices
+                if indices and _normalize(rebuilt) == _normalize(answer.value):
+                    to_clear.append(answer.id)
+            Answer.objects.filter(id__in=to_clear).update(value='')
+
+
+def restore_choice_labels(apps, schema_editor):
+    Question = apps.get_model('api', 'Question')
+    Answer = apps.get_model('api', 'Answer')
+    AnswerChoice = apps.get_model('api', 'AnswerChoice')
+
+    for question in Question.objects.filter(question_type__in=['choice', 'multiple']).iterator():
+        labels = _labels(question)
+        selected = {}
+        rows = AnswerChoice.objects.filter(question=question, answer__value='').values_list('answer_id', 'option_index')
+        for answer_id, option_index in rows.iterator(chunk_size=BATCH_SIZE):
+            selected.setdefault(answer_id, []).append(option_index)
+
+        answers = []
+        for answer_id, indices in selected.items():
+            value = ", ".join(labels[i] for i in sorted(indices) if i < len(labels))
+            answers.append(Answer(id=answer_id, value=value))
+        Answer.objects.bulk_update(answers, ['value'], batch_size=BATCH_SIZE)
+
+
+def _normalize(value):
+    # Order and spacing of the comma-joined labels do not matter
+    return sorted(part.strip() for part in value.split(','))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_backfill_answerchoice'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_choice_labels, restore_choice_labels),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_answer_choice_values_as_indices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Saatlik'), ('day', 'Günlük'), ('week', 'Haftalık')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('answer_count', models.PositiveIntegerField(default=0)),
+                ('value_sum', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Saatlik'), ('day', 'Günlük'), ('week', 'Haftalık')], max_length=10)),
+                ('closed_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['survey', 'submitted_at'], name='response_survey_submitted'),
+        ),
+        migrations.AddField(
+            model_name='trendbucket',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_buckets', to='api.question'),
+        ),
+        migrations.AddField(
+            model_name='trendwatermark',
+            name='survey',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_watermarks', to='api.survey'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendbucket',
+            constraint=models.UniqueConstraint(fields=('question', 'granularity', 'bucket_start'), name='unique_trend_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendwatermark',
+            constraint=models.UniqueConstraint(fields=('survey', 'granularity'), name='unique_trend_watermark'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_trend_buckets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', 'response'], name='answer_question_response'),
+        ),
+    ]
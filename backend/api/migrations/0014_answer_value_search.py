@@ -0,0 +1,55 @@
+from django.db import migrations
+
+# PostgreSQL: GIN index on the exact expression SearchVector('value', config='turkish') compiles to
+POSTGRESQL_CREATE = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS answer_value_search ON api_answer "
+    "USING gin (to_tsvector('turkish'::regconfig, COALESCE(value, '')))",
+]
+POSTGRESQL_DROP = [
+    "DROP INDEX CONCURRENTLY IF EXISTS answer_value_search",
+]
+
+# SQLite: external content FTS5 table kept in sync by triggers.
+# Note: a SQLite table rebuild of api_answer (AlterField) drops the triggers,
+# such a migration has to recreate them.
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE api_answer_fts USING fts5("
+    "value, content='api_answer', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER api_answer_fts_insert AFTER INSERT ON api_answer BEGIN "
+    "INSERT INTO api_answer_fts(rowid, value) VALUES (new.id, new.value); END",
+    "CREATE TRIGGER api_answer_fts_delete AFTER DELETE ON api_answer BEGIN "
+    "INSERT INTO api_answer_fts(api_answer_fts, rowid, value) VALUES ('delete', old.id, old.value); END",
+    "CREATE TRIGGER api_answer_fts_update AFTER UPDATE OF value ON api_answer BEGIN "
+    "INSERT INTO api_answer_fts(api_answer_fts, rowid, value) VALUES ('delete', old.id, old.value); "
+    "INSERT INTO api_answer_fts(rowid, value) VALUES (new.id, new.value); END",
+    "INSERT INTO api_answer_fts(api_answer_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS api_answer_fts_insert",
+    "DROP TRIGGER IF EXISTS api_answer_fts_delete",
+    "DROP TRIGGER IF EXISTS api_answer_fts_update",
+    "DROP TABLE IF EXISTS api_answer_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0013_answer_question_response_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRESQL_CREATE, 'sqlite': SQLITE_CREATE}),
+            _run({'postgresql': POSTGRESQL_DROP, 'sqlite': SQLITE_DROP}),
+        ),
+    ]
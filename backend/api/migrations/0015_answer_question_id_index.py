@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_answer_value_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', 'id'], name='answer_question_id'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_answer_question_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='api.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question', '-count'], name='questionterm_top')],
+                'constraints': [models.UniqueConstraint(fields=('question', 'term'), name='unique_question_term')],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionTermDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_days', to='api.question')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('question', 'term', 'day'), name='unique_question_term_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_question_terms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='series',
+            field=models.CharField(blank=True, db_index=True, max_length=100, verbose_name='Seri'),
+        ),
+    ]
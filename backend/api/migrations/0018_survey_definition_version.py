@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_survey_series'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='definition_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='response',
+            name='submitted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
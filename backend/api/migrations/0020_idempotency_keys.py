@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_responses(apps, schema_editor):
+    # Retried submissions created several responses per (survey, user). The first one
+    # is kept, the copies are deleted with their answers: they were counted twice in
+    # the results. The rollups, term counts and trend buckets of the affected surveys
+    # are rebuilt afterwards with rebuild_question_stats (see DEPLOYMENT.md).
+    Response = apps.get_model('api', 'Response')
+    duplicates = (
+        Response.objects.filter(user__isnull=False)
+        .values('survey_id', 'user_id')
+        .annotate(n=Count('id'), first_id=Min('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        Response.objects.filter(
+            survey_id=row['survey_id'], user_id=row['user_id'], id__gt=row['first_id']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_pending_submission'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('status_code', models.PositiveSmallIntegerField(null=True)),
+                ('body', models.JSONField(null=True)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(delete_duplicate_responses, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='response',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('survey', 'user'), name='unique_response_per_user'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='response',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='idempotency_keys', to='api.response'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='unique_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+# Same name as api.permissions.KIOSK_GROUP (migrations do not import app code)
+KIOSK_GROUP = 'kiosk'
+
+
+def create_kiosk_group(apps, schema_editor):
+    # Tablet accounts are added to this group: they can sync kiosk batches, nothing else
+    Group = apps.get_model('auth', 'Group')
+    Group.objects.get_or_create(name=KIOSK_GROUP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_response_drafts'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_kiosk_group, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # 1. SURVEY: General survey title (e.g. "Nov 2 Lunch Menu", "Spring Conference")
 class Survey(models.Model):
@@ -7,6 +9,12 @@ class Survey(models.Model):
     description = models.TextField(blank=True, verbose_name="Açıklama")
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True, verbose_name="Aktif mi?")
+    # Groups recurring surveys (e.g. one per month) for the comparison dashboard
+    series = models.CharField(max_length=100, blank=True, db_index=True, verbose_name="Seri")
+    # Bumped on every answer/question change, used as cache key and ETag of the results
+    results_version = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped when the survey or its questions change, used as cache key of the definition
+    definition_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -34,15 +42,116 @@ class Question(models.Model):
     def __str__(self):
         return f"{self.text} ({self.get_question_type_display()})"
 
+    def clean(self):
+        # Admin inline edits
+        errors = {
+            'question_type': self.type_change_error(self.question_type),
+            'options': self.options_change_error(self.options),
+        }
+        errors = {field: error for field, error in errors.items() if error}
+        if errors:
+            raise ValidationError(errors)
+
+    def type_change_error(self, question_type):
+        """
+        Stored answers are only meaningful for the type they were given to (choice
+        answers exist only as option indices): an answered question keeps its type.
+        Returns an error message or None.
+        """
+        if self.pk is None:
+            return None
+        stored = Question.objects.filter(pk=self.pk).values_list('question_type', flat=True).first()
+        if stored in (None, question_type):
+            return None
+        if not (self.answers.exists() or self.answer_choices.exists()):
+            return None
+        return "Cevaplanmış sorunun tipi değiştirilemez."
+
+    def options_change_error(self, options):
+        """
+        Choice answers are stored as indices into `options`: once the question is
+        answered, its options can only be appended to (reordering, inserting or
+        removing one would remap every stored answer). Returns an error message or None.
+        """
+        if self.pk is None:
+            return None
+        stored = Question.objects.filter(pk=self.pk).values_list('options', flat=True).first()
+        stored = stored if isinstance(stored, list) else []
+        options = options if isinstance(options, list) else []
+        if [str(opt).strip() for opt in options[:len(stored)]] == [str(opt).strip() for opt in stored]:
+            return None
+        if not self.answer_choices.exists():
+            return None
+        return "Cevaplanmış sorunun mevcut seçenekleri değiştirilemez, yeni seçenekler sadece sona eklenebilir."
+
+    def option_indices(self, value, strict=False):
+        """
+        Maps a submitted choice value to indices of `options`.
+        Multiple choice values are comma-joined ("A, B"), so the longest known
+        label is matched first: options that contain a comma still resolve.
+        Unknown labels are ignored, or raise ValueError when `strict`.
+        """
+        if self.question_type not in ('choice', 'multiple') or not value:
+            return []
+        options = self.options if isinstance(self.options, list) else []
+        labels = {str(opt).strip(): i for i, opt in enumerate(options)}
+
+        if self.question_type == 'choice':
+            idx = labels.get(str(value).strip())
+            if idx is None:
+                if strict:
+                    raise ValueError(str(value).strip())
+                return []
+            return [idx]
+
+        parts = str(value).split(',')
+        indices = []
+        i = 0
+        while i < len(parts):
+            for j in range(len(parts), i, -1):
+                idx = labels.get(','.join(parts[i:j]).strip())
+                if idx is not None:
+                    if idx not in indices:
+                        indices.append(idx)
+                    i = j
+                    break
+            else:
+                if strict and parts[i].strip():
+                    raise ValueError(parts[i].strip())
+                i += 1
+        return indices
+
+    def option_labels(self, indices):
+        """Inverse of option_indices: labels in option order, joined like the frontend does."""
+        options = self.options if isinstance(self.options, list) else []
+        return ", ".join(str(options[i]).strip() for i in sorted(indices) if i < len(options))
+
 # 3. RESPONSE PACKAGE: The entire form submitted by a student for a survey
 class Response(models.Model):
     survey = models.ForeignKey(Survey, related_name='responses', on_delete=models.CASCADE)
     # Keep answers even if user is deleted (SET_NULL to preserve statistics)
     user = models.ForeignKey(User, related_name='responses', on_delete=models.SET_NULL, null=True)
-    submitted_at = models.DateTimeField(auto_now_add=True)
+    # Set by the server, except for kiosk batches that were collected offline
+    submitted_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Time-range scans of one survey (trends, date filters)
+            models.Index(fields=['survey', 'submitted_at'], name='response_survey_submitted'),
+            # The surveys a user answered (survey listing): an index-only read of the user's rows
+            models.Index(fields=['user', 'survey'], name='response_user_survey'),
+        ]
+        constraints = [
+            # One response per user and survey (anonymous kiosk responses are not limited)
+            models.UniqueConstraint(
+                fields=['survey', 'user'], condition=models.Q(user__isnull=False), name='unique_response_per_user'
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.survey.title}"
+        # Kiosk responses have no user
+        username = self.user.username if self.user else "kiosk"
+        return f"{username} - {self.survey.title}"
 
 # 4. INDIVIDUAL ANSWER: Specific answer given to a question
 class Answer(models.Model):
@@ -51,11 +160,266 @@ class Answer(models.Model):
     
     # We will store the answer as text. It fits both numbers and text.
     # Senior Note: In larger projects this should be a JSONField, but CharField is sufficient for now.
+    # Choice/multiple answers keep an empty value: the selected options are stored
+    # as integer indices in AnswerChoice and the label is resolved on read (display_value).
     value = models.TextField(verbose_name="Cevap Değeri")
     
     # OPTIMIZATION: Store numeric value separately for SQL-level aggregation (AVG, SUM)
     # This avoids Python-level loops and float() conversions.
     numeric_value = models.FloatField(null=True, blank=True, db_index=True)
 
+    # Set when the answer is written (choice/multiple), see selected_options()
+    option_indices = None
+
+    class Meta:
+        indexes = [
+            # Answer of a question within a response (crosstab self-join)
+            models.Index(fields=['question', 'response'], name='answer_question_response'),
+            # Keyset pages of a question's answers (id < cursor ORDER BY id DESC)
+            models.Index(fields=['question', 'id'], name='answer_question_id'),
+        ]
+
+    def __str__(self):
+        return f"{self.question.text}: {self.display_value()}"
+
+    def display_value(self):
+        """The value as submitted: choice labels are resolved from Question.options."""
+        if self.value or self.question.question_type not in ('choice', 'multiple'):
+            return self.value
+        return self.question.option_labels(self.selected_options())
+
+    def selected_options(self):
+        """Selected option indices: the ones just written, else the (prefetched) AnswerChoice rows."""
+        if self.option_indices is not None:
+            return self.option_indices
+        return [choice.option_index for choice in self.choices.all()]
+
+# 5. ANSWER CHOICE: One row per selected option of a choice/multiple answer.
+# Normalized so option tallies are a GROUP BY on an integer column
+# instead of splitting comma-joined strings in Python.
+class AnswerChoice(models.Model):
+    answer = models.ForeignKey(Answer, related_name='choices', on_delete=models.CASCADE)
+    # Covered by the (question, option_index) index below
+    question = models.ForeignKey(Question, related_name='answer_choices', on_delete=models.CASCADE, db_index=False)
+    option_index = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', 'option_index'], name='answerchoice_question_option'),
+        ]
+
+    def __str__(self):
+        return f"{self.answer_id} -> {self.option_index}"
+
+    @classmethod
+    def for_answers(cls, answers):
+        """Unsaved rows for saved answers whose `option_indices` were set on write."""
+        return [
+            cls(answer_id=ans.id, question_id=ans.question_id, option_index=idx)
+            for ans in answers
+            for idx in (ans.option_indices or ())
+        ]
+
+# 6. QUESTION STATS: Rollup of every answer given to a question.
+# Maintained incrementally on each submit/edit/delete (see api/rollups.py),
+# so the results dashboard reads one row per question instead of scanning Answer.
+class QuestionStats(models.Model):
+    question = models.OneToOneField(Question, related_name='stats', on_delete=models.CASCADE, primary_key=True)
+    answer_count = models.PositiveIntegerField(default=0)
+    # Only answers with a numeric_value (star/scale) are counted here
+    numeric_count = models.PositiveIntegerField(default=0)
+    numeric_sum = models.FloatField(default=0)
+    numeric_sum_sq = models.FloatField(default=0)
+    # {"4": 12, "3.5": 2} -> numeric_value histogram for star/scale questions
+    histogram = models.JSONField(default=dict, blank=True)
+    # {"0": 10, "2": 3} -> selections per option index for choice/multiple questions
+    choice_counts = models.JSONField(default=dict, blank=True)
+    # Choice/multiple answers that selected at least one option
+    respondent_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STAT_FIELDS = [
+        'answer_count', 'numeric_count', 'numeric_sum', 'numeric_sum_sq',
+        'histogram', 'choice_counts', 'respondent_count',
+    ]
+
+    def __str__(self):
+        return f"{self.question.text} ({self.answer_count} cevap)"
+
+    def add(self, question_type, numeric_value, option_indices=(), count=1):
+        """Adds `count` answers to the rollup (a negative count removes them)."""
+        self.answer_count += count
+        if numeric_value is not None:
+            self.numeric_count += count
+            self.numeric_sum += numeric_value * count
+            self.numeric_sum_sq += numeric_value * numeric_value * count
+            if question_type in ('star', 'scale'):
+                _bump(self.histogram, f"{numeric_value:g}", count)
+        if option_indices:
+            self.respondent_count += count
+            for idx in option_indices:
+                _bump(self.choice_counts, str(idx), count)
+
+    def merge(self, other):
+        """Adds the totals of another (usually unsaved delta) rollup."""
+        self.answer_count += other.answer_count
+        self.numeric_count += other.numeric_count
+        self.numeric_sum += other.numeric_sum
+        self.numeric_sum_sq += other.numeric_sum_sq
+        self.respondent_count += other.respondent_count
+        for key, count in other.histogram.items():
+            _bump(self.histogram, key, count)
+        for key, count in other.choice_counts.items():
+            _bump(self.choice_counts, key, count)
+
+    @property
+    def average(self):
+        return self.numeric_sum / self.numeric_count if self.numeric_count else None
+
+
+def _bump(counter, key, delta):
+    # Keep the JSON small: drop keys that fall back to zero
+    new = counter.get(key, 0) + delta
+    if new:
+        counter[key] = new
+    else:
+        counter.pop(key, None)
+
+# 7. TREND BUCKETS: star/scale answers pre-aggregated per closed time bucket
+# (hour/day/week of Response.submitted_at), so historical trends never rescan Answer.
+TREND_GRANULARITIES = [
+    ('hour', 'Saatlik'),
+    ('day', 'Günlük'),
+    ('week', 'Haftalık'),
+]
+
+class TrendBucket(models.Model):
+    question = models.ForeignKey(Question, related_name='trend_buckets', on_delete=models.CASCADE)
+    granularity = models.CharField(max_length=10, choices=TREND_GRANULARITIES)
+    bucket_start = models.DateTimeField()
+    answer_count = models.PositiveIntegerField(default=0)
+    value_sum = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'granularity', 'bucket_start'], name='unique_trend_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.question_id} {self.granularity} {self.bucket_start:%Y-%m-%d %H:%M}"
+
+# Buckets of a survey that start before `closed_until` are materialized in TrendBucket
+class TrendWatermark(models.Model):
+    survey = models.ForeignKey(Survey, related_name='trend_watermarks', on_delete=models.CASCADE)
+    granularity = models.CharField(max_length=10, choices=TREND_GRANULARITIES)
+    closed_until = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['survey', 'granularity'], name='unique_trend_watermark'),
+        ]
+
+    def __str__(self):
+        return f"{self.survey_id} {self.granularity} < {self.closed_until}"
+
+# 8. TERM FREQUENCIES: words and two-word phrases of text answers, counted once
+# per answer and kept up to date on every write (see api/terms.py).
+class QuestionTerm(models.Model):
+    question = models.ForeignKey(Question, related_name='terms', on_delete=models.CASCADE)
+    term = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'term'], name='unique_question_term'),
+        ]
+        indexes = [
+            # Top-N terms of a question
+            models.Index(fields=['question', '-count'], name='questionterm_top'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.count})"
+
+# Same counts per submission day, for the trend of a term
+class QuestionTermDay(models.Model):
+    question = models.ForeignKey(Question, related_name='term_days', on_delete=models.CASCADE)
+    term = models.CharField(max_length=100)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'term', 'day'], name='unique_question_term_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} {self.day} ({self.count})"
+
+# 9. PENDING SUBMISSION: write-behind journal (SUBMISSION_WRITE_BEHIND). A validated
+# submission is a single row insert at peak time; flush_submissions turns the rows
+# into Response/Answer rows in large batches and deletes them in the same transaction.
+class PendingSubmission(models.Model):
+    survey = models.ForeignKey(Survey, related_name='pending_submissions', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='pending_submissions', on_delete=models.SET_NULL, null=True)
+    # [{"question": id, "value": "..."}], as validated by ResponseSerializer
+    answers = models.JSONField()
+    received_at = models.DateTimeField(default=timezone.now)
+    # Set when the submission could not be stored (e.g. its question was deleted), kept for inspection
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.survey_id} @ {self.received_at:%Y-%m-%d %H:%M:%S}"
+
+# 10. IDEMPOTENCY KEY: result of a POST /responses/ sent with an Idempotency-Key header,
+# replayed when the client retries the same request (expired after IDEMPOTENCY_KEY_TTL_HOURS).
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, related_name='idempotency_keys', on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # Hash of the request payload: the same key with another payload is rejected
+    fingerprint = models.CharField(max_length=64)
+    response = models.ForeignKey(Response, related_name='idempotency_keys', on_delete=models.SET_NULL, null=True)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    body = models.JSONField(null=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
+
+# 11. RESPONSE DRAFT: a multi-page survey being filled in, saved page by page
+# (only the rows of the saved page are written) and turned into a Response on
+# submit. The drafts left behind are the drop-offs of the survey.
+class ResponseDraft(models.Model):
+    survey = models.ForeignKey(Survey, related_name='drafts', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='drafts', on_delete=models.CASCADE)
+    # Last saved page: where the respondent stopped
+    last_page = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['survey', 'user'], name='unique_draft_per_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.survey.title} (sayfa {self.last_page})"
+
+class DraftAnswer(models.Model):
+    draft = models.ForeignKey(ResponseDraft, related_name='answers', on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, related_name='draft_answers', on_delete=models.CASCADE)
+    value = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            # Also the upsert target of a page save
+            models.UniqueConstraint(fields=['draft', 'question'], name='unique_draft_answer'),
+        ]
+
     def __str__(self):
-        return f"{self.question.text}: {self.value}"
\ No newline at end of file
+        return f"{self.question.text}: {self.value}"
@@ -0,0 +1,30 @@
+# backend/api/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Cursor pages ordered by primary key, newest first: every page is an index
+    range scan (id < cursor), however deep the client pages, and rows written
+    meanwhile do not shift the pages.
+
+    Query params: cursor (from next/previous), page_size (at most
+    max_page_size), count=true adds the total (one extra COUNT query).
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get('count') in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data['count'] = self.count
+        return response
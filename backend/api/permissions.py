@@ -14,3 +14,18 @@ class IsStaffOrReadOnly(permissions.BasePermission):
 
         # Write permissions (POST, PUT, DELETE) are only allowed to the staff users.
         return request.user and request.user.is_staff
+
+# Cafeteria tablets: accounts of this group can sync kiosk batches and nothing else
+KIOSK_GROUP = 'kiosk'
+
+class IsKioskOrStaff(permissions.BasePermission):
+    """
+    Allows members of the kiosk group (and staff). A tablet's token then does
+    not carry the staff rights to read the answers or manage users.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        return user.is_staff or user.groups.filter(name=KIOSK_GROUP).exists()
@@ -0,0 +1,319 @@
+# backend/api/results.py
+
+from collections import defaultdict
+
+from django.db.models import Count, Exists, F, OuterRef, Sum, Window
+from django.db.models.functions import RowNumber
+
+from .models import Answer, AnswerChoice, QuestionStats, Response
+from .statistics import distribution_statistics
+
+TEXT_TYPES = ('text', 'date')
+CHOICE_TYPES = ('choice', 'multiple')
+NUMERIC_TYPES = ('star', 'scale')
+
+# Text/Date questions only show the latest N answers on the dashboard
+TEXT_SAMPLE_SIZE = 50
+# Older ones are browsed page by page (answer_page)
+ANSWER_PAGE_MAX_SIZE = 200
+
+
+def survey_results(survey):
+    """
+    Computes the dashboard results of every question of a survey.
+
+    Reads the precomputed QuestionStats rollups (one row per question), so the
+    cost does not grow with the number of responses. Only the text samples
+    still touch Answer, through a single windowed query.
+    """
+    # Uses the prefetch cache when the survey comes from SurveyViewSet
+    questions = sorted(survey.questions.all(), key=lambda q: (q.order, q.id))
+    stats = {s.question_id: s for s in QuestionStats.objects.filter(question__in=questions)}
+    return build_results(questions, stats)
+
+
+def segment_results(survey, responses):
+    """
+    Results restricted to a segment of the responses (see filter_responses).
+
+    Rollups cannot be used here, the grouped queries of raw_question_stats run
+    with the segment pushed down as a `response_id IN (...)` subquery.
+    """
+    questions = sorted(survey.questions.all(), key=lambda q: (q.order, q.id))
+    stats = raw_question_stats(questions, responses)
+    return build_results(questions, stats, responses)
+
+
+def filter_responses(survey, since=None, until=None, complete=None, group=None, user_ids=None, answered=()):
+    """
+    Responses of a survey matching the given filters.
+
+    since/until: submission date range, served by the Response(survey, submitted_at) index.
+    complete: True keeps the responses that reached the last page of the survey
+    (answered one of its questions), False the ones that did not.
+    group: 'staff' or 'students'. user_ids: explicit cohort.
+    answered: [(question, value)] pairs, the response must contain each answer
+    (option label for choice/multiple, number for star/scale, exact text otherwise).
+    Raises ValueError for a value that cannot match the question.
+    """
+    responses = Response.objects.filter(survey=survey)
+    if since:
+        responses = responses.filter(submitted_at__gte=since)
+    if until:
+        responses = responses.filter(submitted_at__lt=until)
+    if group == 'staff':
+        responses = responses.filter(user__is_staff=True)
+    elif group == 'students':
+        responses = responses.filter(user__is_staff=False)
+    if user_ids:
+        responses = responses.filter(user_id__in=user_ids)
+
+    if complete is not None:
+        questions = survey.questions.all()
+        last_page = max((q.page_number for q in questions), default=1)
+        last_ids = [q.id for q in questions if q.page_number == last_page]
+        reached = Exists(Answer.objects.filter(response=OuterRef('pk'), question_id__in=last_ids))
+        responses = responses.filter(reached if complete else ~reached)
+
+    for question, value in answered:
+        if question.question_type in CHOICE_TYPES:
+            indices = question.option_indices(value, strict=True)
+            if len(indices) != 1:
+                raise ValueError(value)
+            match = AnswerChoice.objects.filter(
+                question_id=question.id, option_index=indices[0], answer__response=OuterRef('pk')
+            )
+        elif question.question_type in NUMERIC_TYPES:
+            match = Answer.objects.filter(question_id=question.id, numeric_value=float(value), response=OuterRef('pk'))
+        else:
+            match = Answer.objects.filter(question_id=question.id, value=value, response=OuterRef('pk'))
+        responses = responses.filter(Exists(match))
+
+    return responses.values('id')
+
+
+def compare_surveys(surveys):
+    """
+    Per-question metrics of several surveys side by side, read from the rollups.
+
+    Questions are aligned by (text, type) across surveys; `metrics` holds one
+    entry per survey (None when the survey does not ask the question). A single
+    QuestionStats query, whatever the number of surveys.
+    """
+    surveys = list(surveys)
+    questions = [
+        q for survey in surveys
+        for q in sorted(survey.questions.all(), key=lambda q: (q.order, q.id))
+    ]
+    stats = {s.question_id: s for s in QuestionStats.objects.filter(question__in=questions)}
+
+    rows = {}
+    for q in questions:
+        key = (q.text.strip().casefold(), q.question_type)
+        row = rows.setdefault(key, {'text': q.text, 'type': q.question_type, 'metrics': {}})
+        # A repeated question in one survey keeps its first occurrence
+        row['metrics'].setdefault(q.survey_id, _question_metrics(q, stats.get(q.id) or QuestionStats(question_id=q.id)))
+
+    return {
+        'surveys': [{'id': s.id, 'title': s.title, 'created_at': s.created_at} for s in surveys],
+        'questions': [
+            {**row, 'metrics': [row['metrics'].get(s.id) for s in surveys]}
+            for row in rows.values()
+        ],
+    }
+
+
+def build_results(questions, stats, responses=None):
+    """Assembles the results JSON from {question_id: QuestionStats}."""
+    text_ids = [q.id for q in questions if q.question_type in TEXT_TYPES]
+    samples = _text_samples(text_ids, responses)
+
+    results_data = []
+    for q in questions:
+        q_stats = stats.get(q.id) or QuestionStats(question_id=q.id)
+        question_data = {
+            'id': q.id,
+            'text': q.text,
+            'type': q.question_type,
+            'total': q_stats.answer_count,
+            'results': None
+        }
+
+        if q.question_type in TEXT_TYPES:
+            question_data['results'] = samples.get(q.id, [])
+        elif q.question_type in CHOICE_TYPES:
+            question_data['results'] = _choice_stats(q, q_stats)
+            question_data['respondents'] = q_stats.respondent_count
+        elif q.question_type in NUMERIC_TYPES:
+            average = q_stats.average
+            question_data['results'] = {
+                'average': round(average, 1) if average else 0,
+                'distribution': _distribution(q, q_stats),
+                # Median, percentiles, std dev, NPS split, confidence interval
+                'statistics': distribution_statistics(q.question_type, q_stats)
+            }
+
+        results_data.append(question_data)
+
+    return results_data
+
+
+def raw_question_stats(questions, responses=None):
+    """
+    Builds unsaved QuestionStats straight from the Answer table.
+
+    A fixed number of GROUP BY queries for any number of questions. Used to
+    rebuild and verify the rollups (see api/rollups.py), and for segments when
+    `responses` (a Response id queryset) is given.
+    """
+    types = {q.id: q.question_type for q in questions}
+    stats = {q_id: QuestionStats(question_id=q_id) for q_id in types}
+    if not stats:
+        return stats
+
+    totals = (
+        _answers(stats, responses)
+        .values('question_id')
+        .annotate(
+            answer_count=Count('id'),
+            numeric_count=Count('numeric_value'),
+            numeric_sum=Sum('numeric_value'),
+            numeric_sum_sq=Sum(F('numeric_value') * F('numeric_value')),
+        )
+        .order_by()
+    )
+    for row in totals:
+        q_stats = stats[row['question_id']]
+        q_stats.answer_count = row['answer_count']
+        q_stats.numeric_count = row['numeric_count']
+        q_stats.numeric_sum = row['numeric_sum'] or 0
+        q_stats.numeric_sum_sq = row['numeric_sum_sq'] or 0
+
+    # Choice tallies: a single GROUP BY on the indexed (question_id, option_index)
+    choice_ids = [q_id for q_id, t in types.items() if t in CHOICE_TYPES]
+    if choice_ids:
+        choices = AnswerChoice.objects.filter(question_id__in=choice_ids)
+        if responses is not None:
+            choices = choices.filter(answer__response__in=responses)
+        choice_rows = (
+            choices
+            .values_list('question_id', 'option_index')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for q_id, option_index, count in choice_rows:
+            stats[q_id].choice_counts[str(option_index)] = count
+
+        respondent_rows = (
+            choices
+            .values_list('question_id')
+            .annotate(respondents=Count('answer_id', distinct=True))
+            .order_by()
+        )
+        for q_id, respondents in respondent_rows:
+            stats[q_id].respondent_count = respondents
+
+    # Numeric histograms, grouped by (question_id, numeric_value)
+    numeric_ids = [q_id for q_id, t in types.items() if t in NUMERIC_TYPES]
+    for q_id, value, count in _grouped_counts(numeric_ids, 'numeric_value', responses):
+        if value is not None:
+            stats[q_id].histogram[f"{value:g}"] = count
+
+    return stats
+
+
+# --- GROUPED QUERIES (one per family, never one per question) ---
+
+def _answers(question_ids, responses=None):
+    answers = Answer.objects.filter(question_id__in=question_ids)
+    if responses is not None:
+        # Answer(question, response) index
+        answers = answers.filter(response__in=responses)
+    return answers
+
+
+def _grouped_counts(question_ids, field, responses=None):
+    """[(question_id, value, count), ...] grouped by (question_id, field)."""
+    if not question_ids:
+        return []
+    return (
+        _answers(question_ids, responses)
+        .values_list('question_id', field)
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def _text_samples(question_ids, responses=None):
+    """Latest TEXT_SAMPLE_SIZE non-empty values per question, using a window function."""
+    samples = defaultdict(list)
+    if not question_ids:
+        return samples
+    rows = (
+        _answers(question_ids, responses)
+        .exclude(value='')
+        .annotate(rank=Window(RowNumber(), partition_by=F('question_id'), order_by=F('id').desc()))
+        .filter(rank__lte=TEXT_SAMPLE_SIZE)
+        .order_by('question_id', 'rank')
+        .values_list('question_id', 'value')
+    )
+    for q_id, value in rows:
+        samples[q_id].append(value)
+    return samples
+
+
+def answer_page(question, cursor=None, since=None, until=None, page_size=TEXT_SAMPLE_SIZE):
+    """
+    One page of a question's non-empty answers, newest first.
+
+    Keyset pagination on the answer id: `cursor` is the last id of the previous
+    page, so every page is a range scan of the Answer(question, id) index and
+    costs the same however deep it is. Returns (answers, next_cursor).
+    """
+    answers = Answer.objects.filter(question=question).exclude(value='')
+    if cursor is not None:
+        answers = answers.filter(id__lt=cursor)
+    if since:
+        answers = answers.filter(response__submitted_at__gte=since)
+    if until:
+        answers = answers.filter(response__submitted_at__lt=until)
+
+    rows = list(
+        answers.order_by('-id')
+        .values('id', 'value', 'response_id', submitted_at=F('response__submitted_at'))[:page_size + 1]
+    )
+    next_cursor = rows[page_size - 1]['id'] if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+# --- PYTHON ASSEMBLY ---
+
+def _question_metrics(question, q_stats):
+    metrics = {'total': q_stats.answer_count}
+    if question.question_type in CHOICE_TYPES:
+        metrics['respondents'] = q_stats.respondent_count
+        metrics['results'] = _choice_stats(question, q_stats)
+    elif question.question_type in NUMERIC_TYPES:
+        average = q_stats.average
+        metrics['average'] = round(average, 2) if average else 0
+        metrics['distribution'] = _distribution(question, q_stats)
+    return metrics
+
+
+def _choice_stats(question, q_stats):
+    # Rollups are keyed by option index, labels come from Question.options
+    options = question.options if isinstance(question.options, list) else []
+    return {
+        str(opt).strip(): q_stats.choice_counts.get(str(i), 0)
+        for i, opt in enumerate(options)
+    }
+
+
+def _distribution(question, q_stats):
+    max_val = 10 if question.question_type == 'scale' else 5
+    distribution = {str(i): 0 for i in range(1, max_val + 1)}
+    for key, count in q_stats.histogram.items():
+        bucket = str(int(float(key)))
+        if bucket in distribution:
+            distribution[bucket] += count
+    return distribution
@@ -0,0 +1,154 @@
+# backend/api/rollups.py
+
+import copy
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import bump_results_version, forget_answered_surveys
+from .models import Answer, AnswerChoice, Question, QuestionStats, Response
+from .results import raw_question_stats
+from .terms import apply_term_delta, rebuild_survey_terms
+from .trends import apply_trend_delta, reset_survey_trends
+
+# Sums are floats, allow a little rounding noise when comparing with raw data
+FLOAT_TOLERANCE = 1e-6
+
+
+def snapshot(answers):
+    """Copies answers before they are modified or deleted, to remove their old values later."""
+    copies = []
+    for ans in answers:
+        old = copy.copy(ans)
+        old.option_indices = ans.selected_options()
+        copies.append(old)
+    return copies
+
+
+def apply_answer_delta(added=(), removed=()):
+    """
+    Updates the QuestionStats rollups for answers that were just written or deleted.
+
+    `added` and `removed` are Answer instances whose `question` and `response`
+    are loaded (and whose choices are known, see Answer.selected_options).
+    Must run in the same transaction as the Answer writes. Also bumps the results
+    version of the surveys involved, fixes materialized trend buckets when an
+    old response changes and counts the terms of text answers. Issues at most
+    four queries on the submit path (plus four when text answers are involved),
+    no matter how many answers/questions are involved.
+    """
+    deltas = {}
+    survey_ids = set()
+    for sign, answers in ((1, added), (-1, removed)):
+        for ans in answers:
+            delta = deltas.setdefault(ans.question_id, QuestionStats(question_id=ans.question_id))
+            delta.add(ans.question.question_type, ans.numeric_value, ans.selected_options(), sign)
+            survey_ids.add(ans.question.survey_id)
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        # Make sure every row exists, then lock them (in a stable order to avoid deadlocks)
+        QuestionStats.objects.bulk_create(
+            [QuestionStats(question_id=q_id) for q_id in deltas], ignore_conflicts=True
+        )
+        rows = list(
+            QuestionStats.objects.select_for_update()
+            .filter(question_id__in=deltas)
+            .order_by('question_id')
+        )
+        now = timezone.now()
+        for row in rows:
+            row.merge(deltas[row.question_id])
+            row.updated_at = now
+        QuestionStats.objects.bulk_update(rows, QuestionStats.STAT_FIELDS + ['updated_at'])
+        bump_results_version(survey_ids)
+        apply_trend_delta(added, removed)
+        apply_term_delta(added, removed)
+
+
+def delete_responses(responses):
+    """Deletes Response objects (a queryset or a list) and removes their answers from the rollups."""
+    responses = list(responses)
+    ids = [r.pk for r in responses]
+    with transaction.atomic():
+        answers = list(
+            Answer.objects.filter(response_id__in=ids)
+            .select_related('question', 'response')
+            .prefetch_related('choices')
+        )
+        apply_answer_delta(removed=answers)
+        Response.objects.filter(pk__in=ids).delete()
+        forget_answered_surveys(r.user_id for r in responses)
+
+
+def rebuild_survey_stats(survey, chunk_size=2000):
+    """
+    Recomputes the rollups (and term counts) of a survey from the raw Answer rows.
+    Its materialized trend buckets are dropped and rebuilt on the next trends read.
+
+    Answers are read in keyset chunks (id > last_id) so memory stays bounded.
+    The existing rows are locked first, so concurrent submissions wait for the
+    rebuild and then apply their delta on top of it.
+    """
+    questions = {q.id: q for q in Question.objects.filter(survey=survey)}
+    with transaction.atomic():
+        list(QuestionStats.objects.select_for_update().filter(question_id__in=questions).order_by('question_id'))
+
+        stats = {q_id: QuestionStats(question_id=q_id) for q_id in questions}
+        last_id = 0
+        while True:
+            chunk = list(
+                Answer.objects.filter(question_id__in=questions, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'question_id', 'numeric_value')[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            # Selected options of the same answer id range (ids of other surveys are interleaved)
+            selected = defaultdict(list)
+            choice_rows = AnswerChoice.objects.filter(
+                question_id__in=questions, answer_id__gt=last_id, answer_id__lte=chunk[-1][0]
+            ).values_list('answer_id', 'option_index')
+            for ans_id, option_index in choice_rows:
+                selected[ans_id].append(option_index)
+
+            for ans_id, q_id, numeric_value in chunk:
+                stats[q_id].add(questions[q_id].question_type, numeric_value, selected.get(ans_id, ()))
+            last_id = chunk[-1][0]
+
+        QuestionStats.objects.filter(question_id__in=questions).delete()
+        QuestionStats.objects.bulk_create(stats.values())
+        rebuild_survey_terms(survey, chunk_size)
+        reset_survey_trends(survey)
+        bump_results_version([survey.id])
+    return stats
+
+
+def diff_survey_stats(survey):
+    """
+    Compares the stored rollups with the raw Answer table.
+
+    Returns a list of (question_id, field, stored, raw) tuples, empty when consistent.
+    """
+    questions = list(Question.objects.filter(survey=survey))
+    raw = raw_question_stats(questions)
+    stored = {s.question_id: s for s in QuestionStats.objects.filter(question__in=questions)}
+
+    diffs = []
+    for q in questions:
+        expected = raw[q.id]
+        actual = stored.get(q.id) or QuestionStats(question_id=q.id)
+        for field in QuestionStats.STAT_FIELDS:
+            stored_val = getattr(actual, field)
+            raw_val = getattr(expected, field)
+            if field in ('numeric_sum', 'numeric_sum_sq'):
+                same = abs(stored_val - raw_val) <= FLOAT_TOLERANCE * max(1.0, abs(raw_val))
+            else:
+                same = stored_val == raw_val
+            if not same:
+                diffs.append((q.id, field, stored_val, raw_val))
+    return diffs
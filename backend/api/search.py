@@ -0,0 +1,83 @@
+# backend/api/search.py
+
+import re
+
+from django.db import connection
+
+from .models import Answer
+
+# Text search configuration of the PostgreSQL index (see migration 0014)
+SEARCH_CONFIG = 'turkish'
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+def search_answers(question_ids, query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    Full-text search over the answers of the given (text) questions.
+
+    Returns (count, matches), matches being the requested page of
+    {id, question, response, value, rank} dicts, best match first.
+    PostgreSQL uses the GIN index on to_tsvector('turkish', value), SQLite
+    (tests, local development) the api_answer_fts FTS5 table.
+    """
+    if not question_ids or not query.strip():
+        return 0, []
+    offset = (page - 1) * page_size
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(question_ids, query, offset, page_size)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(question_ids, query, offset, page_size)
+    return _search_fallback(question_ids, query, offset, page_size)
+
+
+def _search_postgresql(question_ids, query, offset, limit):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    # Must stay identical to the indexed expression: to_tsvector('turkish', COALESCE(value, ''))
+    vector = SearchVector('value', config=SEARCH_CONFIG)
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    matches = (
+        Answer.objects.filter(question_id__in=question_ids)
+        .annotate(search=vector)
+        .filter(search=search_query)
+    )
+    page = (
+        matches.annotate(rank=SearchRank(vector, search_query))
+        .order_by('-rank', '-id')
+        .values('id', 'question', 'response', 'value', 'rank')[offset:offset + limit]
+    )
+    return matches.count(), list(page)
+
+
+def _search_sqlite(question_ids, query, offset, limit):
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return 0, []
+    # Every word must appear; quoting keeps user input out of the FTS5 query syntax
+    match = ' '.join(f'"{term}"' for term in terms)
+    placeholders = ', '.join(['%s'] * len(question_ids))
+    join = (
+        "FROM api_answer_fts JOIN api_answer ON api_answer.id = api_answer_fts.rowid "
+        f"WHERE api_answer_fts MATCH %s AND api_answer.question_id IN ({placeholders})"
+    )
+    params = [match, *question_ids]
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) {join}", params)
+        count = cursor.fetchone()[0]
+        # bm25 rank: lower is better, negated so that higher is better like ts_rank
+        cursor.execute(
+            "SELECT api_answer.id, api_answer.question_id, api_answer.response_id, api_answer.value, "
+            f"-api_answer_fts.rank {join} ORDER BY api_answer_fts.rank, api_answer.id DESC LIMIT %s OFFSET %s",
+            params + [limit, offset],
+        )
+        rows = cursor.fetchall()
+    keys = ('id', 'question', 'response', 'value', 'rank')
+    return count, [dict(zip(keys, row)) for row in rows]
+
+
+def _search_fallback(question_ids, query, offset, limit):
+    """Other databases: unranked substring match, newest first."""
+    matches = Answer.objects.filter(question_id__in=question_ids, value__icontains=query.strip())
+    page = matches.order_by('-id').values('id', 'question', 'response', 'value')[offset:offset + limit]
+    return matches.count(), [{**row, 'rank': None} for row in page]
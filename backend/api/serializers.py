@@ -1,9 +1,13 @@
 # backend/api/serializers.py
 
 from rest_framework import serializers
-from .models import Survey, Question, Response, Answer, User
+from .models import Survey, Question, Response, Answer, AnswerChoice, User, ResponseDraft, DraftAnswer
 from rest_framework.authtoken.models import Token # For Login
 from django.contrib.auth import authenticate # For Login
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from .rollups import apply_answer_delta, snapshot
+from .caching import get_survey_validator
 
 # --- USER OPERATIONS ---
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -34,19 +38,93 @@ class QuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = ['id', 'survey', 'text', 'question_type', 'options', 'order', 'page_number', 'required']
 
+    def validate_question_type(self, value):
+        error = self.instance.type_change_error(value) if self.instance else None
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
+    def validate_options(self, value):
+        error = self.instance.options_change_error(value) if self.instance else None
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
 class SurveySerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
+    question_count = serializers.SerializerMethodField()
+    page_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Survey
-        fields = ['id', 'title', 'description', 'questions', 'is_active', 'created_at']
+        fields = ['id', 'title', 'description', 'series', 'questions', 'is_active', 'created_at',
+                  'question_count', 'page_count']
+
+    # Counted from the (prefetched) questions, the list serializer gets them annotated
+    def get_question_count(self, survey):
+        return len(survey.questions.all())
+
+    def get_page_count(self, survey):
+        return len({q.page_number for q in survey.questions.all()})
+
+class SurveyListSerializer(serializers.ModelSerializer):
+    """Survey list without the questions; `fields` keeps only the given ones (?fields=)"""
+    question_count = serializers.IntegerField(read_only=True)
+    page_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Survey
+        fields = ['id', 'title', 'description', 'series', 'is_active', 'created_at', 'question_count', 'page_count']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+def prepare_answer(question, value, **kwargs):
+    """
+    Builds an unsaved Answer from a submitted (already validated) value.
+
+    - numeric_value is filled for SQL-level aggregation (star/scale)
+    - choice/multiple answers store option indices (AnswerChoice) and an empty value
+    """
+    # --- NUMERIC OPTIMIZATION ---
+    num_val = None
+    try:
+        cleaned_val = str(value).replace(',', '.')
+        if cleaned_val.strip():
+            num_val = float(cleaned_val)
+    except (ValueError, TypeError):
+        pass
+
+    option_indices = question.option_indices(value)
+    answer = Answer(
+        question=question,
+        value='' if option_indices else value,
+        numeric_value=num_val,
+        **kwargs
+    )
+    answer.option_indices = option_indices
+    return answer
 
 class AnswerSerializer(serializers.ModelSerializer):
     """Structure used when submitting an answer"""
+    # A plain id: the question is resolved (and checked) by the survey's
+    # compiled validator in ResponseSerializer.validate, not one query per answer
+    question = serializers.IntegerField()
+
     class Meta:
         model = Answer
         fields = ['question', 'value']
 
+    def to_representation(self, instance):
+        return {
+            'question': instance.question_id,
+            # Choice labels are not stored, resolve them from the option indices
+            'value': instance.display_value(),
+        }
+
 class ResponseSerializer(serializers.ModelSerializer):
     """Executed when a student submits a survey"""
     answers = AnswerSerializer(many=True) # List of answers inside
@@ -57,6 +135,21 @@ class ResponseSerializer(serializers.ModelSerializer):
         model = Response
         fields = ['id', 'survey', 'survey_title', 'answers', 'submitted_at']
 
+    def validate(self, attrs):
+        # Every answer is checked in memory against the cached survey definition
+        answers = attrs.get('answers')
+        if answers is None:
+            return attrs
+        survey = attrs.get('survey') or self.instance.survey
+        # Create and PUT send the whole form: every required question must be answered.
+        # PATCH is exempt from the required check.
+        cleaned, errors = get_survey_validator(survey).check(answers, required=not self.partial)
+        if errors:
+            raise serializers.ValidationError(errors)
+        attrs['answers'] = [{'question': question, 'value': value} for question, value in cleaned]
+        return attrs
+
+    @transaction.atomic
     def create(self, validated_data):
         # DRF standard create method does not support nested writes by default,
         # so we implement it manually.
@@ -71,29 +164,17 @@ class ResponseSerializer(serializers.ModelSerializer):
             answers_to_create = []
 
             for answer_data in answers_data:
-                val_str = answer_data.get('value', '')
-                
-                # --- NUMERIC OPTIMIZATION ---
-                num_val = None
-                try:
-                    cleaned_val = str(val_str).replace(',', '.')
-                    if cleaned_val.strip():
-                        num_val = float(cleaned_val)
-                except (ValueError, TypeError):
-                    pass
-                
                 answers_to_create.append(
-                    Answer(
-                        response=response,
-                        question=answer_data['question'],
-                        value=val_str,
-                        numeric_value=num_val
-                    )
+                    prepare_answer(answer_data['question'], answer_data.get('value', ''), response=response)
                 )
 
             # 3. Perform BULK INSERT (One SQL Query instead of N)
             if answers_to_create:
                 Answer.objects.bulk_create(answers_to_create)
+                AnswerChoice.objects.bulk_create(AnswerChoice.for_answers(answers_to_create))
+
+            # 4. Keep the results rollups in sync (same transaction)
+            apply_answer_delta(added=answers_to_create)
                 
         except Exception as e:
             import traceback
@@ -103,6 +184,20 @@ class ResponseSerializer(serializers.ModelSerializer):
 
         return response
     
+    def to_representation(self, instance):
+        # The answers' labels need their question and choices: load them in
+        # three queries when the caller did not (after create/update)
+        prefetch_related_objects([instance], 'answers__question', 'answers__choices')
+        return super().to_representation(instance)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            # Edits keep the response in its survey (the answers are checked against it)
+            fields['survey'].read_only = True
+        return fields
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         # 1. Get new answers list
         answers_data = validated_data.pop('answers', [])
@@ -110,55 +205,70 @@ class ResponseSerializer(serializers.ModelSerializer):
         # 2. Update the Response package itself (date etc.)
         instance = super().update(instance, validated_data)
         
-        # 3. SMART UPDATE (Preserve IDs)
-        # Fetch existing answers and map by Question ID for quick lookup
+        # 3. DIFF against the stored answers (IDs are preserved)
+        prefetch_related_objects([instance], 'answers__question', 'answers__choices')  # No-op when the view did it
         existing_answers = {ans.question_id: ans for ans in instance.answers.all()}
-        
-        # Track which questions we have processed to identify deletions later
-        processed_question_ids = []
+
+        # Rollup bookkeeping: old versions are removed, new versions added
+        to_update, to_create, removed = [], [], []
 
         for answer_data in answers_data:
-            q_id = answer_data.get('question').id # 'question' is a model instance from validated_data
-            new_value = answer_data.get('value')
-            
-            if q_id in existing_answers:
-                # UPDATE existing
-                ans = existing_answers[q_id]
-                ans.value = new_value
-                
-                # Update Numeric
-                try:
-                    ans.numeric_value = float(str(new_value).replace(',', '.'))
-                except (ValueError, TypeError):
-                    ans.numeric_value = None
-                    
-                ans.save()
-                processed_question_ids.append(q_id)
-            else:
-                # CREATE new
-                # Need to handle numeric here too
-                num_val = None
-                try:
-                    num_val = float(str(new_value).replace(',', '.'))
-                except (ValueError, TypeError):
-                    pass
-                    
-                Answer.objects.create(
-                    response=instance, 
-                    question=answer_data.get('question'), 
-                    value=new_value,
-                    numeric_value=num_val
-                )
-                
-        # 4. OPTIONAL: Delete answers that are NOT in the new payload?
-        # If the form logic sends ALL answers every time, then yes, delete missing ones.
-        # Use set difference for efficiency
-        for q_id, ans in existing_answers.items():
-            if q_id not in processed_question_ids:
-                ans.delete()
+            question = answer_data['question']  # Resolved by the survey validator
+            prepared = prepare_answer(question, answer_data.get('value', ''), response=instance)
+
+            ans = existing_answers.pop(question.id, None)
+            if ans is None:
+                to_create.append(prepared)
+                continue
+            if (ans.value, ans.numeric_value, sorted(ans.selected_options())) == (
+                prepared.value, prepared.numeric_value, sorted(prepared.option_indices)
+            ):
+                continue  # Unchanged: no write, no rollup delta
+            removed.extend(snapshot([ans]))
+            ans.value = prepared.value
+            ans.numeric_value = prepared.numeric_value
+            ans.option_indices = prepared.option_indices
+            to_update.append(ans)
+
+        # Whatever is left was not sent again: the form sends ALL answers every time
+        to_delete = list(existing_answers.values())
+        removed.extend(snapshot(to_delete))
 
+        # 4. A fixed number of statements, whatever the number of answers
+        if to_delete:
+            Answer.objects.filter(id__in=[ans.id for ans in to_delete]).delete()  # Choices cascade
+        if to_update:
+            Answer.objects.bulk_update(to_update, ['value', 'numeric_value'])
+            AnswerChoice.objects.filter(answer__in=to_update).delete()
+        if to_create:
+            Answer.objects.bulk_create(to_create)
+        AnswerChoice.objects.bulk_create(AnswerChoice.for_answers(to_update + to_create))
+
+        apply_answer_delta(added=to_update + to_create, removed=removed)
         return instance
 
+class ResponseSummarySerializer(serializers.Serializer):
+    """A response without its answers (responses/mine/), from annotated values() rows"""
+    id = serializers.IntegerField()
+    survey = serializers.IntegerField()
+    survey_title = serializers.CharField()
+    submitted_at = serializers.DateTimeField()
+    answer_count = serializers.IntegerField()
+
+class DraftAnswerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DraftAnswer
+        fields = ['question', 'value']
+
+class ResponseDraftSerializer(serializers.ModelSerializer):
+    """A multi-page survey in progress; pages are saved with PATCH {"page", "answers"}"""
+    answers = DraftAnswerSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ResponseDraft
+        fields = ['id', 'survey', 'last_page', 'answers', 'created_at', 'updated_at']
+        read_only_fields = ['last_page']
+
 # --- FOR ADMIN USER MANAGEMENT ---
 class UserAdminSerializer(serializers.ModelSerializer):
     class Meta:
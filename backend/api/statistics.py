@@ -0,0 +1,85 @@
+# backend/api/statistics.py
+
+import math
+
+# z value of a two-sided 95% confidence interval
+Z_95 = 1.96
+
+PERCENTILES = (25, 50, 75, 90)
+
+# NPS-style thresholds per question type: (promoter if >=, detractor if <=)
+NPS_THRESHOLDS = {
+    'scale': (9, 6),
+    'star': (4.5, 3),
+}
+
+
+def distribution_statistics(question_type, q_stats):
+    """
+    Median, percentiles, standard deviation, NPS split and 95% confidence interval
+    of a star/scale question, derived from its QuestionStats.
+
+    Only the histogram ({value: count}) and the running sums are used, so the
+    cost depends on the number of distinct values, never on the number of answers.
+    """
+    n = q_stats.numeric_count
+    if not n:
+        return None
+
+    histogram = sorted((float(value), count) for value, count in q_stats.histogram.items() if count > 0)
+    mean = q_stats.numeric_sum / n
+    variance = (q_stats.numeric_sum_sq - n * mean * mean) / (n - 1) if n > 1 else 0.0
+    std_dev = math.sqrt(max(variance, 0.0))
+
+    statistics = {
+        'median': _round(_percentile(histogram, n, 50)),
+        'percentiles': {f'p{p}': _round(_percentile(histogram, n, p)) for p in PERCENTILES},
+        'std_dev': _round(std_dev),
+        'confidence_interval': None,
+        'nps': None,
+    }
+
+    if n > 1:
+        margin = Z_95 * std_dev / math.sqrt(n)
+        statistics['confidence_interval'] = {
+            'level': 0.95,
+            'low': _round(mean - margin),
+            'high': _round(mean + margin),
+        }
+
+    if question_type in NPS_THRESHOLDS:
+        promoter_min, detractor_max = NPS_THRESHOLDS[question_type]
+        rated = sum(count for _, count in histogram)
+        promoters = sum(count for value, count in histogram if value >= promoter_min)
+        detractors = sum(count for value, count in histogram if value <= detractor_max)
+        if rated:
+            statistics['nps'] = {
+                'promoters': promoters,
+                'passives': rated - promoters - detractors,
+                'detractors': detractors,
+                'score': round(100.0 * (promoters - detractors) / rated),
+            }
+
+    return statistics
+
+
+def _percentile(histogram, n, p):
+    """Linear interpolation between the closest ranks (same as numpy's default)."""
+    rank = (n - 1) * p / 100.0
+    lower = _value_at(histogram, math.floor(rank))
+    upper = _value_at(histogram, math.ceil(rank))
+    return lower + (upper - lower) * (rank - math.floor(rank))
+
+
+def _value_at(histogram, index):
+    """Value of the `index`-th (0-based) answer in sorted order."""
+    seen = 0
+    for value, count in histogram:
+        seen += count
+        if index < seen:
+            return value
+    return histogram[-1][0]
+
+
+def _round(value):
+    return round(value, 2)
@@ -0,0 +1,116 @@
+# backend/api/submission_queue.py
+
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .batch import build_responses, write_responses
+from .caching import forget_answered_surveys
+from .models import PendingSubmission, Response
+
+FLUSH_BATCH_SIZE = 500
+
+FLUSHED_KEY = 'submissions:flushed'
+LAST_FLUSH_KEY = 'submissions:last_flush'
+
+
+def enqueue_submission(survey, user, answers):
+    """
+    Journals a validated submission (write-behind mode): one INSERT, no rollup locks.
+    `answers` are the validated {"question": Question, "value": ...} dicts.
+    """
+    pending = PendingSubmission.objects.create(
+        survey=survey,
+        user=user if user and user.is_authenticated else None,
+        answers=[{'question': a['question'].id, 'value': a.get('value', '')} for a in answers],
+    )
+    forget_answered_surveys([pending.user_id])
+    return pending
+
+
+def flush_pending_submissions(batch_size=FLUSH_BATCH_SIZE):
+    """
+    Stores up to `batch_size` journaled submissions, oldest first.
+
+    Responses, answers and rollups are written and the journal rows deleted in
+    one transaction: a crash at any point leaves the rows in the journal and
+    the next flush stores them, exactly once. Concurrent flushers skip each
+    other's rows (SKIP LOCKED on PostgreSQL). Returns the number of stored
+    submissions.
+    """
+    started = time.monotonic()
+    with transaction.atomic():
+        pending = list(
+            PendingSubmission.objects.select_for_update(skip_locked=True)
+            .filter(error='')
+            .order_by('id')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        items = [{'survey': p.survey_id, 'answers': p.answers} for p in pending]
+        # Accepted when received: deactivating the survey later must not drop them
+        built = build_responses(items, accepted=True)
+
+        # unique_response_per_user: a user already stored (or twice in the batch) is not stored again
+        users = {p.user_id for p in pending if p.user_id}
+        answered = set(
+            Response.objects.filter(user_id__in=users, survey_id__in={p.survey_id for p in pending})
+            .values_list('survey_id', 'user_id')
+        )
+
+        entries, failed = [], []
+        for submission, (response, answers, errors) in zip(pending, built):
+            if submission.user_id:
+                pair = (submission.survey_id, submission.user_id)
+                if pair in answered:
+                    errors = {'survey': ["Bu anket bu kullanıcı tarafından zaten cevaplanmış."]}
+                answered.add(pair)
+            if errors:
+                submission.error = json.dumps(errors, ensure_ascii=False)
+                failed.append(submission)
+                continue
+            response.user_id = submission.user_id
+            response.submitted_at = submission.received_at
+            entries.append((response, answers))
+
+        oldest = pending[0].received_at
+        write_responses(entries)
+        PendingSubmission.objects.filter(id__in=[p.id for p in pending if not p.error]).delete()
+        PendingSubmission.objects.bulk_update(failed, ['error'])
+        # A failed submission no longer hides its survey from the user
+        forget_answered_surveys(p.user_id for p in failed)
+
+    _record_flush(len(entries), time.monotonic() - started, timezone.now() - oldest)
+    return len(entries)
+
+
+def queue_stats():
+    """Queue depth, age of the oldest submission and flush metrics."""
+    waiting = PendingSubmission.objects.filter(error='')
+    oldest = waiting.order_by('id').values_list('received_at', flat=True).first()
+    return {
+        'depth': waiting.count(),
+        'failed': PendingSubmission.objects.exclude(error='').count(),
+        'oldest_age_seconds': round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0,
+        'flushed': cache.get(FLUSHED_KEY, 0),
+        'last_flush': cache.get(LAST_FLUSH_KEY),
+    }
+
+
+def _record_flush(count, seconds, wait):
+    cache.add(FLUSHED_KEY, 0, timeout=None)
+    try:
+        cache.incr(FLUSHED_KEY, count)
+    except ValueError:
+        cache.set(FLUSHED_KEY, count, timeout=None)
+    cache.set(LAST_FLUSH_KEY, {
+        'at': timezone.now().isoformat(),
+        'count': count,
+        'latency_ms': round(seconds * 1000, 1),
+        # How long the oldest submission of the batch waited in the journal
+        'max_wait_ms': round(wait.total_seconds() * 1000, 1),
+    }, timeout=None)
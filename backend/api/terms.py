@@ -0,0 +1,162 @@
+# backend/api/terms.py
+
+import re
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Answer, QuestionTerm, QuestionTermDay
+
+TOP_TERMS = 20
+TREND_DAYS = 14
+MAX_TERM_LENGTH = 100
+
+STOPWORDS = frozenset("""
+    acaba ama ancak artık aslında az bana bazı belki ben beni benim bence bir biraz birçok biri
+    birkaç bile bu buna bunda bundan bunu bunun burada çok çünkü da daha de değil diye en fakat
+    falan gibi göre hem hep hepsi her hiç için ile ise iki kadar ki kim mı mi mu mü nasıl ne neden
+    nerede niye o olan olarak olsa olur ona onlar onu onun öyle sadece sanki se sen siz şey şu
+    tüm ve veya ya yani yine yok var zaten
+""".split())
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Turkish-aware lower case: 'I' -> 'ı' and 'İ' -> 'i' before str.lower()."""
+    return text.replace('I', 'ı').replace('İ', 'i').lower()
+
+
+def extract_terms(text):
+    """
+    Distinct terms of a text answer: its words and two-word phrases.
+
+    Stopwords, one-letter words and numbers are dropped; a phrase is only
+    made of two adjacent kept words.
+    """
+    words = _WORD.findall(normalize(text or ''))
+    kept = [w if w.isalpha() and len(w) > 1 and w not in STOPWORDS else None for w in words]
+    terms = {w for w in kept if w}
+    terms.update(f"{a} {b}" for a, b in zip(kept, kept[1:]) if a and b)
+    return {t for t in terms if len(t) <= MAX_TERM_LENGTH}
+
+
+def apply_term_delta(added=(), removed=()):
+    """
+    Updates the term counts of the text answers that were just written or deleted.
+
+    Called by rollups.apply_answer_delta; runs no query when no text answer is
+    involved.
+    """
+    totals = Counter()
+    days = Counter()
+    for sign, answers in ((1, added), (-1, removed)):
+        for ans in answers:
+            if ans.question.question_type != 'text' or not ans.value:
+                continue
+            day = timezone.localdate(ans.response.submitted_at)
+            for term in extract_terms(ans.value):
+                totals[(ans.question_id, term)] += sign
+                days[(ans.question_id, term, day)] += sign
+    # Drop the terms that cancel out (edits keeping a word)
+    totals = {key: n for key, n in totals.items() if n}
+    days = {key: n for key, n in days.items() if n}
+    if not totals and not days:
+        return
+
+    with transaction.atomic():
+        _add_counts(QuestionTerm, ('question_id', 'term'), totals)
+        _add_counts(QuestionTermDay, ('question_id', 'term', 'day'), days)
+
+
+def _add_counts(model, key_fields, deltas):
+    # Same pattern as the QuestionStats rollups: create missing rows, lock, add
+    if not deltas:
+        return
+    model.objects.bulk_create(
+        [model(**dict(zip(key_fields, key))) for key, delta in deltas.items() if delta > 0],
+        ignore_conflicts=True,
+    )
+    # IN lists per field rather than one OR per key (long comments have hundreds of terms);
+    # the few extra rows it matches are filtered out below.
+    candidates = model.objects.filter(**{
+        f'{field}__in': {key[i] for key in deltas} for i, field in enumerate(key_fields)
+    })
+    rows = []
+    for row in candidates.select_for_update().order_by('id'):
+        key = tuple(getattr(row, f) for f in key_fields)
+        if key in deltas:
+            # Answers written before the counts were built (no rebuild yet) must not fail the write
+            row.count = max(row.count + deltas[key], 0)
+            rows.append(row)
+    model.objects.bulk_update(rows, ['count'])
+    if any(delta < 0 for delta in deltas.values()):
+        candidates.filter(count=0).delete()
+
+
+def rebuild_survey_terms(survey, chunk_size=2000):
+    """Recounts the terms of every text question of a survey from the raw answers."""
+    question_ids = list(survey.questions.filter(question_type='text').values_list('id', flat=True))
+    totals = Counter()
+    days = Counter()
+    last_id = 0
+    while True:
+        chunk = list(
+            Answer.objects.filter(question_id__in=question_ids, id__gt=last_id)
+            .exclude(value='')
+            .order_by('id')
+            .values_list('id', 'question_id', 'value', 'response__submitted_at')[:chunk_size]
+        )
+        if not chunk:
+            break
+        for _, q_id, value, submitted_at in chunk:
+            day = timezone.localdate(submitted_at)
+            for term in extract_terms(value):
+                totals[(q_id, term)] += 1
+                days[(q_id, term, day)] += 1
+        last_id = chunk[-1][0]
+
+    with transaction.atomic():
+        QuestionTerm.objects.filter(question_id__in=question_ids).delete()
+        QuestionTermDay.objects.filter(question_id__in=question_ids).delete()
+        QuestionTerm.objects.bulk_create(
+            [QuestionTerm(question_id=q_id, term=term, count=n) for (q_id, term), n in totals.items()],
+            batch_size=chunk_size,
+        )
+        QuestionTermDay.objects.bulk_create(
+            [QuestionTermDay(question_id=q_id, term=term, day=day, count=n) for (q_id, term, day), n in days.items()],
+            batch_size=chunk_size,
+        )
+
+
+def top_terms(question, limit=TOP_TERMS, days=TREND_DAYS):
+    """
+    The `limit` most frequent terms of a text question with their daily counts
+    over the last `days` days (zero-filled). Two indexed queries.
+    """
+    top = list(
+        QuestionTerm.objects.filter(question=question, count__gt=0)
+        .order_by('-count', 'term')
+        .values_list('term', 'count')[:limit]
+    )
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    trend = defaultdict(dict)
+    if top:
+        rows = QuestionTermDay.objects.filter(
+            question=question, term__in=[term for term, _ in top], day__gte=start
+        ).values_list('term', 'day', 'count')
+        for term, day, count in rows:
+            trend[term][day] = count
+
+    calendar = [start + timedelta(days=i) for i in range(days)]
+    return [
+        {
+            'term': term,
+            'count': count,
+            'trend': [{'day': day.isoformat(), 'count': trend[term].get(day, 0)} for day in calendar],
+        }
+        for term, count in top
+    ]
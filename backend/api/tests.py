@@ -1,8 +1,9 @@
 from django.test import TestCase
+from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Survey, Question, Response
+from .models import Survey, Question, Response, Answer, AnswerChoice, ResponseDraft
 
 User = get_user_model()
 
@@ -120,3 +121,295 @@ class ResponseSubmissionTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Response.objects.count(), 1)
         self.assertEqual(Response.objects.first().answers.first().value, "I am fine.")
+
+    def test_answered_survey_leaves_the_listing(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.assertEqual([s['id'] for s in self.client.get('/api/surveys/').json()['results']], [self.survey.id])
+
+        created = self.client.post('/api/responses/', {
+            "survey": self.survey.id, "answers": [{"question": self.question.id, "value": "Fine."}]
+        }, format='json')
+        self.assertEqual(self.client.get('/api/surveys/').json()['results'], [])
+        # Cached: the listing no longer reads the Response table
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get('/api/surveys/').json()['results'], [])
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "api_response"' in q['sql']])
+
+        self.client.delete(f'/api/responses/{created.data["id"]}/')
+        self.assertEqual([s['id'] for s in self.client.get('/api/surveys/').json()['results']], [self.survey.id])
+
+class AnswerChoiceTests(TestCase):
+    def setUp(self):
+        self.survey = Survey.objects.create(title="Choice Survey")
+        self.question = Question.objects.create(
+            survey=self.survey,
+            text="Toppings?",
+            question_type="multiple",
+            options=["Peynir", "Domates, Biber", "Zeytin"],
+            order=1
+        )
+
+    def test_option_indices_with_comma_in_label(self):
+        """Options containing commas must still resolve from the comma-joined value."""
+        self.assertEqual(self.question.option_indices("Domates, Biber, Zeytin"), [1, 2])
+        self.assertEqual(self.question.option_indices("Peynir"), [0])
+        self.assertEqual(self.question.option_indices("Bilinmeyen"), [])
+
+    def test_submission_writes_choice_rows(self):
+        user = User.objects.create_user('choice_user', 'c@e.com', 'Pass123')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        payload = {
+            "survey": self.survey.id,
+            "answers": [{"question": self.question.id, "value": "Peynir, Domates, Biber"}]
+        }
+        response = client.post('/api/responses/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(AnswerChoice.objects.values_list('option_index', flat=True)), [0, 1]
+        )
+
+    def test_choice_value_stored_as_indices(self):
+        """Labels are not stored for choice answers, they are resolved on read."""
+        user = User.objects.create_user('code_user', 'k@e.com', 'Pass123')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        payload = {
+            "survey": self.survey.id,
+            "answers": [{"question": self.question.id, "value": "Zeytin, Peynir"}]
+        }
+        response = client.post('/api/responses/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Answer.objects.get().value, "")
+
+        detail = client.get(f"/api/responses/{response.data['id']}/")
+        self.assertEqual(detail.data['answers'][0]['value'], "Peynir, Zeytin")
+
+    def test_invalid_option_rejected(self):
+        user = User.objects.create_user('bad_user', 'b@e.com', 'Pass123')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        payload = {
+            "survey": self.survey.id,
+            "answers": [{"question": self.question.id, "value": "Peynir, Ananas"}]
+        }
+        response = client.post('/api/responses/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Response.objects.count(), 0)
+
+    def test_answered_options_are_append_only(self):
+        """Stored answers are option indices: reordering or removing options would remap them."""
+        student = APIClient()
+        student.force_authenticate(user=User.objects.create_user('opt_user', 'o@e.com', 'Pass123'))
+        student.post('/api/responses/', {
+            "survey": self.survey.id, "answers": [{"question": self.question.id, "value": "Zeytin"}]
+        }, format='json')
+        admin = APIClient()
+        admin.force_authenticate(user=User.objects.create_superuser('opt_admin', 'oa@e.com', 'Pass123'))
+        url = f'/api/questions/{self.question.id}/'
+
+        for options in (["Zeytin", "Peynir", "Domates, Biber"], ["Peynir", "Zeytin"], ["Peynir", "Mantar", "Zeytin"]):
+            response = admin.patch(url, {"options": options}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('options', response.data)
+        # Admin inline forms run the same check
+        self.question.options = ["Zeytin"]
+        with self.assertRaises(ValidationError):
+            self.question.full_clean()
+
+        response = admin.patch(url, {"options": ["Peynir", "Domates, Biber", "Zeytin", "Mantar"]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Answer.objects.get().display_value(), "Zeytin")
+
+    def test_answered_question_keeps_its_type(self):
+        student = APIClient()
+        student.force_authenticate(user=User.objects.create_user('type_user', 't@e.com', 'Pass123'))
+        student.post('/api/responses/', {
+            "survey": self.survey.id, "answers": [{"question": self.question.id, "value": "Zeytin"}]
+        }, format='json')
+        admin = APIClient()
+        admin.force_authenticate(user=User.objects.create_superuser('type_admin', 'ta@e.com', 'Pass123'))
+
+        response = admin.patch(f'/api/questions/{self.question.id}/', {"question_type": "text"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('question_type', response.data)
+        self.question.question_type = "choice"
+        with self.assertRaises(ValidationError):
+            self.question.full_clean()
+        self.assertEqual(Answer.objects.get().display_value(), "Zeytin")
+
+        # Unchanged type (other fields edited) is accepted
+        response = admin.patch(f'/api/questions/{self.question.id}/', {"question_type": "multiple", "text": "Malzemeler?"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unanswered_options_can_change(self):
+        self.question.options = ["Zeytin", "Peynir"]
+        self.question.question_type = "choice"
+        self.question.full_clean()
+
+class SubmissionValidationTests(TestCase):
+    """Answers are checked in memory by the survey's cached validator."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user('val_user', 'v@e.com', 'Password123'))
+        self.survey = Survey.objects.create(title="Validated", is_active=True)
+        self.questions = [
+            Question.objects.create(survey=self.survey, text=f"Soru {i}", question_type="star", order=i)
+            for i in range(30)
+        ]
+        self.optional = Question.objects.create(
+            survey=self.survey, text="Yorum", question_type="text", order=31, required=False
+        )
+
+    def _payload(self, questions=None):
+        return {"survey": self.survey.id, "answers": [
+            {"question": q.id, "value": "4"} for q in (questions if questions is not None else self.questions)
+        ]}
+
+    def test_no_query_per_answer(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.client.post('/api/responses/', self._payload(self.questions[:1]), format='json')  # Compiles the validator
+        Response.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/responses/', self._payload(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Only the one that loads the labels of the returned answers
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "api_question"' in q['sql']]), 1)
+
+    def test_edits_keep_required_answers(self):
+        created = self.client.post('/api/responses/', self._payload(), format='json')
+        url = f"/api/responses/{created.data['id']}/"
+
+        # PUT replaces the whole form: a missing or blank required answer is rejected
+        self.assertEqual(self.client.put(url, self._payload(self.questions[:29]), format='json').status_code, 400)
+        blank = self._payload()
+        blank['answers'][0]['value'] = " "
+        self.assertEqual(self.client.put(url, blank, format='json').status_code, 400)
+
+        # PATCH is exempt from the required check
+        patch = {"answers": [{"question": self.questions[0].id, "value": "2"}]}
+        self.assertEqual(self.client.patch(url, patch, format='json').status_code, 200)
+
+    def test_required_questions(self):
+        response = self.client.post('/api/responses/', self._payload(self.questions[:29]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Soru 29", response.data['answers'][0])
+
+    def test_question_of_another_survey(self):
+        other = Question.objects.create(survey=Survey.objects.create(title="Other"), text="X", question_type="text")
+        payload = self._payload()
+        payload['answers'].append({"question": other.id, "value": "hi"})
+        response = self.client.post('/api/responses/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('question', response.data['answers'][30])
+
+    def test_new_required_question_invalidates_validator(self):
+        self.assertEqual(self.client.post('/api/responses/', self._payload(), format='json').status_code, 201)
+        Response.objects.all().delete()
+        admin = User.objects.create_superuser('val_admin', 'va@e.com', 'Password123')
+        self.client.force_authenticate(user=admin)
+        self.client.post('/api/questions/', {
+            "survey": self.survey.id, "text": "Yeni", "question_type": "text", "order": 40
+        }, format='json')
+        response = self.client.post('/api/responses/', self._payload(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ResponseDraftTests(TestCase):
+    """Multi-page surveys saved page by page, then submitted."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('draft_user', 'd@e.com', 'Password123')
+        self.client.force_authenticate(user=self.user)
+        self.survey = Survey.objects.create(title="Uzun Anket", is_active=True)
+        self.q_taste = Question.objects.create(survey=self.survey, text="Lezzet", question_type="star", order=1)
+        self.q_portion = Question.objects.create(
+            survey=self.survey, text="Porsiyon", question_type="choice", options=["Az", "Yeterli"], order=2
+        )
+        self.q_comment = Question.objects.create(
+            survey=self.survey, text="Yorum", question_type="text", order=3, page_number=2
+        )
+
+    def _start(self):
+        response = self.client.post('/api/drafts/', {"survey": self.survey.id}, format='json')
+        self.assertIn(response.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
+        return response.data['id']
+
+    def _save(self, draft_id, page, answers):
+        return self.client.patch(f'/api/drafts/{draft_id}/', {"page": page, "answers": [
+            {"question": q.id, "value": v} for q, v in answers
+        ]}, format='json')
+
+    def test_pages_are_saved_and_submitted(self):
+        draft_id = self._start()
+        self.assertEqual(self._save(draft_id, 1, [(self.q_taste, "3"), (self.q_portion, "Az")]).status_code, 200)
+        # Saving the page again only rewrites its rows
+        self.assertEqual(self._save(draft_id, 1, [(self.q_taste, "5")]).status_code, 200)
+        self.assertEqual(self._save(draft_id, 2, [(self.q_comment, "Sıcaktı")]).status_code, 200)
+
+        # Resuming returns the saved answers
+        draft = self.client.post('/api/drafts/', {"survey": self.survey.id}, format='json').data
+        self.assertEqual(draft['last_page'], 2)
+        self.assertEqual(
+            {a['question']: a['value'] for a in draft['answers']},
+            {self.q_taste.id: "5", self.q_comment.id: "Sıcaktı"},
+        )
+
+        # The portion answer was dropped from page 1: required on submit
+        self.assertEqual(self.client.post(f'/api/drafts/{draft_id}/submit/').status_code, 400)
+        self._save(draft_id, 1, [(self.q_taste, "5"), (self.q_portion, "Yeterli")])
+        response = self.client.post(f'/api/drafts/{draft_id}/submit/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['answers']), 3)
+        self.assertFalse(ResponseDraft.objects.exists())
+        self.assertEqual(self.client.post('/api/drafts/', {"survey": self.survey.id}, format='json').status_code, 409)
+
+    def test_answers_must_belong_to_the_page(self):
+        draft_id = self._start()
+        response = self._save(draft_id, 1, [(self.q_comment, "Sıcaktı")])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('question', response.data['answers'][0])
+        self.assertEqual(self._save(draft_id, 1, [(self.q_portion, "Çok")]).status_code, 400)
+
+    def test_page_must_exist(self):
+        draft_id = self._start()
+        for page in (-1, 0, 3, 99):
+            response = self._save(draft_id, page, [])
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('page', response.data)
+        self.assertEqual(ResponseDraft.objects.get().last_page, 0)
+
+    def test_direct_submission_deletes_the_draft(self):
+        self._save(self._start(), 1, [(self.q_taste, "4")])
+        response = self.client.post('/api/responses/', {"survey": self.survey.id, "answers": [
+            {"question": self.q_taste.id, "value": "4"},
+            {"question": self.q_portion.id, "value": "Az"},
+            {"question": self.q_comment.id, "value": "İyi"},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(ResponseDraft.objects.exists())
+
+    def test_drafts_are_private(self):
+        draft_id = self._start()
+        self.client.force_authenticate(user=User.objects.create_user('other', 'o@e.com', 'Password123'))
+        self.assertEqual(self._save(draft_id, 1, [(self.q_taste, "1")]).status_code, 404)
+
+    def test_dropoff(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        self._save(self._start(), 1, [(self.q_taste, "4"), (self.q_portion, "Az")])
+        old = ResponseDraft.objects.create(
+            survey=self.survey, user=User.objects.create_user('gone', 'g@e.com', 'Password123')
+        )
+        ResponseDraft.objects.filter(id=old.id).update(updated_at=timezone.now() - timedelta(days=2))
+
+        self.client.force_authenticate(user=User.objects.create_superuser('draft_admin', 'da@e.com', 'Password123'))
+        data = self.client.get(f'/api/surveys/{self.survey.id}/dropoff/').data
+        self.assertEqual((data['completed'], data['in_progress'], data['abandoned']), (0, 1, 1))
+        self.assertEqual(data['by_page'], [
+            {'page': 0, 'drafts': 1, 'abandoned': 1}, {'page': 1, 'drafts': 1, 'abandoned': 0},
+        ])
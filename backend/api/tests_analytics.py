@@ -0,0 +1,612 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import Survey, Question, Response, Answer, TrendBucket, TrendWatermark
+from .rollups import rebuild_survey_stats
+from .export import export_rows
+
+User = get_user_model()
+
+class TrendTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('trend_admin', 't@e.com', 'Pass123')
+        self.client.force_authenticate(user=self.admin)
+
+        self.survey = Survey.objects.create(title="Trend Survey", is_active=True)
+        self.q_star = Question.objects.create(survey=self.survey, text="Lezzet", question_type="star", order=1)
+        self.q_text = Question.objects.create(survey=self.survey, text="Yorum", question_type="text", order=2)
+        self.url = f'/api/surveys/{self.survey.id}/trends/'
+
+        # Two answers three days ago, one today
+        self.today = timezone.now()
+        self.old_day = self.today - timedelta(days=3)
+        self.old_response = self._answer(self.old_day, 2)
+        self._answer(self.old_day, 4)
+        self._answer(self.today, 5)
+        rebuild_survey_stats(self.survey)
+
+    def _answer(self, submitted_at, value):
+        r = Response.objects.create(survey=self.survey)
+        Response.objects.filter(id=r.id).update(submitted_at=submitted_at)
+        Answer.objects.create(response=r, question=self.q_star, value=str(value), numeric_value=float(value))
+        return r
+
+    def _buckets(self, **params):
+        response = self.client.get(self.url, {'bucket': 'day', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['questions']), 1)  # Only star/scale questions
+        return response.data['questions'][0]['buckets']
+
+    def test_daily_buckets(self):
+        buckets = self._buckets()
+        self.assertEqual([b['count'] for b in buckets], [2, 1])
+        self.assertEqual(buckets[0]['average'], 3.0)
+        self.assertEqual(buckets[1]['average'], 5.0)
+
+    def test_closed_buckets_are_materialized(self):
+        self._buckets()
+        stored = TrendBucket.objects.get(question=self.q_star, granularity='day')
+        self.assertEqual((stored.answer_count, stored.value_sum), (2, 6.0))
+
+        # Materialized rows are what the endpoint reads for closed buckets
+        TrendBucket.objects.filter(id=stored.id).update(answer_count=7)
+        self.assertEqual(self._buckets()[0]['count'], 7)
+
+    def test_editing_old_response_updates_bucket(self):
+        self._buckets()
+        self.client.force_authenticate(user=self.admin)
+        payload = {"survey": self.survey.id, "answers": [{"question": self.q_star.id, "value": "5"}]}
+        response = self.client.patch(f'/api/responses/{self.old_response.id}/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        buckets = self._buckets()
+        self.assertEqual(buckets[0]['count'], 2)
+        self.assertEqual(buckets[0]['average'], 4.5)
+
+        self.client.delete(f'/api/responses/{self.old_response.id}/')
+        self.assertEqual(self._buckets()[0]['count'], 1)
+
+    def test_rebuild_drops_stale_buckets(self):
+        self._buckets()
+        # Deleted behind the rollups' back (e.g. by a data migration)
+        Response.objects.filter(id=self.old_response.id).delete()
+        self.assertEqual(self._buckets()[0]['count'], 2)
+        rebuild_survey_stats(self.survey)
+        self.assertEqual([b['count'] for b in self._buckets()], [1, 1])
+
+    def test_since_filter_and_validation(self):
+        since = (self.today - timedelta(days=1)).date().isoformat()
+        self.assertEqual([b['count'] for b in self._buckets(since=since)], [1])
+
+        response = self.client.get(self.url, {'bucket': 'month'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_until_keeps_whole_buckets(self):
+        # Materialized (closed) and raw (open) buckets are both cut at a bucket boundary
+        self.assertEqual([b['count'] for b in self._buckets(until=self.old_day.isoformat())], [2])
+        self.assertEqual([b['count'] for b in self._buckets(until=(self.today - timedelta(seconds=1)).isoformat())], [2, 1])
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=User.objects.create_user('trend_student', 'ts@e.com', 'Pass123'))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(TrendWatermark.objects.exists())
+
+class DistributionStatisticsTests(TestCase):
+    """Statistics derived from the rollup histogram must match a direct computation."""
+
+    def test_matches_python_statistics(self):
+        import statistics
+        from .models import QuestionStats
+        from .statistics import distribution_statistics
+
+        values = [1, 2, 2, 3, 3, 3, 4, 4.5, 5, 5, 5, 5]
+        q_stats = QuestionStats()
+        for v in values:
+            q_stats.add('star', float(v))
+
+        result = distribution_statistics('star', q_stats)
+        self.assertEqual(result['median'], statistics.median(values))
+        self.assertAlmostEqual(result['std_dev'], statistics.stdev(values), places=2)
+        quartiles = statistics.quantiles(values, n=4, method='inclusive')
+        self.assertAlmostEqual(result['percentiles']['p25'], quartiles[0], places=2)
+        self.assertAlmostEqual(result['percentiles']['p75'], quartiles[2], places=2)
+        # Promoters >= 4.5, detractors <= 3
+        self.assertEqual(result['nps'], {'promoters': 5, 'passives': 1, 'detractors': 6, 'score': -8})
+        self.assertLess(result['confidence_interval']['low'], statistics.mean(values))
+        self.assertGreater(result['confidence_interval']['high'], statistics.mean(values))
+
+    def test_results_include_statistics(self):
+        admin = User.objects.create_superuser('stats_admin', 's@e.com', 'Pass123')
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        survey = Survey.objects.create(title="Stats Survey", is_active=True)
+        q_scale = Question.objects.create(survey=survey, text="Hijyen", question_type="scale", order=1)
+        for i, value in enumerate(("10", "9", "7", "3")):
+            client.force_authenticate(user=User.objects.create_user(f'rater{i}', f'r{i}@e.com', 'Pass123'))
+            client.post('/api/responses/', {
+                "survey": survey.id, "answers": [{"question": q_scale.id, "value": value}]
+            }, format='json')
+
+        client.force_authenticate(user=admin)
+        stats = client.get(f'/api/surveys/{survey.id}/results/').data[0]['results']['statistics']
+        self.assertEqual(stats['median'], 8.0)
+        self.assertEqual(stats['nps']['score'], 25)
+
+    def test_no_answers(self):
+        from .models import QuestionStats
+        from .statistics import distribution_statistics
+        self.assertIsNone(distribution_statistics('scale', QuestionStats()))
+
+class CrosstabTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('cross_admin', 'c@e.com', 'Pass123')
+        self.survey = Survey.objects.create(title="Crosstab Survey", is_active=True)
+        self.q_breakfast = Question.objects.create(
+            survey=self.survey, text="Kahvaltı", question_type="choice", options=["Evet", "Hayır"], order=1
+        )
+        self.q_dishes = Question.objects.create(
+            survey=self.survey, text="Yemekler", question_type="multiple", options=["Çorba", "Pilav", "Tatlı"],
+            order=2, required=False
+        )
+        self.q_hygiene = Question.objects.create(survey=self.survey, text="Hijyen", question_type="star", order=3)
+        self.q_comment = Question.objects.create(
+            survey=self.survey, text="Yorum", question_type="text", order=4, required=False
+        )
+        self.url = f'/api/surveys/{self.survey.id}/crosstab/'
+
+        rows = [
+            ("Evet", "Çorba,Pilav", "5"),
+            ("Evet", "Pilav", "4"),
+            ("Hayır", "Tatlı", "2"),
+            ("Hayır", None, "2"),
+        ]
+        for i, (breakfast, dishes, hygiene) in enumerate(rows):
+            self.client.force_authenticate(user=User.objects.create_user(f'eater{i}', f'e{i}@e.com', 'Pass123'))
+            answers = [
+                {"question": self.q_breakfast.id, "value": breakfast},
+                {"question": self.q_hygiene.id, "value": hygiene},
+            ]
+            if dishes:
+                answers.append({"question": self.q_dishes.id, "value": dishes})
+            self.client.post('/api/responses/', {"survey": self.survey.id, "answers": answers}, format='json')
+        self.client.force_authenticate(user=self.admin)
+
+    def test_choice_by_rating(self):
+        response = self.client.get(self.url, {'row': self.q_breakfast.id, 'col': self.q_hygiene.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['row']['categories'], ["Evet", "Hayır"])
+        self.assertEqual(response.data['col']['categories'], ["1", "2", "3", "4", "5"])
+        self.assertEqual(response.data['matrix'], [[0, 0, 0, 1, 1], [0, 2, 0, 0, 0]])
+        self.assertEqual(response.data['row_totals'], [2, 2])
+
+    def test_multiple_counts_every_selected_option(self):
+        response = self.client.get(self.url, {'row': self.q_dishes.id, 'col': self.q_breakfast.id})
+        # The response without a dish answer is left out
+        self.assertEqual(response.data['matrix'], [[1, 0], [2, 0], [0, 1]])
+        self.assertEqual(response.data['col_totals'], [3, 1])
+
+    def test_single_query(self):
+        # Survey + prefetched questions, then the crosstab itself
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'row': self.q_dishes.id, 'col': self.q_hygiene.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_validation(self):
+        self.assertEqual(self.client.get(self.url, {'row': 'x', 'col': self.q_hygiene.id}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'row': self.q_comment.id, 'col': self.q_hygiene.id}).status_code, 400)
+        other = Question.objects.create(
+            survey=Survey.objects.create(title="Other"), text="Başka", question_type="star"
+        )
+        self.assertEqual(self.client.get(self.url, {'row': other.id, 'col': self.q_hygiene.id}).status_code, 400)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=User.objects.create_user('cross_student', 'cs@e.com', 'Pass123'))
+        response = self.client.get(self.url, {'row': self.q_breakfast.id, 'col': self.q_hygiene.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class AnswerSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_superuser('search_admin', 's@e.com', 'Pass123'))
+        self.survey = Survey.objects.create(title="Search Survey", is_active=True)
+        self.q_comment = Question.objects.create(survey=self.survey, text="Yorum", question_type="text", order=1)
+        self.q_other = Question.objects.create(survey=self.survey, text="Öneri", question_type="text", order=2)
+        self.url = f'/api/surveys/{self.survey.id}/search/'
+
+        comments = [
+            "Hijyen çok kötü, masalar kirli",
+            "Yemekler lezzetli",
+            "Hijyen iyi ama hijyen kontrolü artmalı",
+            "Porsiyonlar küçük",
+        ]
+        for text in comments:
+            r = Response.objects.create(survey=self.survey)
+            Answer.objects.create(response=r, question=self.q_comment, value=text)
+        r = Response.objects.create(survey=self.survey)
+        Answer.objects.create(response=r, question=self.q_other, value="Hijyen eğitimi verilmeli")
+
+    def test_ranked_matches(self):
+        response = self.client.get(self.url, {'q': 'hijyen', 'question': self.q_comment.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        # The answer mentioning it twice ranks first
+        self.assertEqual(response.data['results'][0]['value'], "Hijyen iyi ama hijyen kontrolü artmalı")
+
+        # Without a question filter every text question of the survey is searched
+        self.assertEqual(self.client.get(self.url, {'q': 'hijyen'}).data['count'], 3)
+
+    def test_all_words_must_match_and_pagination(self):
+        self.assertEqual(self.client.get(self.url, {'q': 'hijyen kirli'}).data['count'], 1)
+        page = self.client.get(self.url, {'q': 'hijyen', 'page': 2, 'page_size': 2}).data
+        self.assertEqual((page['count'], len(page['results'])), (3, 1))
+
+    def test_edits_and_deletes_are_indexed(self):
+        answer = Answer.objects.get(value="Porsiyonlar küçük")
+        answer.value = "Porsiyonlar küçük, hijyen de sorunlu"
+        answer.save()
+        self.assertEqual(self.client.get(self.url, {'q': 'hijyen'}).data['count'], 4)
+        answer.response.delete()
+        self.assertEqual(self.client.get(self.url, {'q': 'porsiyonlar'}).data['count'], 0)
+
+    def test_query_syntax_is_not_interpreted(self):
+        response = self.client.get(self.url, {'q': 'hijyen" OR *'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=User.objects.create_user('search_student', 'ss@e.com', 'Pass123'))
+        self.assertEqual(self.client.get(self.url, {'q': 'hijyen'}).status_code, status.HTTP_403_FORBIDDEN)
+
+class AnswerPageTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_superuser('page_admin', 'p@e.com', 'Pass123'))
+        self.survey = Survey.objects.create(title="Comments", is_active=True)
+        self.question = Question.objects.create(survey=self.survey, text="Yorum", question_type="text", order=1)
+        self.url = f'/api/questions/{self.question.id}/answers/'
+
+        now = timezone.now()
+        for i in range(7):
+            r = Response.objects.create(survey=self.survey)
+            Response.objects.filter(id=r.id).update(submitted_at=now - timedelta(days=6 - i))
+            Answer.objects.create(response=r, question=self.question, value=f"Yorum {i}")
+        Answer.objects.create(response=r, question=self.question, value="")  # Skipped
+
+    def _walk(self, **params):
+        values, cursor = [], None
+        while True:
+            page = self.client.get(self.url, {'page_size': 3, **params, **({'cursor': cursor} if cursor else {})}).data
+            values += [a['value'] for a in page['results']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                return values
+
+    def test_walks_every_answer_newest_first(self):
+        self.assertEqual(self._walk(), [f"Yorum {i}" for i in range(6, -1, -1)])
+
+    def test_date_range(self):
+        since = (timezone.now() - timedelta(days=2)).date().isoformat()
+        self.assertEqual(self._walk(since=since), ["Yorum 6", "Yorum 5", "Yorum 4"])
+
+    def test_deep_page_costs_the_same(self):
+        first = self.client.get(self.url, {'page_size': 2}).data
+        with self.assertNumQueries(2):  # Question + one keyset page
+            last = self.client.get(self.url, {'page_size': 2, 'cursor': first['next_cursor'] - 4}).data
+        self.assertTrue(last['results'])
+
+    def test_staff_only_and_text_questions(self):
+        star = Question.objects.create(survey=self.survey, text="Puan", question_type="star", order=2)
+        self.assertEqual(self.client.get(f'/api/questions/{star.id}/answers/').status_code, 400)
+        self.client.force_authenticate(user=User.objects.create_user('student', 's@e.com', 'Pass123'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+class TermIndexTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('terms_admin', 'te@e.com', 'Pass123')
+        self.survey = Survey.objects.create(title="Menu Survey", is_active=True)
+        self.question = Question.objects.create(
+            survey=self.survey, text="Menüde daha sık görmek istediğiniz yemekler?", question_type="text", order=1
+        )
+        self.url = f'/api/questions/{self.question.id}/terms/'
+        for i, text in enumerate(["İskender ve mercimek çorbası", "Mercimek çorbası çok güzel", "Izgara köfte"]):
+            self._submit(f'diner{i}', text)
+        self.client.force_authenticate(user=self.admin)
+
+    def _submit(self, username, text):
+        self.client.force_authenticate(user=User.objects.create_user(username, f'{username}@e.com', 'Pass123'))
+        return self.client.post('/api/responses/', {
+            "survey": self.survey.id, "answers": [{"question": self.question.id, "value": text}]
+        }, format='json')
+
+    def _counts(self):
+        return {t['term']: t['count'] for t in self.client.get(self.url).data['terms']}
+
+    def test_extract_terms(self):
+        from .terms import extract_terms
+        # Turkish lower case (İ -> i, I -> ı), stopwords and numbers dropped, adjacent phrases only
+        self.assertEqual(
+            extract_terms("İskender ve IZGARA 2 porsiyon"),
+            {"iskender", "ızgara", "porsiyon"}
+        )
+        self.assertIn("mercimek çorbası", extract_terms("Mercimek çorbası"))
+
+    def test_top_terms_with_trend(self):
+        terms = self.client.get(self.url, {'days': 3}).data['terms']
+        self.assertEqual(terms[0]['term'], "mercimek")
+        self.assertEqual(terms[0]['count'], 2)
+        self.assertEqual([d['count'] for d in terms[0]['trend']], [0, 0, 2])
+        counts = self._counts()
+        self.assertEqual(counts["mercimek çorbası"], 2)
+        self.assertNotIn("ve", counts)
+
+    def test_edit_and_delete_update_counts(self):
+        response = Response.objects.get(answers__value="Izgara köfte")
+        answer = response.answers.get()
+        self.client.force_authenticate(user=self.admin)
+        self.client.put(f'/api/responses/{response.id}/', {
+            "survey": self.survey.id, "answers": [{"question": self.question.id, "value": "Izgara tavuk"}]
+        }, format='json')
+        counts = self._counts()
+        self.assertEqual((counts["ızgara"], counts["tavuk"]), (1, 1))
+        self.assertNotIn("köfte", counts)
+
+        self.client.delete(f'/api/responses/{answer.response_id}/')
+        self.assertNotIn("ızgara", self._counts())
+
+    def test_rebuild_matches_incremental(self):
+        from .models import QuestionTerm
+        from .rollups import rebuild_survey_stats
+        before = set(QuestionTerm.objects.values_list('term', 'count'))
+        rebuild_survey_stats(self.survey)
+        self.assertEqual(set(QuestionTerm.objects.values_list('term', 'count')), before)
+
+class SegmentedResultsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('segment_admin', 'sg@e.com', 'Pass123')
+        self.survey = Survey.objects.create(title="Segment Survey", is_active=True)
+        self.q_breakfast = Question.objects.create(
+            survey=self.survey, text="Kahvaltı", question_type="choice", options=["Evet", "Hayır"], order=1
+        )
+        self.q_hygiene = Question.objects.create(survey=self.survey, text="Hijyen", question_type="star", order=2)
+        self.q_comment = Question.objects.create(
+            survey=self.survey, text="Yorum", question_type="text", order=3, page_number=2, required=False
+        )
+        self.url = f'/api/surveys/{self.survey.id}/results/'
+
+        self.students = []
+        rows = [("Evet", "5", "Harika"), ("Evet", "4", None), ("Hayır", "1", "Kirli")]
+        for i, (breakfast, hygiene, comment) in enumerate(rows):
+            student = User.objects.create_user(f'seg{i}', f'seg{i}@e.com', 'Pass123')
+            self.students.append(student)
+            self._submit(student, breakfast, hygiene, comment)
+        self.staff = User.objects.create_user('cook', 'cook@e.com', 'Pass123', is_staff=True)
+        self._submit(self.staff, "Hayır", "3", None)
+        self.client.force_authenticate(user=self.admin)
+
+    def _submit(self, user, breakfast, hygiene, comment):
+        answers = [
+            {"question": self.q_breakfast.id, "value": breakfast},
+            {"question": self.q_hygiene.id, "value": hygiene},
+        ]
+        if comment:
+            answers.append({"question": self.q_comment.id, "value": comment})
+        self.client.force_authenticate(user=user)
+        self.client.post('/api/responses/', {"survey": self.survey.id, "answers": answers}, format='json')
+
+    def _results(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {q['text']: q for q in response.data}
+
+    def test_answered_filter(self):
+        results = self._results(answered=f'{self.q_breakfast.id}:Evet')
+        self.assertEqual(results["Hijyen"]['total'], 2)
+        self.assertEqual(results["Hijyen"]['results']['average'], 4.5)
+        self.assertEqual(results["Kahvaltı"]['results'], {"Evet": 2, "Hayır": 0})
+        self.assertEqual(results["Yorum"]['results'], ["Harika"])
+
+    def test_group_user_and_completion_filters(self):
+        self.assertEqual(self._results(group='staff')["Hijyen"]['results']['average'], 3.0)
+        self.assertEqual(self._results(group='students')["Hijyen"]['total'], 3)
+        self.assertEqual(self._results(user=self.students[2].id)["Hijyen"]['results']['average'], 1.0)
+        # Reached the last page (answered the comment question)
+        self.assertEqual(self._results(complete='true')["Hijyen"]['total'], 2)
+        self.assertEqual(self._results(complete='false')["Hijyen"]['total'], 2)
+
+    def test_date_filter_and_unfiltered_results_unchanged(self):
+        tomorrow = (timezone.now() + timedelta(days=1)).date().isoformat()
+        self.assertEqual(self._results(since=tomorrow)["Hijyen"]['total'], 0)
+        self.assertEqual(self._results()["Hijyen"]['total'], 4)
+
+    def test_filters_are_cached_separately_and_staff_only(self):
+        filtered = self.client.get(self.url, {'group': 'staff'})
+        unfiltered = self.client.get(self.url)
+        self.assertNotEqual(filtered['ETag'], unfiltered['ETag'])
+        again = self.client.get(self.url, {'group': 'staff'}, HTTP_IF_NONE_MATCH=filtered['ETag'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.assertEqual(self.client.get(self.url, {'group': 'teachers'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'answered': f'{self.q_breakfast.id}:Belki'}).status_code, 400)
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.get(self.url, {'group': 'staff'}).status_code, 403)
+
+    def test_filtered_queries_use_indexes(self):
+        """Benchmark guard: the segment is resolved through indexes, never a full table scan."""
+        from django.db import connection
+        from .results import filter_responses, _answers
+
+        since = timezone.now() - timedelta(days=7)
+        responses = filter_responses(self.survey, since=since)
+        answers = _answers([self.q_hygiene.id], responses).values('question_id').annotate(n=Count('id'))
+        sql, params = answers.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        self.assertTrue(any('response_survey_submitted' in step for step in plan), plan)
+        self.assertTrue(any('answer_question_response' in step for step in plan), plan)
+        self.assertFalse([step for step in plan if step.startswith('SCAN api_')], plan)
+
+class SurveyComparisonTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_superuser('cmp_admin', 'cmp@e.com', 'Pass123'))
+        self.surveys = []
+        for month, ratings in enumerate([["3", "5"], ["4"], ["2", "2"]]):
+            survey = Survey.objects.create(title=f"Ay {month + 1}", series="aylik")
+            rating = Question.objects.create(survey=survey, text="Lezzet", question_type="star", order=1)
+            portion = Question.objects.create(
+                survey=survey, text="Porsiyon", question_type="choice", options=["Az", "Yeterli"], order=2
+            )
+            if month == 1:
+                Question.objects.create(survey=survey, text="Yeni Menü", question_type="scale", order=3, required=False)
+            for i, value in enumerate(ratings):
+                self.client.force_authenticate(user=User.objects.create_user(f'm{month}u{i}', f'm{month}u{i}@e.com', 'Pass123'))
+                self.client.post('/api/responses/', {"survey": survey.id, "answers": [
+                    {"question": rating.id, "value": value},
+                    {"question": portion.id, "value": "Az"},
+                ]}, format='json')
+            self.surveys.append(survey)
+        Survey.objects.create(title="Başka", series="etkinlik")
+        self.client.force_authenticate(user=User.objects.get(username='cmp_admin'))
+
+    def test_series_aligned_by_question(self):
+        response = self.client.get('/api/surveys/compare/', {'series': 'aylik'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s['title'] for s in response.data['surveys']], ["Ay 1", "Ay 2", "Ay 3"])
+
+        questions = {q['text']: q for q in response.data['questions']}
+        self.assertEqual([m['average'] for m in questions["Lezzet"]['metrics']], [4.0, 4.0, 2.0])
+        self.assertEqual([m['results']['Az'] for m in questions["Porsiyon"]['metrics']], [2, 1, 2])
+        # Only asked in the second month
+        self.assertEqual([m is None for m in questions["Yeni Menü"]['metrics']], [True, False, True])
+
+    def _extra_surveys(self, n, series="buyuk"):
+        surveys = []
+        for i in range(n):
+            survey = Survey.objects.create(title=f"Ek {i}", series=series)
+            Question.objects.create(survey=survey, text="Lezzet", question_type="star", order=1)
+            Question.objects.create(survey=survey, text="Porsiyon", question_type="choice", options=["Az", "Yeterli"], order=2)
+            surveys.append(survey)
+        return surveys
+
+    def test_query_count_does_not_grow_with_surveys(self):
+        twelve = self.surveys + self._extra_surveys(9)
+        for surveys in (self.surveys, twelve):
+            ids = ','.join(str(s.id) for s in surveys)
+            # Surveys, prefetched questions, rollups
+            with self.assertNumQueries(3):
+                response = self.client.get('/api/surveys/compare/', {'ids': ids})
+            self.assertEqual(len(response.data['surveys']), len(surveys))
+        self.assertEqual(self.client.get('/api/surveys/compare/').status_code, 400)
+
+    def test_too_many_surveys(self):
+        surveys = self._extra_surveys(25)
+        ids = ','.join(str(s.id) for s in surveys)
+        self.assertEqual(self.client.get('/api/surveys/compare/', {'ids': ids}).status_code, 400)
+
+        # A long series is cut, and the response says so
+        response = self.client.get('/api/surveys/compare/', {'series': 'buyuk'})
+        self.assertEqual((len(response.data['surveys']), response.data['truncated']), (24, True))
+        self.assertFalse(self.client.get('/api/surveys/compare/', {'series': 'aylik'}).data['truncated'])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('export_admin', 'ex@e.com', 'Pass123')
+        self.survey = Survey.objects.create(title="Export Survey", is_active=True)
+        self.q_taste = Question.objects.create(survey=self.survey, text="Lezzet", question_type="star", order=1)
+        self.q_sides = Question.objects.create(
+            survey=self.survey, text="Yan ürün", question_type="multiple", options=["Ayran", "Salata", "Tatlı"], order=2
+        )
+        self.q_comment = Question.objects.create(
+            survey=self.survey, text="Yorum", question_type="text", order=3, required=False
+        )
+        self.url = f'/api/surveys/{self.survey.id}/export/'
+
+        self.students = [User.objects.create_user(f'ex{i}', f'ex{i}@e.com', 'Pass123') for i in range(3)]
+        self._submit(self.students[0], "5", "Tatlı,Ayran", "Güzel, sıcak")
+        self._submit(self.students[1], "3", "Salata", None)
+        self.old = self._submit(self.students[2], "1", "Ayran", "Soğuk")
+        Response.objects.filter(id=self.old).update(submitted_at=timezone.now() - timedelta(days=10))
+        self.client.force_authenticate(user=self.admin)
+
+    def _submit(self, user, taste, sides, comment):
+        answers = [
+            {"question": self.q_taste.id, "value": taste},
+            {"question": self.q_sides.id, "value": sides},
+        ]
+        if comment:
+            answers.append({"question": self.q_comment.id, "value": comment})
+        self.client.force_authenticate(user=user)
+        response = self.client.post('/api/responses/', {"survey": self.survey.id, "answers": answers}, format='json')
+        return response.data['id']
+
+    def _content(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_one_row_per_response(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn(f'anket-{self.survey.id}.csv', response['Content-Disposition'])
+
+        content = self._content(response)
+        self.assertTrue(content.startswith('\ufeff'))
+        rows = list(csv.reader(io.StringIO(content[1:])))
+        self.assertEqual(rows[0], ['response_id', 'submitted_at', 'user_id', "Lezzet", "Yan ürün", "Yorum"])
+        self.assertEqual(len(rows), 4)
+        by_user = {row[2]: row for row in rows[1:]}
+        # Labels in option order, a comma inside a value stays in its column
+        self.assertEqual(by_user[str(self.students[0].id)][3:], ["5", "Ayran, Tatlı", "Güzel, sıcak"])
+        self.assertEqual(by_user[str(self.students[1].id)][3:], ["3", "Salata", ""])
+
+    def test_csv_formulas_are_escaped(self):
+        Question.objects.filter(id=self.q_comment.id).update(text="=Yorum")
+        student = User.objects.create_user('ex_attacker', 'exa@e.com', 'Pass123')
+        self._submit(student, "2", "Salata", '=HYPERLINK("http://evil.example","tıkla")')
+        self.client.force_authenticate(user=self.admin)
+
+        rows = list(csv.reader(io.StringIO(self._content(self.client.get(self.url, {'format': 'csv'}))[1:])))
+        self.assertEqual(rows[0][-1], "'=Yorum")
+        by_user = {row[2]: row for row in rows[1:]}
+        self.assertEqual(by_user[str(student.id)][-1], '\'=HYPERLINK("http://evil.example","tıkla")')
+        # Ordinary answers are left as they are
+        self.assertEqual(by_user[str(self.students[0].id)][-1], "Güzel, sıcak")
+
+    def test_ndjson_and_filters(self):
+        response = self.client.get(self.url, {'format': 'ndjson', 'since': (timezone.now() - timedelta(days=1)).isoformat()})
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        lines = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(len(lines), 2)
+        self.assertNotIn(self.old, [line['response_id'] for line in lines])
+        first = min(lines, key=lambda line: line['response_id'])
+        self.assertEqual(first['answers'], {
+            str(self.q_taste.id): "5", str(self.q_sides.id): "Ayran, Tatlı", str(self.q_comment.id): "Güzel, sıcak",
+        })
+
+        self.assertEqual(self.client.get(self.url, {'format': 'ndjson', 'group': 'cooks'}).status_code, 400)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.get(self.url, {'format': 'csv'}).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_merge_across_chunks(self):
+        questions = list(self.survey.questions.all())
+        # One row per round trip: the three streams still line up by response
+        rows = list(export_rows(self.survey, questions, chunk_size=1))
+        self.assertEqual([row[0] for row in rows], sorted(Response.objects.values_list('id', flat=True)))
+        self.assertEqual(rows[-1][3], {self.q_taste.id: "1", self.q_sides.id: "Ayran", self.q_comment.id: "Soğuk"})
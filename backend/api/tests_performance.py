@@ -1,8 +1,13 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Survey, Question, Response, Answer
+from .models import Survey, Question, Response, Answer, QuestionStats
+from .rollups import rebuild_survey_stats, diff_survey_stats
+from .permissions import KIOSK_GROUP
 
 User = get_user_model()
 
@@ -62,10 +67,12 @@ class PerformanceOptimizationTests(TestCase):
         # Manually create answer (or via serializer)
         Answer.objects.create(response=resp_obj, question=self.q_star, value="2", numeric_value=2.0)
         
-        # Update via API
+        # Update via API (PUT sends the whole form, required questions included)
         payload = {
             "answers": [
-                {"question": self.q_star.id, "value": "5"} # Change 2 -> 5
+                {"question": self.q_star.id, "value": "5"}, # Change 2 -> 5
+                {"question": self.q_scale.id, "value": "7"},
+                {"question": self.q_text.id, "value": "Güzel"},
             ]
         }
         
@@ -91,6 +98,9 @@ class PerformanceOptimizationTests(TestCase):
         r3 = Response.objects.create(survey=self.survey, user=u3)
         Answer.objects.create(response=r3, question=self.q_star, value="5", numeric_value=5.0)
 
+        # Answers were written directly with the ORM, rebuild the rollups
+        rebuild_survey_stats(self.survey)
+
         # Get Results (Admin Only usually, or staff)
         # Login as admin
         self.client.force_authenticate(user=self.admin)
@@ -109,3 +119,552 @@ class PerformanceOptimizationTests(TestCase):
         self.assertEqual(star_res['results']['distribution']['4'], 1)
         self.assertEqual(star_res['results']['distribution']['5'], 1)
         self.assertEqual(star_res['results']['distribution']['1'], 0)
+
+
+class RollupTests(TestCase):
+    """QuestionStats must always match the raw Answer table."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('rollup_user', 'r@e.com', 'Pass123')
+        self.admin = User.objects.create_superuser('rollup_admin', 'ra@e.com', 'Pass123')
+        self.client.force_authenticate(user=self.user)
+
+        self.survey = Survey.objects.create(title="Rollup Survey", is_active=True)
+        self.q_star = Question.objects.create(survey=self.survey, text="Star", question_type="star", order=1)
+        self.q_multi = Question.objects.create(
+            survey=self.survey, text="Meals", question_type="multiple",
+            options=["Kahvaltı", "Öğle Yemeği", "Akşam Yemeği"], order=2
+        )
+        self.q_text = Question.objects.create(survey=self.survey, text="Text", question_type="text", order=3)
+
+    def _submit(self, star, meals, text="Güzel", user=None):
+        payload = {
+            "survey": self.survey.id,
+            "answers": [
+                {"question": self.q_star.id, "value": star},
+                {"question": self.q_multi.id, "value": meals},
+                {"question": self.q_text.id, "value": text},
+            ]
+        }
+        # One response per user and survey
+        self.client.force_authenticate(user=user or User.objects.create_user(
+            f'rollup_user{User.objects.count()}', 'r@e.com', 'Pass123'
+        ))
+        response = self.client.post('/api/responses/', payload, format='json')
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_create_updates_rollups(self):
+        self._submit("4", "Kahvaltı, Öğle Yemeği")
+        self._submit("2", "Öğle Yemeği")
+
+        star = QuestionStats.objects.get(question=self.q_star)
+        self.assertEqual(star.answer_count, 2)
+        self.assertEqual(star.average, 3.0)
+        self.assertEqual(star.numeric_sum_sq, 20.0)
+        self.assertEqual(star.histogram, {"4": 1, "2": 1})
+
+        multi = QuestionStats.objects.get(question=self.q_multi)
+        # Keyed by option index
+        self.assertEqual(multi.choice_counts, {"0": 1, "1": 2})
+        self.assertEqual(multi.respondent_count, 2)
+        self.assertEqual(diff_survey_stats(self.survey), [])
+
+    def test_update_and_delete_keep_rollups_consistent(self):
+        response_id = self._submit("4", "Kahvaltı", user=self.user)
+        self._submit("5", "Akşam Yemeği")
+
+        payload = {
+            "survey": self.survey.id,
+            "answers": [
+                {"question": self.q_star.id, "value": "1"},
+                {"question": self.q_multi.id, "value": "Öğle Yemeği, Akşam Yemeği"},
+            ]
+        }
+        resp = self.client.patch(f'/api/responses/{response_id}/', payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(diff_survey_stats(self.survey), [])
+        self.assertEqual(QuestionStats.objects.get(question=self.q_text).answer_count, 1)
+
+        resp = self.client.delete(f'/api/responses/{response_id}/')
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(diff_survey_stats(self.survey), [])
+        self.assertEqual(QuestionStats.objects.get(question=self.q_multi).choice_counts, {"2": 1})
+
+    def test_rebuild_and_check_commands(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        self._submit("3", "Kahvaltı")
+        # Simulate drift: a row written behind the rollups' back
+        r = Response.objects.create(survey=self.survey, user=self.admin)
+        Answer.objects.create(response=r, question=self.q_star, value="5", numeric_value=5.0)
+
+        with self.assertRaises(CommandError):
+            call_command('check_question_stats', stdout=StringIO())
+
+        call_command('rebuild_question_stats', '--chunk-size', '1', stdout=StringIO())
+        call_command('check_question_stats', stdout=StringIO())
+        self.assertEqual(QuestionStats.objects.get(question=self.q_star).histogram, {"3": 1, "5": 1})
+
+
+class ResponseUpdateTests(TestCase):
+    """Editing a response is a diff written with bulk statements."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('edit_user', 'e@e.com', 'Pass123')
+        self.client.force_authenticate(user=self.user)
+        self.survey = Survey.objects.create(title="Edit Survey", is_active=True)
+
+    def _questions(self, n):
+        types = ["star", "choice", "text"]
+        return [
+            Question.objects.create(
+                survey=self.survey, text=f"Soru {i}", question_type=types[i % 3], order=i, required=False,
+                options=["Az", "Yeterli"] if types[i % 3] == "choice" else [],
+            )
+            for i in range(n)
+        ]
+
+    def _value(self, question, edited):
+        if question.question_type == "star":
+            return "5" if edited else "2"
+        if question.question_type == "choice":
+            return "Yeterli" if edited else "Az"
+        return "Çok güzel" if edited else "Soğuk"
+
+    def _edit(self, n):
+        """Answers the first 2/3 of n questions, then edits half, drops some and adds the rest."""
+        self.survey = Survey.objects.create(title=f"Edit Survey {n}", is_active=True)
+        questions = self._questions(n)
+        kept = questions[:n * 2 // 3]
+        created = self.client.post('/api/responses/', {"survey": self.survey.id, "answers": [
+            {"question": q.id, "value": self._value(q, False)} for q in kept
+        ]}, format='json')
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        ids = dict(Answer.objects.filter(response_id=created.data['id']).values_list('question_id', 'id'))
+
+        answers = [{"question": q.id, "value": self._value(q, i % 2 == 0)} for i, q in enumerate(kept[1:])]
+        answers += [{"question": q.id, "value": self._value(q, True)} for q in questions[len(kept):]]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(f'/api/responses/{created.data["id"]}/', {"answers": answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        stored = dict(Answer.objects.filter(response_id=created.data['id']).values_list('question_id', 'id'))
+        self.assertNotIn(kept[0].id, stored)
+        self.assertTrue(all(stored[q.id] == ids[q.id] for q in kept[1:]))  # Edited in place
+        self.assertEqual(len(stored), n - 1)
+        self.assertEqual(diff_survey_stats(self.survey), [])
+        return len(ctx.captured_queries)
+
+    def test_fixed_number_of_statements(self):
+        small = self._edit(12)
+        self.assertEqual(small, self._edit(60))
+
+    def test_survey_cannot_be_changed(self):
+        self._questions(1)
+        other = Survey.objects.create(title="Other", is_active=True)
+        created = self.client.post('/api/responses/', {"survey": self.survey.id, "answers": [
+            {"question": self.survey.questions.get().id, "value": "3"}
+        ]}, format='json')
+        response = self.client.patch(
+            f'/api/responses/{created.data["id"]}/', {"survey": other.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Response.objects.get(id=created.data['id']).survey, self.survey)
+
+class ResultsCacheTests(TestCase):
+    """The results action is cached per results version and answers 304 when unchanged."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('cache_admin', 'c@e.com', 'Pass123')
+        self.client.force_authenticate(user=self.admin)
+
+        self.survey = Survey.objects.create(title="Cache Survey", is_active=True)
+        self.q_star = Question.objects.create(survey=self.survey, text="Star", question_type="star", order=1)
+        self.url = f'/api/surveys/{self.survey.id}/results/'
+
+    def _submit(self, value):
+        payload = {"survey": self.survey.id, "answers": [{"question": self.q_star.id, "value": value}]}
+        # One response per user and survey
+        self.client.force_authenticate(user=User.objects.create_user(f'cache_user{value}', 'cu@e.com', 'Pass123'))
+        response = self.client.post('/api/responses/', payload, format='json')
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_etag_and_not_modified(self):
+        self._submit("4")
+        first = self.client.get(self.url)
+        etag = first['ETag']
+        self.assertTrue(etag)
+
+        # Unchanged: only the survey row is read
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # A new submission bumps the version -> new ETag and fresh data
+        self._submit("2")
+        third = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(third['ETag'], etag)
+        self.assertEqual(third.data[0]['total'], 2)
+        self.assertEqual(third.data[0]['results']['average'], 3.0)
+
+    def test_question_change_invalidates(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.post('/api/questions/', {
+            "survey": self.survey.id, "text": "Yorum", "question_type": "text", "order": 2
+        }, format='json')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_hit_miss_counters_with_file_cache(self):
+        import tempfile
+        from django.core.cache import cache
+        from django.test import override_settings
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            file_cache = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cache_dir,
+            }}
+            with override_settings(CACHES=file_cache):
+                cache.clear()
+                self.client.get(self.url)
+                with self.assertNumQueries(1):
+                    cached = self.client.get(self.url)
+                self.assertEqual(cached.status_code, status.HTTP_200_OK)
+
+                counters = self.client.get('/api/surveys/cache_stats/').data
+                self.assertEqual(counters['misses'], 1)
+                self.assertEqual(counters['hits'], 1)
+
+    def test_counters_are_staff_only(self):
+        student = User.objects.create_user('cache_student', 's@e.com', 'Pass123')
+        self.client.force_authenticate(user=student)
+        response = self.client.get('/api/surveys/cache_stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class SurveyDefinitionCacheTests(TestCase):
+    """Survey list/detail are stitched from cached JSON definitions."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('def_admin', 'da@e.com', 'Pass123')
+        self.user = User.objects.create_user('def_user', 'du@e.com', 'Pass123')
+        self.client.force_authenticate(user=self.user)
+        self.surveys = [Survey.objects.create(title=f"Menü {i}", is_active=True) for i in range(3)]
+        for survey in self.surveys:
+            for order in (2, 1):
+                Question.objects.create(survey=survey, text=f"Soru {order}", question_type="star", order=order)
+
+    def test_cached_list_reads_one_table(self):
+        url = '/api/surveys/?expand=questions'
+        first = self.client.get(url).json()['results']
+        self.assertEqual([q['order'] for q in first[0]['questions']], [1, 2])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).json()['results'], first)
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if 'api_question' in q['sql']], [])
+
+        detail = self.client.get(f'/api/surveys/{self.surveys[0].id}/')
+        self.assertEqual(detail.json(), next(s for s in first if s['id'] == self.surveys[0].id))
+
+    def test_edits_refresh_the_definition(self):
+        survey = self.surveys[0]
+        self.client.get(f'/api/surveys/{survey.id}/')
+        self.client.force_authenticate(user=self.admin)
+        self.client.post('/api/questions/', {
+            "survey": survey.id, "text": "Yeni", "question_type": "text", "order": 3
+        }, format='json')
+        self.client.patch(f'/api/surveys/{survey.id}/', {"title": "Yeni Menü"}, format='json')
+
+        data = self.client.get(f'/api/surveys/{survey.id}/').json()
+        self.assertEqual((data['title'], len(data['questions'])), ("Yeni Menü", 3))
+
+    def test_slim_list(self):
+        Question.objects.create(survey=self.surveys[0], text="Yorum", question_type="text", order=3, page_number=2)
+        with CaptureQueriesContext(connection) as ctx:
+            data = {s['id']: s for s in self.client.get('/api/surveys/').data['results']}
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if 'FROM "api_question"' in q['sql']], [])
+        self.assertNotIn('questions', data[self.surveys[0].id])
+        self.assertEqual((data[self.surveys[0].id]['question_count'], data[self.surveys[0].id]['page_count']), (3, 2))
+        self.assertEqual((data[self.surveys[1].id]['question_count'], data[self.surveys[1].id]['page_count']), (2, 1))
+
+        sparse = self.client.get('/api/surveys/?fields=id,title').data['results']
+        self.assertEqual(set(sparse[0]), {'id', 'title'})
+        expanded = self.client.get('/api/surveys/?fields=id,question_count&expand=questions').data['results']
+        self.assertEqual(set(expanded[0]), {'id', 'question_count', 'questions'})
+
+class CursorPaginationTests(TestCase):
+    """Survey, response and user lists are served one cursor page at a time."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('page_admin', 'pa@e.com', 'Pass123')
+        self.client.force_authenticate(user=self.admin)
+        self.surveys = [Survey.objects.create(title=f"Anket {i}", is_active=True) for i in range(5)]
+        for i in range(7):
+            Response.objects.create(
+                survey=self.surveys[0], user=User.objects.create_user(f'page_user{i}', 'pu@e.com', 'Pass123')
+            )
+
+    def _walk(self, url):
+        ids, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            ids += [item['id'] for item in data['results']]
+            url, pages = data['next'], pages + 1
+        return ids, pages
+
+    def test_pages_cover_every_row_once(self):
+        for url, expected in (
+            ('/api/responses/?page_size=3', Response.objects.count()),
+            ('/api/users/?page_size=3', User.objects.count()),
+            ('/api/surveys/?page_size=2', 5),
+            ('/api/surveys/?page_size=2&expand=questions', 5),
+        ):
+            ids, pages = self._walk(url)
+            self.assertEqual(len(ids), expected, url)
+            self.assertEqual(ids, sorted(set(ids), reverse=True), url)  # Newest first, no duplicates
+            self.assertEqual(pages, -(-expected // int(url.split('page_size=')[1].split('&')[0])), url)
+
+    def test_page_size_and_count(self):
+        data = self.client.get('/api/responses/?page_size=1000&count=true').data
+        self.assertEqual((len(data['results']), data['count']), (7, 7))
+        self.assertNotIn('count', self.client.get('/api/users/').data)
+        self.assertEqual(self.client.get('/api/surveys/?expand=questions&count=true').json()['count'], 5)
+
+class ResponseListingTests(TestCase):
+    """Response lists load a fixed number of queries, whatever the number of rows."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('list_admin', 'la@e.com', 'Pass123')
+        self.student = User.objects.create_user('list_student', 'ls@e.com', 'Pass123')
+        self.survey_count = 0
+
+    def _add_responses(self, n, user=None):
+        for _ in range(n):
+            self.survey_count += 1
+            survey = Survey.objects.create(title=f"Anket {self.survey_count}", is_active=True)
+            q_star = Question.objects.create(survey=survey, text="Lezzet", question_type="star", order=1)
+            q_multi = Question.objects.create(
+                survey=survey, text="Öğün", question_type="multiple", options=["Öğle", "Akşam"], order=2
+            )
+            self.client.force_authenticate(user=user or User.objects.create_user(
+                f'list_user{self.survey_count}', 'lu@e.com', 'Pass123'
+            ))
+            response = self.client.post('/api/responses/', {"survey": survey.id, "answers": [
+                {"question": q_star.id, "value": "4"}, {"question": q_multi.id, "value": "Öğle, Akşam"},
+            ]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_staff_listing(self):
+        for n in (2, 5):
+            self._add_responses(n)
+            self.client.force_authenticate(user=self.admin)
+            # Page, answers with their questions, choices
+            with self.assertNumQueries(3):
+                data = self.client.get('/api/responses/').data['results']
+            self.assertEqual(len(data), Response.objects.count())
+        self.assertEqual(data[0]['answers'][1]['value'], "Öğle, Akşam")
+        self.assertTrue(data[0]['survey_title'].startswith("Anket"))
+
+    def test_student_listing_and_summary(self):
+        for n in (1, 4):
+            self._add_responses(n, user=self.student)
+            self.client.force_authenticate(user=self.student)
+            with self.assertNumQueries(3):
+                self.assertEqual(len(self.client.get('/api/responses/').data['results']), self.survey_count)
+            with self.assertNumQueries(1):
+                mine = self.client.get('/api/responses/mine/').data['results']
+        self._add_responses(1)  # Someone else's
+        self.client.force_authenticate(user=self.student)
+        mine = self.client.get('/api/responses/mine/').data['results']
+        self.assertEqual(len(mine), 5)
+        self.assertEqual((mine[0]['survey_title'], mine[0]['answer_count']), ("Anket 5", 2))
+        self.assertNotIn('answers', mine[0])
+
+class BatchSubmissionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # A tablet account: kiosk group, no staff rights
+        self.kiosk = User.objects.create_user('kiosk', 'k@e.com', 'Pass123')
+        self.kiosk.groups.add(Group.objects.get_or_create(name=KIOSK_GROUP)[0])
+        self.client.force_authenticate(user=self.kiosk)
+        self.survey = Survey.objects.create(title="Kiosk Survey", is_active=True)
+        self.q_star = Question.objects.create(survey=self.survey, text="Lezzet", question_type="star", order=1)
+        self.q_choice = Question.objects.create(
+            survey=self.survey, text="Porsiyon", question_type="choice", options=["Az", "Yeterli"], order=2
+        )
+        self.url = '/api/responses/batch/'
+
+    def _items(self, n):
+        return [
+            {"survey": self.survey.id, "client_id": f"tablet-{i}", "answers": [
+                {"question": self.q_star.id, "value": str(i % 5 + 1)},
+                {"question": self.q_choice.id, "value": "Az"},
+            ]}
+            for i in range(n)
+        ]
+
+    def _post(self, items):
+        return self.client.post(self.url, {"responses": items}, format='json')
+
+    def test_stores_valid_items_and_reports_invalid_ones(self):
+        items = self._items(2) + [
+            {"survey": self.survey.id, "answers": [{"question": self.q_choice.id, "value": "Çok"}]},
+            {"survey": 999999, "answers": [{"question": self.q_star.id, "value": "3"}]},
+        ]
+        response = self._post(items)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['created'], response.data['invalid']), (2, 2))
+        self.assertEqual(response.data['results'][0]['client_id'], "tablet-0")
+        self.assertIn('answers', response.data['results'][2]['errors'])
+        self.assertIn('survey', response.data['results'][3]['errors'])
+
+        self.assertEqual(Response.objects.filter(survey=self.survey, user__isnull=True).count(), 2)
+        self.assertEqual(QuestionStats.objects.get(question=self.q_choice).choice_counts, {"0": 2})
+        self.assertEqual(diff_survey_stats(self.survey), [])
+
+    def test_offline_submission_time_is_kept(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        collected = timezone.now() - timedelta(hours=3)
+        item = self._items(1)[0]
+        item['submitted_at'] = collected.isoformat()
+        result = self._post([item]).data['results'][0]
+        self.assertEqual(Response.objects.get(id=result['id']).submitted_at, collected)
+
+    def test_fixed_number_of_queries(self):
+        self._post(self._items(1))  # Definition cached
+        with CaptureQueriesContext(connection) as small:
+            self._post(self._items(3))
+        with CaptureQueriesContext(connection) as large:
+            self._post(self._items(60))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Response.objects.count(), 64)
+
+    def test_question_edit_refreshes_cached_definition(self):
+        self._post(self._items(1))
+        self.client.patch(f'/api/questions/{self.q_choice.id}/', {"options": ["Az", "Yeterli", "Çok"]}, format='json')
+        item = {"survey": self.survey.id, "answers": [
+            {"question": self.q_star.id, "value": "3"},
+            {"question": self.q_choice.id, "value": "Çok"},
+        ]}
+        self.assertEqual(self._post([item]).data['created'], 1)
+
+    def test_kiosk_group_only(self):
+        # The tablet token cannot read the answers
+        self.assertEqual(self.client.get(f'/api/surveys/{self.survey.id}/export/').status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=User.objects.create_user('student', 's@e.com', 'Pass123'))
+        self.assertEqual(self._post(self._items(1)).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=User.objects.create_user('cook', 'c@e.com', 'Pass123', is_staff=True))
+        self.assertEqual(self._post(self._items(1)).status_code, status.HTTP_200_OK)
+
+    def test_boolean_ids_are_rejected(self):
+        # true == 1 in Python: survey 1 / question 1 must not be matched by a boolean
+        Survey.objects.all().delete()
+        survey = Survey.objects.create(id=1, title="Bir", is_active=True)
+        Question.objects.create(id=1, survey=survey, text="Puan", question_type="star", order=1)
+        response = self._post([
+            {"survey": True, "answers": [{"question": 1, "value": "3"}]},
+            {"survey": 1, "answers": [{"question": True, "value": "3"}]},
+            {"survey": 1, "answers": [{"question": 1, "value": "3"}]},
+        ])
+        self.assertEqual([r['status'] for r in response.data['results']], ['invalid', 'invalid', 'created'])
+        self.assertEqual(Response.objects.count(), 1)
+
+    def test_replayed_sync_is_not_stored_twice(self):
+        items = self._items(3)
+        first = self.client.post(self.url, {"responses": items}, format='json', HTTP_IDEMPOTENCY_KEY='sync-1')
+        # The connection dropped before the kiosk saw the answer: it sends the same batch again
+        replay = self.client.post(self.url, {"responses": items}, format='json', HTTP_IDEMPOTENCY_KEY='sync-1')
+        self.assertEqual(replay.status_code, status.HTTP_200_OK)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.data['results'], first.data['results'])
+        self.assertEqual(Response.objects.count(), 3)
+
+        self.client.post(self.url, {"responses": items}, format='json', HTTP_IDEMPOTENCY_KEY='sync-2')
+        self.assertEqual(Response.objects.count(), 6)
+
+@override_settings(SUBMISSION_WRITE_BEHIND=True)
+class WriteBehindTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('wb_admin', 'wb@e.com', 'Pass123')
+        self.survey = Survey.objects.create(title="Lunch Rush", is_active=True)
+        self.q_star = Question.objects.create(survey=self.survey, text="Lezzet", question_type="star", order=1)
+        self.q_choice = Question.objects.create(
+            survey=self.survey, text="Porsiyon", question_type="choice", options=["Az", "Yeterli"], order=2
+        )
+
+    def _submit(self, username, value="4"):
+        user = User.objects.create_user(username, f'{username}@e.com', 'Pass123')
+        self.client.force_authenticate(user=user)
+        return self.client.post('/api/responses/', {"survey": self.survey.id, "answers": [
+            {"question": self.q_star.id, "value": value},
+            {"question": self.q_choice.id, "value": "Yeterli"},
+        ]}, format='json')
+
+    def test_submission_is_acknowledged_then_flushed(self):
+        from .models import PendingSubmission
+        from .submission_queue import flush_pending_submissions
+        response = self._submit('rush1')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(Response.objects.count(), 0)
+        # Already hidden from the user's survey list
+        self.assertEqual(self.client.get('/api/surveys/').json()['results'], [])
+
+        received_at = PendingSubmission.objects.get().received_at
+        self.assertEqual(flush_pending_submissions(), 1)
+        stored = Response.objects.get()
+        self.assertEqual((stored.user.username, stored.submitted_at), ('rush1', received_at))
+        self.assertFalse(PendingSubmission.objects.exists())
+        self.assertEqual(QuestionStats.objects.get(question=self.q_choice).choice_counts, {"1": 1})
+        self.assertEqual(diff_survey_stats(self.survey), [])
+
+        self.client.force_authenticate(user=self.admin)
+        stats = self.client.get('/api/responses/queue_stats/').data
+        self.assertEqual((stats['depth'], stats['last_flush']['count']), (0, 1))
+
+    def test_no_submission_lost_across_crash(self):
+        from unittest import mock
+        from .models import PendingSubmission
+        from .submission_queue import flush_pending_submissions
+        for i in range(5):
+            self._submit(f'crash{i}', str(i + 1))
+
+        # The flusher dies after the bulk inserts, before the journal rows are deleted
+        with mock.patch('api.batch.apply_answer_delta', side_effect=RuntimeError("worker killed")):
+            with self.assertRaises(RuntimeError):
+                flush_pending_submissions()
+        self.assertEqual((Response.objects.count(), Answer.objects.count()), (0, 0))
+        self.assertEqual(PendingSubmission.objects.count(), 5)
+
+        # Restarted flusher stores everything exactly once
+        self.assertEqual(flush_pending_submissions(), 5)
+        self.assertEqual(flush_pending_submissions(), 0)
+        self.assertEqual(Response.objects.count(), 5)
+        self.assertEqual(QuestionStats.objects.get(question=self.q_star).answer_count, 5)
+
+    def test_submission_that_became_invalid_is_kept(self):
+        from .models import PendingSubmission
+        from django.core.management import call_command
+        from io import StringIO
+        self._submit('late')
+        self.client.force_authenticate(user=self.admin)
+        self.client.delete(f'/api/questions/{self.q_choice.id}/')
+
+        call_command('flush_submissions', stdout=StringIO())
+        pending = PendingSubmission.objects.get()
+        self.assertIn('question', pending.error)
+        self.assertEqual(self.client.get('/api/responses/queue_stats/').data['failed'], 1)
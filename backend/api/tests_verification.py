@@ -1,8 +1,11 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Survey, Question, Response, Answer
+from .models import Survey, Question, Response, Answer, AnswerChoice
+from .rollups import rebuild_survey_stats
 
 User = get_user_model()
 
@@ -39,9 +42,75 @@ class PerformanceTests(TestCase):
         """
         # Warmup if needed (optional)
         
-        with self.assertNumQueries(lambda n: n < 10): # Strict limit
+        with CaptureQueriesContext(connection) as ctx:
              response = self.client.get(f'/api/surveys/{self.survey.id}/results/')
              self.assertEqual(response.status_code, 200)
+        self.assertLess(len(ctx.captured_queries), 10) # Strict limit
+
+class ResultsQueryBudgetTests(TestCase):
+    """
+    The results engine must run a constant number of queries,
+    whether the survey has 5 or 500 questions.
+    """
+    # survey + prefetched questions + rollup rows + text samples
+    QUERY_BUDGET = 4
+    TYPES = ['text', 'star', 'scale', 'choice', 'multiple', 'date']
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pass123')
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _make_survey(self, question_count):
+        survey = Survey.objects.create(title=f"Budget {question_count}", is_active=True)
+        questions = Question.objects.bulk_create([
+            Question(
+                survey=survey,
+                text=f"Q{i}",
+                question_type=self.TYPES[i % len(self.TYPES)],
+                options=["Evet", "Hayır"] if self.TYPES[i % len(self.TYPES)] in ('choice', 'multiple') else None,
+                order=i
+            )
+            for i in range(question_count)
+        ])
+        for r_idx in range(3):
+            r = Response.objects.create(survey=survey)
+            answers = Answer.objects.bulk_create([
+                Answer(
+                    response=r,
+                    question=q,
+                    value=str(r_idx + 3) if q.question_type in ('star', 'scale') else "Evet",
+                    numeric_value=float(r_idx + 3) if q.question_type in ('star', 'scale') else None
+                )
+                for q in questions
+            ])
+            for ans, q in zip(answers, questions):
+                ans.option_indices = q.option_indices(ans.value)
+            AnswerChoice.objects.bulk_create(AnswerChoice.for_answers(answers))
+        rebuild_survey_stats(survey)
+        return survey
+
+    def test_query_count_is_flat(self):
+        for question_count in (5, 500):
+            survey = self._make_survey(question_count)
+            with self.assertNumQueries(self.QUERY_BUDGET):
+                response = self.client.get(f'/api/surveys/{survey.id}/results/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data), question_count)
+
+    def test_results_shape(self):
+        survey = self._make_survey(6)
+        data = self.client.get(f'/api/surveys/{survey.id}/results/').data
+        by_type = {item['type']: item for item in data}
+
+        self.assertEqual(by_type['text']['total'], 3)
+        self.assertEqual(by_type['text']['results'], ["Evet", "Evet", "Evet"])
+        self.assertEqual(by_type['star']['results']['average'], 4.0)
+        self.assertEqual(by_type['star']['results']['distribution']['5'], 1)
+        self.assertEqual(len(by_type['scale']['results']['distribution']), 10)
+        self.assertEqual(by_type['choice']['results'], {"Evet": 3, "Hayır": 0})
+        self.assertEqual(by_type['multiple']['results'], {"Evet": 3, "Hayır": 0})
+        self.assertEqual(by_type['multiple']['respondents'], 3)
 
 class IntegrityTests(TestCase):
     def setUp(self):
@@ -83,3 +152,63 @@ class IntegrityTests(TestCase):
         # KEY CHECK: IDs must match original IDs
         self.assertEqual(a1_new.id, self.a1.id, "Answer ID changed! It was deleted and recreated.")
         self.assertEqual(a2_new.id, self.a2.id, "Answer ID changed! It was deleted and recreated.")
+
+class IdempotentSubmissionTests(TestCase):
+    """Retried POSTs must not create duplicate responses."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('wifi_user', 'w@e.com', 'pass123')
+        self.client.force_authenticate(user=self.user)
+        self.survey = Survey.objects.create(title="Retry Survey", is_active=True)
+        self.q1 = Question.objects.create(survey=self.survey, text="Q1", question_type="star", order=1)
+        self.payload = {"survey": self.survey.id, "answers": [{"question": self.q1.id, "value": "4"}]}
+
+    def _post(self, key=None, payload=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post('/api/responses/', payload or self.payload, format='json', **headers)
+
+    def test_replay_returns_original_result(self):
+        first = self._post('key-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as ctx:
+            replay = self._post('key-1')
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertFalse([q for q in ctx.captured_queries if 'api_answer' in q['sql']])
+        self.assertEqual(Response.objects.count(), 1)
+
+    def test_key_reused_for_another_payload(self):
+        self._post('key-2')
+        other = {"survey": self.survey.id, "answers": [{"question": self.q1.id, "value": "1"}]}
+        self.assertEqual(self._post('key-2', other).status_code, 422)
+
+    def test_failed_request_can_be_retried(self):
+        bad = {"survey": self.survey.id, "answers": [{"question": 999999, "value": "4"}]}
+        self.assertEqual(self._post('key-3', bad).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._post('key-3').status_code, status.HTTP_201_CREATED)
+
+    def test_one_response_per_user_without_key(self):
+        self.assertEqual(self._post().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._post().status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Answer.objects.count(), 1)
+
+        # The database constraint backs the check up; anonymous (kiosk) responses are not limited
+        from django.db import IntegrityError, transaction
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Response.objects.create(survey=self.survey, user=self.user)
+        Response.objects.create(survey=self.survey)
+        Response.objects.create(survey=self.survey)
+
+    def test_expired_keys_are_purged(self):
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from .models import IdempotencyKey
+        self._post('key-4')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
@@ -0,0 +1,207 @@
+# backend/api/trends.py
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateTimeField, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import Answer, TREND_GRANULARITIES, TrendBucket, TrendWatermark
+from .results import NUMERIC_TYPES
+
+GRANULARITIES = [g for g, _ in TREND_GRANULARITIES]
+
+# A bucket is only materialized once it ended this long ago, so a slow
+# transaction committing late cannot be missed.
+CLOSE_GRACE = timedelta(minutes=5)
+
+BUCKET_LENGTHS = {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+
+
+def truncate(moment, granularity):
+    """Python twin of the database Trunc() (current timezone, weeks start on Monday)."""
+    moment = timezone.localtime(moment)
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def bucket_end(moment, granularity):
+    """End of the bucket containing `moment` (`moment` itself when it is a bucket boundary)."""
+    start = truncate(moment, granularity)
+    if start == moment:
+        return moment
+    return truncate(start + BUCKET_LENGTHS[granularity], granularity)
+
+
+def survey_trends(survey, granularity, question_ids=None, since=None, until=None):
+    """
+    Per-bucket count and average of every star/scale question of a survey.
+
+    Closed buckets come from TrendBucket (materialized on first use), only the
+    buckets after the watermark are aggregated from Answer. Buckets are always
+    whole: `since` is rounded down and `until` up to a bucket boundary.
+    """
+    if until:
+        until = bucket_end(until, granularity)
+    questions = sorted(
+        (q for q in survey.questions.all() if q.question_type in NUMERIC_TYPES),
+        key=lambda q: (q.order, q.id)
+    )
+    if question_ids:
+        questions = [q for q in questions if q.id in question_ids]
+    ids = [q.id for q in questions]
+
+    closed_until = _materialize(survey, granularity)
+
+    buckets = defaultdict(dict)
+    stored = TrendBucket.objects.filter(question_id__in=ids, granularity=granularity)
+    if since:
+        stored = stored.filter(bucket_start__gte=truncate(since, granularity))
+    if until:
+        stored = stored.filter(bucket_start__lt=until)
+    for row in stored.values_list('question_id', 'bucket_start', 'answer_count', 'value_sum'):
+        q_id, start, count, total = row
+        buckets[q_id][start] = (count, total)
+
+    if until is None or until > closed_until:
+        for q_id, start, count, total in _raw_buckets(survey, ids, granularity, closed_until, until):
+            buckets[q_id][start] = (count, total)
+
+    return [
+        {
+            'id': q.id,
+            'text': q.text,
+            'type': q.question_type,
+            'buckets': [
+                {
+                    'start': start.isoformat(),
+                    'count': count,
+                    'average': round(total / count, 2) if count else 0,
+                }
+                for start, (count, total) in sorted(buckets[q.id].items())
+                if since is None or start >= truncate(since, granularity)
+            ],
+        }
+        for q in questions
+    ]
+
+
+def _raw_buckets(survey, question_ids, granularity, start=None, end=None):
+    """[(question_id, bucket_start, count, sum)] straight from Answer, truncated in the database."""
+    if not question_ids:
+        return []
+    answers = Answer.objects.filter(
+        response__survey=survey,
+        question_id__in=question_ids,
+        numeric_value__isnull=False,
+    )
+    if start:
+        answers = answers.filter(response__submitted_at__gte=start)
+    if end:
+        answers = answers.filter(response__submitted_at__lt=end)
+    return (
+        answers
+        .annotate(bucket=Trunc('response__submitted_at', granularity, output_field=DateTimeField()))
+        .values_list('question_id', 'bucket')
+        .annotate(count=Count('id'), total=Sum('numeric_value'))
+        .order_by()
+    )
+
+
+def _materialize(survey, granularity):
+    """Stores the buckets closed since the last call and returns the new watermark."""
+    target = truncate(timezone.now() - CLOSE_GRACE, granularity)
+    watermark = TrendWatermark.objects.filter(survey=survey, granularity=granularity).first()
+    if watermark and watermark.closed_until >= target:
+        return watermark.closed_until
+
+    with transaction.atomic():
+        watermark, created = TrendWatermark.objects.select_for_update().get_or_create(
+            survey=survey, granularity=granularity, defaults={'closed_until': target}
+        )
+        if created:
+            start = None  # First use: materialize the whole history once
+        elif watermark.closed_until >= target:
+            return watermark.closed_until  # Another request just did it
+        else:
+            start = watermark.closed_until
+
+        # All numeric questions are materialized, whatever the request filtered on
+        numeric_ids = list(
+            survey.questions.filter(question_type__in=NUMERIC_TYPES).values_list('id', flat=True)
+        )
+        TrendBucket.objects.bulk_create([
+            TrendBucket(
+                question_id=q_id, granularity=granularity, bucket_start=bucket_start,
+                answer_count=count, value_sum=total,
+            )
+            for q_id, bucket_start, count, total in _raw_buckets(survey, numeric_ids, granularity, start, target)
+        ])
+        watermark.closed_until = target
+        watermark.save(update_fields=['closed_until'])
+    return target
+
+
+def reset_survey_trends(survey):
+    """Drops the materialized buckets of a survey: the next read materializes them again from Answer."""
+    TrendBucket.objects.filter(question__survey=survey).delete()
+    TrendWatermark.objects.filter(survey=survey).delete()
+
+
+def apply_trend_delta(added=(), removed=()):
+    """
+    Keeps materialized buckets right when an old response is edited or deleted.
+
+    New submissions always land in open buckets, so this is a no-op (and
+    runs no query) on the normal submit path.
+    """
+    cutoff = truncate(timezone.now() - CLOSE_GRACE, 'hour')
+    changes = [
+        (sign, ans)
+        for sign, answers in ((1, added), (-1, removed))
+        for ans in answers
+        if ans.numeric_value is not None
+        and ans.question.question_type in NUMERIC_TYPES
+        and ans.response.submitted_at < cutoff
+    ]
+    if not changes:
+        return
+
+    survey_ids = {ans.question.survey_id for _, ans in changes}
+    watermarks = {
+        (w.survey_id, w.granularity): w.closed_until
+        for w in TrendWatermark.objects.filter(survey_id__in=survey_ids)
+    }
+
+    deltas = defaultdict(lambda: [0, 0.0])
+    for sign, ans in changes:
+        submitted_at = ans.response.submitted_at
+        for granularity in GRANULARITIES:
+            closed_until = watermarks.get((ans.question.survey_id, granularity))
+            if closed_until and submitted_at < closed_until:
+                delta = deltas[(ans.question_id, granularity, truncate(submitted_at, granularity))]
+                delta[0] += sign
+                delta[1] += sign * ans.numeric_value
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        TrendBucket.objects.bulk_create(
+            [TrendBucket(question_id=q_id, granularity=g, bucket_start=start) for q_id, g, start in deltas],
+            ignore_conflicts=True,
+        )
+        keys = Q()
+        for q_id, granularity, start in deltas:
+            keys |= Q(question_id=q_id, granularity=granularity, bucket_start=start)
+        rows = list(TrendBucket.objects.select_for_update().filter(keys).order_by('id'))
+        for row in rows:
+            count, total = deltas[(row.question_id, row.granularity, row.bucket_start)]
+            row.answer_count += count
+            row.value_sum += total
+        TrendBucket.objects.bulk_update(rows, ['answer_count', 'value_sum'])
@@ -2,12 +2,13 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SurveyViewSet, ResponseViewSet, RegisterView, LoginView, UserViewSet, QuestionViewSet, ChangePasswordView, PasswordResetRequestView, PasswordResetConfirmView
+from .views import SurveyViewSet, ResponseViewSet, ResponseDraftViewSet, RegisterView, LoginView, UserViewSet, QuestionViewSet, ChangePasswordView, PasswordResetRequestView, PasswordResetConfirmView
 
 # Router kurulumu
 router = DefaultRouter()
 router.register(r'surveys', SurveyViewSet, basename='survey')     # Anketleri listeleme
 router.register(r'responses', ResponseViewSet, basename='response') # Cevap gönderme
+router.register(r'drafts', ResponseDraftViewSet, basename='draft')  # Sayfa sayfa kaydedilen cevaplar
 router.register(r'questions', QuestionViewSet)
 router.register(r'users', UserViewSet)
 
@@ -0,0 +1,62 @@
+# backend/api/validation.py
+
+
+class SurveyValidator:
+    """
+    The answer checks of one survey, compiled once per definition version and
+    cached (see caching.get_survey_validators).
+
+    Checks a whole submission in memory: the question belongs to the survey,
+    is answered once, choice values are known options and (on create) every
+    required question has a non-empty answer.
+    """
+
+    def __init__(self, questions):
+        questions = sorted(questions, key=lambda q: (q.order, q.id))
+        self.questions = {q.id: q for q in questions}
+        self.required = [q for q in questions if q.required]
+
+    def check(self, answers, required=True):
+        """
+        `answers` are {"question": id, "value": ...} dicts.
+
+        Returns ([(Question, value)], None) or (None, errors), errors shaped like
+        DRF's: {"answers": {index: {field: [message]}}} or {"answers": [message]}.
+        """
+        if not isinstance(answers, list):
+            return None, {'answers': ["Cevaplar bir liste olmalı."]}
+
+        cleaned, item_errors, seen = [], {}, set()
+        for i, answer in enumerate(answers):
+            if not isinstance(answer, dict):
+                item_errors[i] = {'non_field_errors': ["Geçersiz cevap."]}
+                continue
+            question_id = answer.get('question')
+            # bool is an int subclass: "question": true must not mean question 1
+            question = None if isinstance(question_id, bool) else self.questions.get(question_id)
+            if question is None:
+                item_errors[i] = {'question': ["Soru bu ankete ait değil."]}
+                continue
+            if question.id in seen:
+                item_errors[i] = {'question': ["Aynı soru birden fazla cevaplanmış."]}
+                continue
+            seen.add(question.id)
+
+            value = answer.get('value', '')
+            value = '' if value is None else str(value)
+            try:
+                question.option_indices(value, strict=True)
+            except ValueError as e:
+                item_errors[i] = {'value': [f"Geçersiz seçenek: {e}"]}
+                continue
+            cleaned.append((question, value))
+
+        if item_errors:
+            return None, {'answers': item_errors}
+
+        if required:
+            answered = {question.id for question, value in cleaned if value.strip()}
+            missing = [q.text for q in self.required if q.id not in answered]
+            if missing:
+                return None, {'answers': [f"Zorunlu sorular cevaplanmadı: {', '.join(missing)}"]}
+        return cleaned, None
@@ -1,3 +1,3 @@
 from .auth import RegisterView, LoginView, ChangePasswordView, PasswordResetRequestView, PasswordResetConfirmView
-from .surveys import SurveyViewSet, QuestionViewSet, ResponseViewSet
+from .surveys import SurveyViewSet, QuestionViewSet, ResponseViewSet, ResponseDraftViewSet
 from .users import UserViewSet
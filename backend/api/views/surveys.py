@@ -1,11 +1,36 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, mixins, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response as APIResponse
-from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import parse_etags, urlencode
+from django.utils.dateparse import parse_datetime, parse_date
+from django.utils import timezone
+from datetime import datetime, time
+import json
 
-from ..models import Survey, Response, Question, Answer
-from ..serializers import SurveySerializer, ResponseSerializer, QuestionSerializer
-from ..permissions import IsStaffOrReadOnly
+from ..models import Survey, Response, Question, Answer, PendingSubmission, ResponseDraft
+from ..serializers import SurveySerializer, SurveyListSerializer, ResponseSerializer, ResponseSummarySerializer, QuestionSerializer, ResponseDraftSerializer
+from ..permissions import IsStaffOrReadOnly, IsKioskOrStaff
+from ..pagination import IdCursorPagination
+from ..results import survey_results, compare_surveys, segment_results, filter_responses, answer_page, TEXT_TYPES, TEXT_SAMPLE_SIZE, ANSWER_PAGE_MAX_SIZE
+from ..rollups import delete_responses
+from ..batch import submit_batch, BATCH_MAX_RESPONSES
+from ..submission_queue import enqueue_submission, queue_stats
+from ..idempotency import idempotent_create
+from ..drafts import save_draft_page, draft_submission, dropoff_stats
+from ..export import CSVRenderer, NDJSONRenderer, csv_lines, ndjson_lines
+from ..trends import survey_trends, GRANULARITIES
+from ..crosstab import survey_crosstab, CROSSTAB_TYPES
+from ..search import search_answers, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
+from ..terms import top_terms, TOP_TERMS, TREND_DAYS
+from ..caching import (
+    bump_results_version, results_etag, get_cached_results, count_not_modified, cache_counters,
+    get_answered_survey_ids, forget_answered_surveys, get_survey_definitions,
+)
 
 class SurveyViewSet(viewsets.ModelViewSet):
     """
@@ -13,121 +38,353 @@ class SurveyViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SurveySerializer
     permission_classes = [permissions.IsAuthenticated, IsStaffOrReadOnly]
+    pagination_class = IdCursorPagination
     
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'description']
 
     def get_queryset(self):
+        # The results action only needs the survey row (ETag check), questions are
+        # loaded on a cache miss.
+        if self.action == 'results':
+            if self.request.user.is_staff:
+                return Survey.objects.all()
+            return Survey.objects.filter(is_active=True)
+
         # 1. Staff users see everything
         if self.request.user.is_staff:
-            return Survey.objects.all().order_by('-created_at').prefetch_related('questions')
-
+            queryset = Survey.objects.all().order_by('-created_at')
         # 2. Regular users see only active surveys
-        queryset = Survey.objects.filter(is_active=True).prefetch_related('questions')
-        
-        # Exclude surveys the user has already responded to (in list view)
-        if self.action == 'list' and self.request.user.is_authenticated:
-            queryset = queryset.exclude(responses__user=self.request.user)
-            
+        else:
+            queryset = Survey.objects.filter(is_active=True)
+
+        # list/retrieve serve the cached definitions, the other actions read the questions
+        if self.action not in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related('questions')
+
+        # Exclude surveys the user has already responded to (in list view), stored or
+        # journaled: a cached id set instead of an anti-join over every response
+        if self.action == 'list' and not self.request.user.is_staff and self.request.user.is_authenticated:
+            queryset = queryset.exclude(id__in=get_answered_survey_ids(self.request.user))
+
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """
+        Slim list: the survey fields with question/page counts (annotated, no questions loaded).
+        Query params: fields (comma separated, keeps only those), expand=questions
+        (full definitions, stitched from their cached JSON, see get_survey_definitions).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = _query_list(request, 'fields')
+        if 'questions' in _query_list(request, 'expand'):
+            page = self.paginate_queryset(queryset.only('id', 'definition_version', 'created_at'))
+            rows = [(survey.id, survey.definition_version, survey.created_at) for survey in page]
+            definitions = get_survey_definitions(rows, _render_definitions)
+            fragments = [definitions[survey_id] for survey_id, _, _ in rows]
+            if not fields and request.accepted_renderer.format == 'json':
+                # The page envelope (next, previous, count) around the raw fragments
+                envelope = dict(self.get_paginated_response([]).data)
+                del envelope['results']
+                body = json.dumps(envelope).encode()[:-1] + b', "results": [' + b','.join(fragments) + b']}'
+                return HttpResponse(body, content_type='application/json')
+            data = [json.loads(fragment) for fragment in fragments]
+            if fields:
+                data = [{k: v for k, v in item.items() if k in fields or k == 'questions'} for item in data]
+            return self.get_paginated_response(data)
+
+        queryset = queryset.annotate(
+            question_count=Count('questions'),
+            page_count=Count('questions__page_number', distinct=True),
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(SurveyListSerializer(page, many=True, fields=fields).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().retrieve(request, *args, **kwargs)
+        survey = self.get_object()
+        definitions = get_survey_definitions(
+            [(survey.id, survey.definition_version, survey.created_at)], _render_definitions
+        )
+        return HttpResponse(definitions[survey.id], content_type='application/json')
+
     @action(detail=True, methods=['get'])
     def results(self, request, pk=None):
         """
         Custom action to retrieve aggregated results for a specific survey.
-        OPTIMIZED: Uses SQL Aggregation on 'numeric_value' field.
+        OPTIMIZED: Reads the precomputed rollups (see api/results.py), cached per
+        survey results version. Polling clients get a 304 while nothing changed.
+        Staff can restrict the results to a segment, query params: since, until,
+        complete (true|false), group (staff|students), user (id), answered (question_id:value).
+        """
+        survey = self.get_object()
+
+        variant = urlencode(sorted(
+            (key, value) for key in RESULT_FILTERS for value in request.query_params.getlist(key)
+        ))
+        if variant and not request.user.is_staff:
+            return APIResponse({'error': 'Only staff can filter the results.'}, status=403)
+        if variant:
+            try:
+                # Builds the (lazy) segment queryset, an unknown option or bad number raises here
+                responses = filter_responses(survey, **_parse_results_filters(request, survey))
+            except ValueError:
+                return APIResponse({'error': 'Invalid filter parameter.'}, status=400)
+
+        etag = results_etag(survey, variant)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            count_not_modified()
+            return APIResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if variant:
+            data = get_cached_results(survey, lambda: segment_results(survey, responses), variant)
+        else:
+            data = get_cached_results(survey, lambda: survey_results(survey))
+        return APIResponse(data, headers=headers)
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def trends(self, request, pk=None):
+        """
+        Rating trends: per hour/day/week count and average of star/scale questions (staff only,
+        reading them materializes the closed buckets).
+        Query params: bucket (hour|day|week), question (id), since, until (ISO date/datetime,
+        both widened to whole buckets).
+        """
+        granularity = request.query_params.get('bucket', 'day')
+        if granularity not in GRANULARITIES:
+            return APIResponse({'error': f"bucket must be one of: {', '.join(GRANULARITIES)}"}, status=400)
+
+        try:
+            since = _parse_moment(request.query_params.get('since'))
+            until = _parse_moment(request.query_params.get('until'))
+            question_ids = [int(q) for q in request.query_params.getlist('question')]
+        except ValueError:
+            return APIResponse({'error': 'Invalid since/until/question parameter.'}, status=400)
+
+        survey = self.get_object()
+        return APIResponse({
+            'bucket': granularity,
+            'questions': survey_trends(survey, granularity, question_ids, since, until),
+        })
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def crosstab(self, request, pk=None):
+        """
+        Cross-tabulation of two choice/multiple/star/scale questions (staff only).
+        Query params: row (question id), col (question id).
         """
-        from django.db.models import Avg, Count
-        
+        try:
+            row_id = int(request.query_params.get('row', ''))
+            col_id = int(request.query_params.get('col', ''))
+        except ValueError:
+            return APIResponse({'error': 'row and col must be question ids.'}, status=400)
+
+        survey = self.get_object()
+        questions = {q.id: q for q in survey.questions.all()}
+        row_question, col_question = questions.get(row_id), questions.get(col_id)
+        if row_question is None or col_question is None:
+            return APIResponse({'error': 'Both questions must belong to this survey.'}, status=400)
+        if row_question.question_type not in CROSSTAB_TYPES or col_question.question_type not in CROSSTAB_TYPES:
+            return APIResponse({'error': f"Only {', '.join(CROSSTAB_TYPES)} questions can be cross-tabulated."}, status=400)
+
+        return APIResponse(survey_crosstab(row_question, col_question))
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def search(self, request, pk=None):
+        """
+        Full-text search in the answers of the survey's text questions, best match first (staff only).
+        Query params: q, question (id, optional), page, page_size.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return APIResponse({'error': 'q is required.'}, status=400)
+        try:
+            question_ids = {int(q) for q in request.query_params.getlist('question')}
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+        except ValueError:
+            return APIResponse({'error': 'Invalid question/page/page_size parameter.'}, status=400)
+
         survey = self.get_object()
-        questions = survey.questions.all().order_by('order')
-        
-        results_data = []
-        
-        for q in questions:
-            question_data = {
-                'id': q.id,
-                'text': q.text,
-                'type': q.question_type,
-                'total': 0,
-                'results': None
-            }
-
-            # 1. Text and Date -> List (Limit 50)
-            if q.question_type in ['text', 'date']:
-                # Fetch only values, order by ID desc
-                values = Answer.objects.filter(question=q).exclude(value='').order_by('-id').values_list('value', flat=True)[:50]
-                question_data['total'] = Answer.objects.filter(question=q).count()
-                question_data['results'] = list(values)
-
-            # 2. Choice/Multiple -> SQL Count (Group By value)
-            elif q.question_type in ['choice', 'multiple']:
-                # Note: multiple choice still stores strings like "A,B".
-                # Precise SQL aggregation for 'Multiple' requires normalization or split logic.
-                # For 'Choice', simple Count is enough.
-                # Current implementation for 'multiple' in legacy code was doing python split.
-                # For basic SQL optimization, we group by 'value'.
-                stats_qs = Answer.objects.filter(question=q).values('value').annotate(count=Count('id')).order_by('value')
-                
-                stats = {}
-                # Initialize options if available
-                if q.options:
-                    options_list = [opt.strip() for opt in str(q.options).split(',')]
-                    stats = {opt: 0 for opt in options_list}
-
-                total_responses = 0
-                for item in stats_qs:
-                    val = item['value']
-                    count = item['count']
-                    if not val: continue
-                    
-                    if q.question_type == 'multiple' and ',' in val:
-                        # Fallback to Python splitting for this edge case or handle via improved logic later
-                        # For now, simplistic approach:
-                        parts = [p.strip() for p in val.split(',')]
-                        for p in parts:
-                            stats[p] = stats.get(p, 0) + count
-                            total_responses += count 
-                            # Note: Total responses logic might be slightly skewed for multiple if we count *options* vs *users*. 
-                            # Usually response count is per user.
-                    else:
-                        v_str = val.strip()
-                        stats[v_str] = stats.get(v_str, 0) + count
-                        total_responses += count
-
-                question_data['total'] = Answer.objects.filter(question=q).count()
-                question_data['results'] = stats
-
-            # 3. Star/Scale -> SQL Average on numeric_value
-            elif q.question_type in ['star', 'scale']:
-                # Extremely efficient SQL aggregation
-                agg_data = Answer.objects.filter(question=q).aggregate(
-                    average=Avg('numeric_value'),
-                    total=Count('id')
-                )
-                
-                # Distribution (1 star: 5 people, etc.)
-                # Group by numeric_value
-                dist_qs = Answer.objects.filter(question=q).values('numeric_value').annotate(count=Count('id')).order_by('numeric_value')
-                
-                max_val = 10 if q.question_type == 'scale' else 5
-                distribution = {str(i): 0 for i in range(1, max_val + 1)}
-                
-                for item in dist_qs:
-                    if item['numeric_value'] is not None:
-                        val_int = int(item['numeric_value'])
-                        if str(val_int) in distribution:
-                            distribution[str(val_int)] += item['count']
-
-                question_data['total'] = agg_data['total']
-                question_data['results'] = {
-                    'average': round(agg_data['average'], 1) if agg_data['average'] else 0,
-                    'distribution': distribution
-                }
-
-            results_data.append(question_data)
-        
-        return APIResponse(results_data)
+        text_ids = [
+            q.id for q in survey.questions.all()
+            if q.question_type == 'text' and (not question_ids or q.id in question_ids)
+        ]
+        count, matches = search_answers(text_ids, query, page, page_size)
+        return APIResponse({
+            'query': query,
+            'count': count,
+            'page': page,
+            'page_size': page_size,
+            'results': matches,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def compare(self, request):
+        """
+        Side-by-side metrics of several surveys in one request (staff only), oldest first.
+        Query params: ids (comma separated, at most COMPARE_MAX_SURVEYS) or series
+        (its first COMPARE_MAX_SURVEYS surveys, `truncated` tells when there are more).
+        """
+        series = request.query_params.get('series')
+        try:
+            ids = {int(i) for i in request.query_params.get('ids', '').split(',') if i.strip()}
+        except ValueError:
+            return APIResponse({'error': 'ids must be comma separated survey ids.'}, status=400)
+        if not ids and not series:
+            return APIResponse({'error': 'Give ids or series.'}, status=400)
+        if len(ids) > COMPARE_MAX_SURVEYS:
+            return APIResponse({'error': f'At most {COMPARE_MAX_SURVEYS} surveys can be compared.'}, status=400)
+
+        surveys = Survey.objects.filter(id__in=ids) if ids else Survey.objects.filter(series=series)
+        # One extra row tells whether the series was cut
+        surveys = list(surveys.order_by('created_at', 'id')[:COMPARE_MAX_SURVEYS + 1].prefetch_related('questions'))
+        data = compare_surveys(surveys[:COMPARE_MAX_SURVEYS])
+        data['truncated'] = len(surveys) > COMPARE_MAX_SURVEYS
+        return APIResponse(data)
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def dropoff(self, request, pk=None):
+        """Completed responses vs. open and abandoned drafts per last saved page (staff only)."""
+        return APIResponse(dropoff_stats(self.get_object()))
+
+    @action(
+        detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser],
+        renderer_classes=[CSVRenderer, NDJSONRenderer],
+    )
+    def export(self, request, pk=None):
+        """
+        All responses of a survey, one row per response pivoted by question, streamed
+        as CSV (?format=csv, default) or NDJSON (?format=ndjson). Staff only.
+        Accepts the segment filters of the results action.
+        """
+        survey = self.get_object()
+        responses = None
+        if any(key in request.query_params for key in RESULT_FILTERS):
+            try:
+                responses = filter_responses(survey, **_parse_results_filters(request, survey)).values('id')
+            except ValueError:
+                return APIResponse({'error': 'Invalid filter parameter.'}, status=400)
+
+        if request.accepted_renderer.format == 'ndjson':
+            lines, extension = ndjson_lines(survey, responses), 'ndjson'
+        else:
+            lines, extension = csv_lines(survey, responses), 'csv'
+        response = StreamingHttpResponse(lines, content_type=f'{request.accepted_renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="anket-{survey.id}.{extension}"'
+        return response
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """Hit/miss counters of the results cache (staff only)."""
+        return APIResponse(cache_counters())
+
+    def perform_update(self, serializer):
+        survey = serializer.save()
+        bump_results_version([survey.id], definition=True)
+
+# Two years of monthly surveys
+COMPARE_MAX_SURVEYS = 24
+
+RESULT_FILTERS = ('since', 'until', 'complete', 'group', 'user', 'answered')
+
+def _parse_results_filters(request, survey):
+    """Query params of the results action -> filter_responses() kwargs (ValueError when invalid)."""
+    params = request.query_params
+    filters = {
+        'since': _parse_moment(params.get('since')),
+        'until': _parse_moment(params.get('until')),
+        'user_ids': [int(u) for u in params.getlist('user')],
+        'group': params.get('group'),
+    }
+    if filters['group'] not in (None, 'staff', 'students'):
+        raise ValueError(filters['group'])
+
+    complete = params.get('complete')
+    if complete is not None:
+        if complete.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError(complete)
+        filters['complete'] = complete.lower() in ('true', '1')
+
+    questions = {q.id: q for q in survey.questions.all()}
+    answered = []
+    for item in params.getlist('answered'):
+        q_id, _, value = item.partition(':')
+        question = questions.get(int(q_id))
+        if question is None or not value:
+            raise ValueError(item)
+        answered.append((question, value))
+    filters['answered'] = answered
+    return filters
+
+def _query_list(request, name):
+    """Comma separated query parameter -> set of names."""
+    return {item.strip() for item in request.query_params.get(name, '').split(',') if item.strip()}
+
+def _render_definitions(survey_ids):
+    """{survey_id: JSON bytes} of SurveySerializer, questions in form order (definition cache misses)."""
+    surveys = Survey.objects.filter(id__in=survey_ids).prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('order', 'id'))
+    )
+    renderer = JSONRenderer()
+    return {survey.id: renderer.render(SurveySerializer(survey).data) for survey in surveys}
+
+def _already_answered(survey, user):
+    """True when the user has a stored or journaled (write-behind, not failed) response to the survey."""
+    return (
+        Response.objects.filter(survey=survey, user=user).exists()
+        or PendingSubmission.objects.filter(survey=survey, user=user, error='').exists()
+    )
+
+def _store_response(serializer, user):
+    """
+    Stores a validated ResponseSerializer, or journals it in write-behind mode.
+    Shared by the direct submission and the draft submit; returns the API response.
+    The user's draft of the survey is deleted once the submission is accepted.
+    """
+    survey = serializer.validated_data['survey']
+    if _already_answered(survey, user):
+        return APIResponse({'error': 'Bu anketi zaten cevapladınız.'}, status=status.HTTP_409_CONFLICT)
+
+    if settings.SUBMISSION_WRITE_BEHIND:
+        # Write-behind: validate, journal and acknowledge; flush_submissions stores it
+        pending = enqueue_submission(survey, user, serializer.validated_data['answers'])
+        _delete_draft(survey, user)
+        return APIResponse(
+            {'status': 'queued', 'id': pending.id, 'survey': pending.survey_id},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    try:
+        response = serializer.save()
+    except IntegrityError:
+        # unique_response_per_user: a concurrent submission of the same user won
+        return APIResponse({'error': 'Bu anketi zaten cevapladınız.'}, status=status.HTTP_409_CONFLICT)
+    forget_answered_surveys([response.user_id])
+    _delete_draft(survey, user)
+    return APIResponse(serializer.data, status=status.HTTP_201_CREATED)
+
+def _delete_draft(survey, user):
+    # A draft left behind by a direct submission would count as abandoned forever
+    if user and user.is_authenticated:
+        ResponseDraft.objects.filter(survey=survey, user=user).delete()
+
+def _parse_moment(value):
+    """ISO datetime or date query parameter -> aware datetime (None when missing)."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
 
 class QuestionViewSet(viewsets.ModelViewSet):
     """
@@ -137,23 +394,204 @@ class QuestionViewSet(viewsets.ModelViewSet):
     serializer_class = QuestionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    # Questions are part of the results, so every write invalidates them
+    def perform_create(self, serializer):
+        question = serializer.save()
+        bump_results_version([question.survey_id], definition=True)
+
+    def perform_update(self, serializer):
+        old_survey_id = serializer.instance.survey_id
+        question = serializer.save()
+        bump_results_version([old_survey_id, question.survey_id], definition=True)
+
+    def perform_destroy(self, instance):
+        bump_results_version([instance.survey_id], definition=True)
+        instance.delete()
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def answers(self, request, pk=None):
+        """
+        Raw answers of a text/date question, newest first (staff only).
+        Query params: cursor (next_cursor of the previous page), since, until, page_size.
+        """
+        question = self.get_object()
+        if question.question_type not in TEXT_TYPES:
+            return APIResponse({'error': 'Only text and date questions can be listed.'}, status=400)
+
+        try:
+            cursor = request.query_params.get('cursor')
+            cursor = int(cursor) if cursor else None
+            since = _parse_moment(request.query_params.get('since'))
+            until = _parse_moment(request.query_params.get('until'))
+            page_size = int(request.query_params.get('page_size', TEXT_SAMPLE_SIZE))
+        except ValueError:
+            return APIResponse({'error': 'Invalid cursor/since/until/page_size parameter.'}, status=400)
+        page_size = min(max(page_size, 1), ANSWER_PAGE_MAX_SIZE)
+
+        answers, next_cursor = answer_page(question, cursor, since, until, page_size)
+        return APIResponse({'results': answers, 'next_cursor': next_cursor})
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def terms(self, request, pk=None):
+        """
+        Most frequent words/phrases of a text question with their daily trend (staff only).
+        Query params: limit (max 100), days (trend length, max 90).
+        """
+        question = self.get_object()
+        if question.question_type != 'text':
+            return APIResponse({'error': 'Only text questions have terms.'}, status=400)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', TOP_TERMS)), 1), 100)
+            days = min(max(int(request.query_params.get('days', TREND_DAYS)), 1), 90)
+        except ValueError:
+            return APIResponse({'error': 'Invalid limit/days parameter.'}, status=400)
+
+        return APIResponse({'days': days, 'terms': top_terms(question, limit, days)})
+
 class ResponseViewSet(viewsets.ModelViewSet):
     """
     ViewSet for handling Survey Responses (Submissions).
     """
-    # Optimized QuerySet: Select Survey and Prefetch Answers
-    queryset = Response.objects.all().select_related('survey').prefetch_related('answers')
+    # Responses with their survey (title), answers and the questions/choices the answer
+    # labels are resolved from: three queries for a whole page, however many rows
+    queryset = Response.objects.select_related('survey').prefetch_related(
+        Prefetch('answers', queryset=Answer.objects.select_related('question').prefetch_related('choices'))
+    )
     serializer_class = ResponseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = IdCursorPagination
     http_method_names = ['get', 'post', 'put', 'patch', 'delete'] 
 
     def get_queryset(self):
         user = self.request.user
+        # Deletion reads the answers itself (delete_responses)
+        queryset = Response.objects.all() if self.action == 'destroy' else self.queryset.all()
         if user.is_staff:
-            return Response.objects.all()
-        return Response.objects.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context.update({"request": self.request})
         return context
+
+    def create(self, request, *args, **kwargs):
+        # Retries carrying the same Idempotency-Key get the first result back
+        return idempotent_create(request, lambda: self._create_response(request))
+
+    def _create_response(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return _store_response(serializer, request.user)
+
+    def perform_destroy(self, instance):
+        # Remove the answers from the results rollups in the same transaction
+        delete_responses([instance])
+
+    @action(detail=False, methods=['get'])
+    def mine(self, request):
+        """
+        The user's own responses without their answers (profile history):
+        survey title and answer count, one query per page.
+        """
+        queryset = (
+            Response.objects.filter(user=request.user)
+            .values('id', 'survey', 'submitted_at', survey_title=F('survey__title'))
+            .annotate(answer_count=Count('answers'))
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(ResponseSummarySerializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def queue_stats(self, request):
+        """Write-behind journal depth and flush metrics (staff only)."""
+        return APIResponse(queue_stats())
+
+    @action(detail=False, methods=['post'], permission_classes=[IsKioskOrStaff])
+    def batch(self, request):
+        """
+        Kiosk sync: stores up to BATCH_MAX_RESPONSES anonymous responses at once (kiosk group or staff).
+        Body: {"responses": [{"survey", "answers", "submitted_at"?, "client_id"?}, ...]}
+        Returns the status of every item, valid ones are stored even if others fail.
+        A sync retried with the same Idempotency-Key gets the first result back
+        instead of storing the batch again.
+        """
+        return idempotent_create(request, lambda: self._batch(request))
+
+    def _batch(self, request):
+        items = request.data.get('responses') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return APIResponse({'error': 'responses must be a non-empty list.'}, status=400)
+        if len(items) > BATCH_MAX_RESPONSES:
+            return APIResponse({'error': f'At most {BATCH_MAX_RESPONSES} responses per batch.'}, status=400)
+
+        results = submit_batch(items)
+        return APIResponse({
+            'created': sum(1 for r in results if r['status'] == 'created'),
+            'invalid': sum(1 for r in results if r['status'] == 'invalid'),
+            'results': results,
+        })
+
+
+class ResponseDraftViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Page-by-page saving of multi-page surveys (the user's own drafts).
+
+    POST {"survey"} starts (or resumes) the draft of a survey, PATCH
+    {"page", "answers"} saves one page, POST submit/ turns the draft into a
+    Response through the normal submission path.
+    """
+    serializer_class = ResponseDraftSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = ResponseDraft.objects.filter(user=self.request.user).select_related('survey')
+        if self.action in ('list', 'retrieve', 'create'):
+            queryset = queryset.prefetch_related('answers')
+        survey = self.request.query_params.get('survey')
+        if self.action == 'list' and survey and survey.isdigit():
+            queryset = queryset.filter(survey_id=survey)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        survey = serializer.validated_data['survey']
+        if not survey.is_active:
+            return APIResponse({'survey': ['Anket aktif değil.']}, status=status.HTTP_400_BAD_REQUEST)
+        if _already_answered(survey, request.user):
+            return APIResponse({'error': 'Bu anketi zaten cevapladınız.'}, status=status.HTTP_409_CONFLICT)
+
+        draft, created = ResponseDraft.objects.get_or_create(survey=survey, user=request.user)
+        draft = self.get_queryset().get(pk=draft.pk)
+        return APIResponse(
+            self.get_serializer(draft).data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    def partial_update(self, request, *args, **kwargs):
+        draft = self.get_object()
+        try:
+            page = int(request.data.get('page'))
+        except (TypeError, ValueError):
+            return APIResponse({'page': ['Sayfa numarası gerekli.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors = save_draft_page(draft, page, request.data.get('answers', []))
+        if errors:
+            return APIResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+        # Only the page is echoed back: the client already holds the other pages
+        return APIResponse({'id': draft.id, 'last_page': draft.last_page, 'updated_at': draft.updated_at})
+
+    @action(detail=True, methods=['post'])
+    def submit(self, request, pk=None):
+        """Final step: validates the whole draft (required questions too) and stores it as a Response."""
+        draft = self.get_object()
+        return idempotent_create(request, lambda: self._submit(request, draft))
+
+    def _submit(self, request, draft):
+        serializer = ResponseSerializer(data=draft_submission(draft), context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        # The draft is deleted by _store_response once the submission is accepted
+        with transaction.atomic():
+            return _store_response(serializer, request.user)
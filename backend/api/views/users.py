@@ -5,6 +5,7 @@ from rest_framework.exceptions import PermissionDenied
 
 from ..models import User
 from ..serializers import UserAdminSerializer
+from ..pagination import IdCursorPagination
 
 class UserViewSet(viewsets.ModelViewSet):
     """
@@ -13,6 +14,8 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('-date_joined')
     serializer_class = UserAdminSerializer
     permission_classes = [permissions.IsAdminUser]
+    # Newest accounts first (id follows date_joined), one page at a time
+    pagination_class = IdCursorPagination
 
     def perform_destroy(self, instance):
         request_user = self.request.user
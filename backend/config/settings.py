@@ -107,6 +107,37 @@ if 'test' in sys.argv:
     }
 
 
+# Cache
+# Varsayılan olarak işlem içi bellek (locmem) kullanılır. CACHE_DIR verilirse
+# dosya tabanlı önbelleğe geçilir; böylece tüm gunicorn worker'ları aynı önbelleği paylaşır.
+# (Sonuç önbelleğinin sürüm sayacı veritabanında tutulur, iki seçenek de güvenlidir.
+# Kullanıcının cevapladığı anketler listesi ise locmem ile diğer worker'larda en fazla 5 dakika eski kalabilir.)
+if os.getenv('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'yemekhane',
+        }
+    }
+
+# Anket sonuçlarının önbellekte tutulma süresi (saniye)
+RESULTS_CACHE_TIMEOUT = int(os.getenv('RESULTS_CACHE_TIMEOUT', '3600'))
+
+# Yoğun saatler için ertelenmiş yazma: cevaplar önce PendingSubmission tablosuna eklenir,
+# `flush_submissions` komutu (ayrı bir süreç) bunları toplu olarak kaydeder.
+SUBMISSION_WRITE_BEHIND = os.getenv('SUBMISSION_WRITE_BEHIND', 'False') == 'True'
+
+# Idempotency-Key başlığı ile gelen gönderimlerin saklanma süresi (saat)
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', '24'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -161,6 +192,7 @@ CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:5173,
 CORS_ALLOW_HEADERS = [
     'authorization',  # Jetonumuzu (Token) yollamak için
     'content-type',   # JSON yollamak için
+    'idempotency-key',  # Cevap gönderiminin tekrar denemeleri için
 
     # (Aşağıdakiler, 'corsheaders'ın varsayılan olarak izin verdikleridir,
     #  ama biz açıkça belirterek garantilemiş oluyoruz)
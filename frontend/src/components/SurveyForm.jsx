@@ -1,7 +1,8 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { StarInput, CheckboxInput, DateInput, ScaleInput } from './QuestionInputs';
 // import { API_BASE_URL } from '../services/api';
-import { ResponseService } from '../services/response.service';
+import { newIdempotencyKey } from '../services/api';
+import { ResponseService, DraftService } from '../services/response.service';
 
 import { toast } from 'react-toastify';
 
@@ -10,6 +11,11 @@ function SurveyForm({ preloadedSurvey }) {
   const [answers, setAnswers] = useState({});
   const [loading, setLoading] = useState(false);
   const [submitted, setSubmitted] = useState(false);
+  // Aynı gönderimin tekrarları (ağ hatası sonrası yeniden deneme) tek cevap olarak kaydedilir.
+  // Anahtar bir kez, ilk render'da üretilir
+  const [idempotencyKey] = useState(newIdempotencyKey);
+  // Çok sayfalı anketlerde sunucudaki taslak (sayfa sayfa kaydedilir)
+  const [draftId, setDraftId] = useState(null);
 
   // Soruları Sayfalara Böl
   // Backend'den sorular karışık gelebilir, önce order'a göre sırala
@@ -29,6 +35,28 @@ function SurveyForm({ preloadedSurvey }) {
   // Şu anki sayfanın soruları
   const currentQuestions = questionsByPage[currentPage] || [];
 
+  // Çok sayfalı ankette taslağı aç: yarım kalan anket kaldığı sayfadan devam eder
+  useEffect(() => {
+    if (maxPage < 2) return;
+    DraftService.start(preloadedSurvey.id)
+      .then(draft => {
+        setDraftId(draft.id);
+        const saved = {};
+        draft.answers.forEach(a => { saved[a.question] = a.value; });
+        setAnswers(prev => ({ ...saved, ...prev }));
+        if (draft.last_page > 0) setCurrentPage(Math.min(draft.last_page + 1, maxPage));
+      })
+      .catch(err => console.error(err)); // Taslak açılamazsa anket yine tek seferde gönderilir
+  }, [preloadedSurvey.id]);
+
+  // Şu anki sayfanın cevaplarını taslağa yazar (sadece bu sayfa gönderilir)
+  const saveCurrentPage = () => {
+    const pageAnswers = currentQuestions
+      .filter(q => answers[q.id] !== undefined && answers[q.id] !== '')
+      .map(q => ({ question: q.id, value: answers[q.id].toString() }));
+    return DraftService.savePage(draftId, currentPage, pageAnswers);
+  };
+
   // --- VALIDASYON FONKSİYONU ---
   const validateCurrentPage = () => {
     // Sadece şu anki sayfadaki soruları kontrol et
@@ -56,9 +84,18 @@ function SurveyForm({ preloadedSurvey }) {
     setAnswers({ ...answers, [qId]: val });
   };
 
-  const handleNext = (e) => {
+  const handleNext = async (e) => {
     e.preventDefault();
     if (!validateCurrentPage()) return;
+    if (draftId) {
+      try {
+        await saveCurrentPage();
+      } catch (err) {
+        console.error(err);
+        toast.error("Sayfa kaydedilemedi, lütfen tekrar deneyin.");
+        return;
+      }
+    }
     window.scrollTo(0, 0);
     setCurrentPage(prev => prev + 1);
   };
@@ -83,7 +120,13 @@ function SurveyForm({ preloadedSurvey }) {
           }))
         };
 
-        await ResponseService.create(payload);
+        if (draftId) {
+          // Son sayfayı kaydet, taslağı cevaba dönüştür
+          await saveCurrentPage();
+          await DraftService.submit(draftId, idempotencyKey);
+        } else {
+          await ResponseService.create(payload, idempotencyKey);
+        }
         setSubmitted(true);
         resolve();
       } catch (err) {
@@ -6,6 +6,7 @@ import '../styles/components.css';
 import SurveyForm from '../components/SurveyForm';
 // import { API_BASE_URL } from '../services/api';
 import { SurveyService } from '../services/survey.service';
+import { nextCursor } from '../services/api';
 
 /**
  * HomePage Component
@@ -24,6 +25,9 @@ function HomePage() {
     const [searchTerm, setSearchTerm] = useState(""); // Arama State'i
 
     const [expandedSurveyId, setExpandedSurveyId] = useState(null);
+    // Liste soruları içermez; açılan anketin soruları ayrıca (önbellekten) çekilir
+    const [surveyDetails, setSurveyDetails] = useState({});
+    const [cursor, setCursor] = useState(null); // Sonraki sayfanın imleci (yoksa son sayfa)
 
     // Debounce search effect
     useEffect(() => {
@@ -50,12 +54,14 @@ function HomePage() {
      * 
      * @param {string} token - Auth Token
      * @param {string} [query=""] - Optional search term
+     * @param {boolean} [more=false] - Append the next page instead of reloading
      */
-    const fetchSurveys = async (token, query = "") => {
+    const fetchSurveys = async (token, query = "", more = false) => {
         try {
-            const data = await SurveyService.getAll(searchTerm);
-            // data direkt array dönüyor (API yapsına göre değişir ama request helper json parse ediyor)
-            setSurveys(data);
+            const data = await SurveyService.getAll(searchTerm, more ? cursor : null);
+            // Liste sayfalı döner: { next, previous, results }
+            setSurveys(prev => (more ? [...prev, ...data.results] : data.results));
+            setCursor(nextCursor(data));
         } catch (err) {
             console.error("Anket çekme hatası:", err);
         } finally {
@@ -63,8 +69,15 @@ function HomePage() {
         }
     };
 
-    const toggleSurvey = (id) => {
+    const toggleSurvey = async (id) => {
         setExpandedSurveyId(expandedSurveyId === id ? null : id);
+        if (expandedSurveyId === id || surveyDetails[id]) return;
+        try {
+            const detail = await SurveyService.getById(id);
+            setSurveyDetails(prev => ({ ...prev, [id]: detail }));
+        } catch (err) {
+            console.error("Anket detayı çekme hatası:", err);
+        }
     };
 
     if (loading) return (
@@ -156,6 +169,9 @@ function HomePage() {
                                         <p style={{ margin: 0, fontSize: '0.95rem', color: 'var(--text-muted)', lineHeight: '1.5' }}>
                                             {survey.description}
                                         </p>
+                                        <span style={{ fontSize: '0.8rem', color: 'var(--text-muted)' }}>
+                                            {survey.question_count} soru{survey.page_count > 1 ? ` · ${survey.page_count} sayfa` : ''}
+                                        </span>
                                     </div>
 
                                     {/* DÖNEN İKON */}
@@ -179,7 +195,11 @@ function HomePage() {
                                             style={{ overflow: 'hidden' }} // Animasyon sırasında taşmayı önler
                                         >
                                             <div className="accordion-body">
-                                                <SurveyForm preloadedSurvey={survey} />
+                                                {surveyDetails[survey.id] ? (
+                                                    <SurveyForm preloadedSurvey={surveyDetails[survey.id]} />
+                                                ) : (
+                                                    <div className="loader"></div>
+                                                )}
                                             </div>
                                         </motion.div>
                                     )}
@@ -189,6 +209,13 @@ function HomePage() {
                     })
                 )}
             </div>
+            {cursor && (
+                <div style={{ textAlign: 'center', padding: '15px' }}>
+                    <button onClick={() => fetchSurveys(null, searchTerm, true)} className="auth-btn" style={{ width: 'auto', padding: '10px 25px' }}>
+                        Daha Fazla Yükle
+                    </button>
+                </div>
+            )}
         </div>
     );
 }
@@ -13,16 +13,15 @@ function AdminDashboard() {
   useEffect(() => {
     const fetchStats = async () => {
       try {
-        // 1. Anketleri Çek
-        const surveyData = await SurveyService.getAll();
-
-        // 2. Cevapları Çek (Admin olduğumuz için hepsi gelir)
-        const responseData = await ResponseService.getAll();
+        // Sadece sayılar çekilir (listeler sayfalı, tamamı indirilmez)
+        const [surveyCount, responseCount] = await Promise.all([
+          SurveyService.count(),
+          ResponseService.count()
+        ]);
 
         setStats({
-          // Eğer hata varsa veya dizi değilse 0 kabul et
-          surveyCount: Array.isArray(surveyData) ? surveyData.length : 0,
-          responseCount: Array.isArray(responseData) ? responseData.length : 0
+          surveyCount: surveyCount || 0,
+          responseCount: responseCount || 0
         });
 
       } catch (err) {
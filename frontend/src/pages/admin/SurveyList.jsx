@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { SurveyService } from '../../services/survey.service';
+import { nextCursor } from '../../services/api';
 
 /**
  * SurveyList Component (Admin)
@@ -17,6 +18,7 @@ function SurveyList() {
   const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState(''); // Arama State'i
   const [deleteConfirmId, setDeleteConfirmId] = useState(null); // Silme onayı için ID
+  const [cursor, setCursor] = useState(null); // Sonraki sayfanın imleci (yoksa son sayfa)
 
   // Verileri Çek (Debounce ile)
   useEffect(() => {
@@ -27,13 +29,14 @@ function SurveyList() {
     return () => clearTimeout(delayDebounceFn);
   }, [searchTerm]);
 
-  const fetchSurveys = async () => {
+  const fetchSurveys = async (more = false) => {
     try {
       // Sadece ilk yüklemede tam sayfa loading gösterilebilir, ama arama yaparken
       // listeyi şeffaflaştırmak daha iyidir.
 
-      const data = await SurveyService.getAll(searchTerm);
-      setSurveys(data);
+      const data = await SurveyService.getAll(searchTerm, more ? cursor : null);
+      setSurveys(prev => (more ? [...prev, ...data.results] : data.results));
+      setCursor(nextCursor(data));
     } catch (err) {
       console.error(err);
       toast.error("Anketler yüklenirken hata oluştu.");
@@ -157,6 +160,13 @@ function SurveyList() {
             </tbody>
           </table>
         )}
+        {cursor && (
+          <div style={{ textAlign: 'center', padding: '15px' }}>
+            <button onClick={() => fetchSurveys(true)} className="auth-btn" style={{ width: 'auto', padding: '10px 25px' }}>
+              Daha Fazla Yükle
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
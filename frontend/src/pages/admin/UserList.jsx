@@ -1,11 +1,13 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import { UserService } from '../../services/user.service';
+import { nextCursor } from '../../services/api';
 
 function UserList() {
     const [users, setUsers] = useState([]);
     const [filteredUsers, setFilteredUsers] = useState([]); // Added for filtering, as per instruction
     const [loading, setLoading] = useState(true);
+    const [cursor, setCursor] = useState(null); // Sonraki sayfanın imleci (yoksa son sayfa)
     const navigate = useNavigate(); // Hook'u tanımla
 
     // Modallar için State'ler
@@ -25,11 +27,12 @@ function UserList() {
 
     // --- API İŞLEMLERİ ---
 
-    const fetchUsers = async () => {
+    const fetchUsers = async (more = false) => {
         try {
-            const data = await UserService.getAll();
-            setUsers(data);
-            setFilteredUsers(data);
+            const data = await UserService.getAll(more ? cursor : null);
+            setUsers(prev => (more ? [...prev, ...data.results] : data.results));
+            setFilteredUsers(prev => (more ? [...prev, ...data.results] : data.results));
+            setCursor(nextCursor(data));
         } catch (err) {
             console.error("Kullanıcılar yüklenemedi:", err);
             // Handle 403 specifically if UserService doesn't abstract it
@@ -244,6 +247,13 @@ function UserList() {
                         ))}
                     </tbody>
                 </table>
+                {cursor && (
+                    <div style={{ textAlign: 'center', padding: '15px' }}>
+                        <button onClick={() => fetchUsers(true)} className="auth-btn" style={{ width: 'auto', padding: '10px 25px' }}>
+                            Daha Fazla Yükle
+                        </button>
+                    </div>
+                )}
             </div>
 
             {/* --- YENİ KULLANICI MODALI --- */}
@@ -49,6 +49,34 @@ export const request = async (endpoint, options = {}) => {
     }
 };
 
+/**
+ * Cursor of the next page of a paginated list (null on the last page).
+ * Lists (surveys, responses, users) return { next, previous, results }.
+ * @param {object} page - Paginated API response
+ */
+export const nextCursor = (page) => (page && page.next ? new URL(page.next).searchParams.get('cursor') : null);
+
+/**
+ * New Idempotency-Key for a submission (UUID v4).
+ * crypto.randomUUID only exists in secure contexts (HTTPS/localhost); a plain-HTTP
+ * deployment builds the same format from crypto.getRandomValues instead.
+ */
+export const newIdempotencyKey = () => {
+    if (typeof crypto !== 'undefined' && typeof crypto.randomUUID === 'function') {
+        return crypto.randomUUID();
+    }
+    const bytes = new Uint8Array(16);
+    if (typeof crypto !== 'undefined' && crypto.getRandomValues) {
+        crypto.getRandomValues(bytes);
+    } else {
+        for (let i = 0; i < bytes.length; i++) bytes[i] = Math.floor(Math.random() * 256);
+    }
+    bytes[6] = (bytes[6] & 0x0f) | 0x40; // version 4
+    bytes[8] = (bytes[8] & 0x3f) | 0x80; // variant
+    const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
 /**
  * Old helper kept for backward compatibility (Deprecated)
  */
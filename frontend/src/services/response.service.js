@@ -1,29 +1,39 @@
-import { request } from './api';
+import { request, nextCursor } from './api';
 
 export const ResponseService = {
-    // Tüm cevapları getir (Admin dashboard için)
-    getAll: async () => {
-        return await request('/responses/');
+    // Cevapları sayfa sayfa getir (Admin için): { next, previous, results }
+    getAll: async (cursor = null) => {
+        return await request(`/responses/${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`);
+    },
+
+    // Toplam cevap sayısı (Admin dashboard için)
+    count: async () => {
+        const data = await request('/responses/?page_size=1&count=true');
+        return data.count;
     },
 
     // Sadece benim cevaplarımı getir (Profil sayfası için)
     getMyResponses: async () => {
-        // Backend'de filter varsa parametre eklenebilir, 
-        // şu an /responses/ endpointi user'a göre de filtreliyor olabilir veya client filter yapıyordur.
-        // Ama user endpoint'i mantıklı:
-        // Şimdilik /responses/ çekip client side veya backend filter kullanıyoruz.
-        // Backend UserViewSet filter yapıyor mu bakalım.
-        // API analizine göre '/responses/' endpoint zaten user ise sadece kendi cevaplarını dönüyor (ViewSet).
-        return await request('/responses/');
+        // Cevapsız özet (anket adı, tarih); profil hepsini gösterir, sonraki sayfalar da takip edilir
+        const results = [];
+        let cursor = null;
+        do {
+            const data = await request(`/responses/mine/?page_size=200${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`);
+            results.push(...data.results);
+            cursor = nextCursor(data);
+        } while (cursor);
+        return results;
     },
 
     getById: async (id) => {
         return await request(`/responses/${id}/`);
     },
 
-    create: async (data) => {
+    // idempotencyKey: tekrar denemelerde aynı kalan anahtar (çift kayıt oluşmaz)
+    create: async (data, idempotencyKey) => {
         return await request('/responses/', {
             method: 'POST',
+            headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
             body: JSON.stringify(data)
         });
     },
@@ -41,3 +51,29 @@ export const ResponseService = {
         });
     }
 };
+
+// Çok sayfalı anketler: her sayfa ayrı kaydedilir, en sonda taslak gönderilir
+export const DraftService = {
+    // Taslağı başlatır veya varsa kaldığı yerden döner (kayıtlı cevaplarla)
+    start: async (surveyId) => {
+        return await request('/drafts/', {
+            method: 'POST',
+            body: JSON.stringify({ survey: surveyId })
+        });
+    },
+
+    // Sadece bu sayfanın cevapları gönderilir
+    savePage: async (id, page, answers) => {
+        return await request(`/drafts/${id}/`, {
+            method: 'PATCH',
+            body: JSON.stringify({ page, answers })
+        });
+    },
+
+    submit: async (id, idempotencyKey) => {
+        return await request(`/drafts/${id}/submit/`, {
+            method: 'POST',
+            headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}
+        });
+    }
+};
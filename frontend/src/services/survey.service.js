@@ -1,10 +1,19 @@
 import { request } from './api';
 
 export const SurveyService = {
-    // Tüm anketleri getir (arama destekli)
-    getAll: async (search = '') => {
-        const query = search ? `?search=${encodeURIComponent(search)}` : '';
-        return await request(`/surveys/${query}`);
+    // Anketleri sayfa sayfa getir (arama destekli): { next, previous, results }
+    getAll: async (search = '', cursor = null) => {
+        const params = new URLSearchParams();
+        if (search) params.set('search', search);
+        if (cursor) params.set('cursor', cursor);
+        const query = params.toString();
+        return await request(`/surveys/${query ? `?${query}` : ''}`);
+    },
+
+    // Toplam anket sayısı (tek bir COUNT sorgusu)
+    count: async () => {
+        const data = await request('/surveys/?fields=id&page_size=1&count=true');
+        return data.count;
     },
 
     // Tek bir anketin detayını getir
@@ -2,8 +2,9 @@ import { request } from './api';
 
 export const UserService = {
     // Tüm kullanıcıları getir (Admin için)
-    getAll: async () => {
-        return await request('/users/');
+    // Sayfa sayfa: { next, previous, results }
+    getAll: async (cursor = null) => {
+        return await request(`/users/${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`);
     },
 
     // Tek bir kullanıcıyı getir